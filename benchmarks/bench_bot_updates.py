@@ -0,0 +1,139 @@
+"""
+Bot update delivery: polling (long-poll getUpdates) vs webhook
+
+Starts the real bot (python -m bot.main) in a subprocess for each BOT_MODE,
+pointed at the in-process fake Telegram API (benchmarks/fake_telegram.py), and
+measures:
+  - update-to-reply latency: from the moment Telegram has an update for the bot
+    until the bot's sendMessage for the /start reply arrives
+  - idle cost: CPU time the bot process burns and API requests it makes while no
+    updates arrive (read from /proc, Linux only)
+
+``--latency`` delays every fake API response and webhook delivery to model the
+round trip to Telegram; polling pays it on the getUpdates response and again to
+re-open the long poll, webhook only on the push.
+
+Usage:
+    python -m benchmarks.bench_bot_updates [--trials 50] [--idle 15] [--latency 0.05] [--poll-timeout 10]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Optional
+
+from benchmarks.fake_telegram import FakeTelegram
+
+SECRET = "bench_secret_token"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """utime + stime of a process, None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def run_mode(mode: str, trials: int, idle: float, latency: float, poll_timeout: int) -> dict:
+    async with FakeTelegram(latency=latency) as fake:
+        data_dir = tempfile.mkdtemp(prefix="bench-bot-")
+        env = {k: v for k, v in os.environ.items() if "proxy" not in k.lower()}
+        env.update({
+            "BOT_TOKEN": "123456:bench",
+            "TELEGRAM_API_URL": fake.url,
+            "BOT_MODE": mode,
+            "BOT_DATA_DIR": data_dir,
+            "ADMIN_CHAT_ID": "",
+            "WEBHOOK_URL": "",
+            "NO_PROXY": "127.0.0.1,localhost",
+            "BOT_POLL_TIMEOUT": str(poll_timeout),
+        })
+        if mode == "webhook":
+            port = free_port()
+            env.update({
+                "WEBHOOK_URL": f"http://127.0.0.1:{port}",
+                "WEBHOOK_LISTEN": "127.0.0.1",
+                "WEBHOOK_PORT": str(port),
+                "WEBHOOK_SECRET": SECRET,
+            })
+
+        log = open(os.path.join(data_dir, "bot.log"), "w")
+        proc = subprocess.Popen([sys.executable, "-m", "bot.main"], env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            # The webhook listener is bound before setWebhook is called
+            await fake.wait_for_call("setWebhook" if mode == "webhook" else "getUpdates", timeout=30)
+
+            if mode == "webhook":
+                # Deliveries with the wrong secret must be refused
+                await fake.push_update(1, "/start", secret="wrong")
+                assert fake.webhook_status[-1] == 403, fake.webhook_status
+
+            for _ in range(3):  # warm-up
+                await fake.round_trip(1, "/start")
+
+            latencies = [await fake.round_trip(1000 + i, "/start") for i in range(trials)]
+
+            # Let the post-reply activity settle, then measure a quiet period
+            await asyncio.sleep(1)
+            calls_before = sum(fake.calls.values())
+            cpu_before = cpu_seconds(proc.pid)
+            await asyncio.sleep(idle)
+            cpu_after = cpu_seconds(proc.pid)
+            idle_calls = sum(fake.calls.values()) - calls_before
+        except Exception:
+            log.flush()
+            with open(log.name) as f:
+                sys.stderr.write(f.read()[-3000:])
+            raise
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            log.close()
+
+    idle_cpu = None if cpu_before is None or cpu_after is None else cpu_after - cpu_before
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "mean": statistics.fmean(latencies),
+        "idle_cpu": idle_cpu,
+        "idle_calls": idle_calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--idle", type=float, default=15.0, help="idle period to measure (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated Telegram round trip per call (s)")
+    parser.add_argument("--poll-timeout", type=int, default=10, help="getUpdates long-poll timeout (s)")
+    args = parser.parse_args()
+
+    print(f"{args.trials} /start round trips, {args.latency * 1000:.0f}ms simulated latency, "
+          f"{args.idle:.0f}s idle, long-poll timeout {args.poll_timeout}s")
+    for mode in ("polling", "webhook"):
+        r = asyncio.run(run_mode(mode, args.trials, args.idle, args.latency, args.poll_timeout))
+        cpu = "n/a" if r["idle_cpu"] is None else f"{r['idle_cpu'] * 1000 / args.idle:5.2f} ms/s"
+        print(f"  {mode:8}: p50 {r['p50'] * 1000:6.1f} ms  p95 {r['p95'] * 1000:6.1f} ms  "
+              f"mean {r['mean'] * 1000:6.1f} ms | idle CPU {cpu}, {r['idle_calls']} API calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Jupiter quote fan-out: one blocking request per quote (the old calculate_* path,
+simulated with a fresh connection per call) vs the pooled, concurrent
+JupiterQuoteClient building slippage curves
+
+The quote endpoint is replaced by an in-process mock transport that charges a
+fixed connection setup cost for each new client plus a per-request latency, so the
+numbers reflect connection reuse and concurrency, not network conditions.
+
+Usage:
+    python -m benchmarks.bench_jupiter_quotes [--tokens 8] [--sizes 6] [--latency 0.05] [--handshake 0.1]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from monitors.jupiter_client import JupiterQuoteClient, Token
+from monitors.tokens import get_registry
+
+USDT = get_registry().quote
+
+
+def make_transport(latency: float, counter: dict) -> httpx.AsyncBaseTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter["requests"] += 1
+        await asyncio.sleep(latency)
+        amount = int(request.url.params["amount"])
+        buying = request.url.params["inputMint"] == USDT.mint
+        # 100 USDT per token with a small size-dependent impact
+        if buying:
+            out = int(amount / 1e6 / 100 * (1 - amount / 1e13) * 1e8)
+        else:
+            out = int(amount / 1e8 * 100 * (1 - amount / 1e15) * 1e6)
+        return httpx.Response(200, json={"inAmount": str(amount), "outAmount": str(out), "priceImpactPct": "0.001"})
+
+    return httpx.MockTransport(handler)
+
+
+async def sequential(tokens, sizes, latency, handshake) -> int:
+    """One client (= one TLS handshake) per request, one request at a time"""
+    counter = {"requests": 0}
+    for token in tokens:
+        for size in sizes:
+            for i, o, amount in ((USDT, token, size), (token, USDT, size / 100)):
+                await asyncio.sleep(handshake)
+                async with JupiterQuoteClient(client=httpx.AsyncClient(transport=make_transport(latency, counter))) as client:
+                    await client.quote(i, o, amount)
+    return counter["requests"]
+
+
+async def pooled(tokens, sizes, latency, handshake, concurrency) -> int:
+    counter = {"requests": 0}
+    await asyncio.sleep(handshake)
+    async with httpx.AsyncClient(transport=make_transport(latency, counter)) as http:
+        client = JupiterQuoteClient(max_concurrency=concurrency, client=http)
+        curves = await client.slippage_curves(tokens, sizes)
+    assert all(len(c.points) == 2 * len(sizes) for c in curves.values())
+    return counter["requests"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=8)
+    parser.add_argument("--sizes", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.05, help="per-request latency (s)")
+    parser.add_argument("--handshake", type=float, default=0.1, help="connection setup cost (s)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    tokens = [Token(f"TOK{i}", f"mint{i}", 8) for i in range(args.tokens)]
+    sizes = [100 * 10 ** (i / 2) for i in range(args.sizes)]
+
+    start = time.perf_counter()
+    n_seq = asyncio.run(sequential(tokens, sizes, args.latency, args.handshake))
+    t_seq = time.perf_counter() - start
+
+    start = time.perf_counter()
+    n_pool = asyncio.run(pooled(tokens, sizes, args.latency, args.handshake, args.concurrency))
+    t_pool = time.perf_counter() - start
+
+    print(f"{args.tokens} tokens x {args.sizes} sizes x 2 sides, "
+          f"{args.latency * 1000:.0f}ms latency, {args.handshake * 1000:.0f}ms handshake")
+    print(f"  one-off blocking : {t_seq:7.2f} s ({n_seq} requests)")
+    print(f"  pooled x{args.concurrency:<3}     : {t_pool:7.2f} s ({n_pool} requests)  {t_seq / t_pool:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Local order book maintenance: sorted-key OrderBook vs a plain dict that is
+sorted on every read, for a stream of single-level deltas each followed by a
+best bid/ask read and a notional fill
+
+Usage:
+    python -m benchmarks.bench_order_book [--levels 50] [--updates 200000]
+"""
+
+import argparse
+import random
+import time
+
+from monitors.order_book import OrderBook
+
+
+class NaiveBook:
+    def __init__(self):
+        self.bids = {}
+        self.asks = {}
+
+    def apply_snapshot(self, bids, asks):
+        self.bids = {float(p): float(s) for p, s in bids}
+        self.asks = {float(p): float(s) for p, s in asks}
+
+    def apply_delta(self, bids, asks):
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for price, size in levels:
+                if size:
+                    side[float(price)] = float(size)
+                else:
+                    side.pop(float(price), None)
+
+    def best(self):
+        return max(self.bids), min(self.asks)
+
+    def fill_ask(self, notional):
+        cost = quantity = 0.0
+        for price in sorted(self.asks):
+            take = min(notional - cost, price * self.asks[price])
+            cost += take
+            quantity += take / price
+            if cost >= notional:
+                break
+        return cost / quantity
+
+
+def make_updates(levels: int, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    updates = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            price = round(100 - rng.randrange(levels) * 0.01, 2)
+            updates.append(([(price, rng.choice((0.0, 1.0, 2.0, 5.0)))], []))
+        else:
+            price = round(100.01 + rng.randrange(levels) * 0.01, 2)
+            updates.append(([], [(price, rng.choice((0.0, 1.0, 2.0, 5.0)))]))
+    return updates
+
+
+def run(book, updates, snapshot, delta, best, fill) -> float:
+    snapshot(*book)
+    start = time.perf_counter()
+    for bids, asks in updates:
+        delta(bids, asks)
+        best()
+        fill()
+    return (time.perf_counter() - start) / len(updates) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--notional", type=float, default=1000)
+    args = parser.parse_args()
+
+    snapshot = (
+        [(round(100 - i * 0.01, 2), 5.0) for i in range(args.levels)],
+        [(round(100.01 + i * 0.01, 2), 5.0) for i in range(args.levels)],
+    )
+    updates = make_updates(args.levels, args.updates)
+
+    book = OrderBook(depth=args.levels)
+    ours = run(
+        snapshot, updates, book.apply_snapshot, book.apply_delta,
+        lambda: (book.bids.best(), book.asks.best()), lambda: book.asks.fill(args.notional)
+    )
+
+    naive = NaiveBook()
+    theirs = run(
+        snapshot, updates, naive.apply_snapshot, naive.apply_delta,
+        naive.best, lambda: naive.fill_ask(args.notional)
+    )
+
+    print(f"{args.levels} levels per side, {args.updates} deltas (apply + best + {args.notional:g} fill)")
+    print(f"  OrderBook  : {ours:8.2f} us/update")
+    print(f"  dict+sort  : {theirs:8.2f} us/update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+PriceBook microbenchmark: tick write throughput and snapshot read cost,
+compared with the previous nested dicts + global threading.Lock
+
+Usage:
+    python -m benchmarks.bench_price_book [--symbols 120] [--exchanges 6]
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import Dict
+
+from monitors.price_book import PriceBook
+
+
+class LegacyBook:
+    """The old price_monitor storage: nested dicts guarded by one lock"""
+
+    def __init__(self, symbols, exchanges):
+        self.lock = threading.Lock()
+        self.futures: Dict[str, float] = {}
+        self.spot: Dict[str, Dict[str, float]] = {e: {} for e in exchanges}
+        self.exchanges = exchanges
+
+    def update(self, exchange, symbol, price_type, price, extra_data=None):
+        with self.lock:
+            if price_type == "futures":
+                self.futures[symbol] = price
+            else:
+                self.spot[exchange][symbol] = price
+
+    def read_symbol(self, symbol):
+        with self.lock:
+            futures = self.futures.get(symbol)
+        spot = {}
+        for exchange in self.exchanges:
+            with self.lock:
+                if symbol in self.spot[exchange]:
+                    spot[exchange] = self.spot[exchange][symbol]
+        return spot, futures
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.futures), {e: dict(prices) for e, prices in self.spot.items()}
+
+
+def make_ticks(symbols, exchanges, n):
+    rng = random.Random(42)
+    return [
+        (rng.choice(exchanges), rng.choice(symbols), rng.choice(("spot", "futures")), rng.uniform(90, 110))
+        for _ in range(n)
+    ]
+
+
+def bench_writes(book, ticks) -> float:
+    update = book.update
+    start = time.perf_counter()
+    for exchange, symbol, price_type, price in ticks:
+        update(exchange, symbol, price_type, price, None)
+    return len(ticks) / (time.perf_counter() - start)
+
+
+def bench_reads(fn, arg_list, repeat) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for arg in arg_list:
+            fn(arg)
+    return (time.perf_counter() - start) / (repeat * len(arg_list)) * 1e6
+
+
+def bench_contended(book, ticks, symbols, duration=1.0):
+    """One writer thread feeding ticks while the caller reads symbols"""
+    stop = threading.Event()
+    written = [0]
+
+    def writer():
+        update = book.update
+        while not stop.is_set():
+            for exchange, symbol, price_type, price in ticks[:10000]:
+                update(exchange, symbol, price_type, price, None)
+            written[0] += 10000
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    reads = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for symbol in symbols:
+            book.read_symbol(symbol)
+        reads += len(symbols)
+    stop.set()
+    thread.join()
+    elapsed = time.perf_counter() - start
+    return written[0] / elapsed, reads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=120)
+    parser.add_argument("--exchanges", type=int, default=6)
+    parser.add_argument("--ticks", type=int, default=500000)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}X_USDT" for i in range(args.symbols)]
+    exchanges = ["gateio", "bybit", "bitget"] + [f"venue{i}" for i in range(max(0, args.exchanges - 3))]
+    exchanges = exchanges[:args.exchanges]
+    ticks = make_ticks(symbols, exchanges, args.ticks)
+
+    print(f"{args.symbols} symbols x {len(exchanges)} exchanges, {args.ticks} ticks")
+
+    for name, cls in (("PriceBook", PriceBook), ("dict+lock", LegacyBook)):
+        book = cls(symbols, exchanges)
+        tps = bench_writes(book, ticks)
+        read_us = bench_reads(book.read_symbol, symbols, 200)
+        w_tps, r_ps = bench_contended(cls(symbols, exchanges), ticks, symbols)
+        print(f"{name:>10}: writes {tps:12,.0f} ticks/s | read_symbol {read_us:6.2f} us"
+              f" | contended: {w_tps:10,.0f} ticks/s, {r_ps:10,.0f} reads/s")
+
+    for name, cls in (("PriceBook", PriceBook), ("dict+lock", LegacyBook)):
+        book = cls(symbols, exchanges)
+        bench_writes(book, ticks[:20000])
+        start = time.perf_counter()
+        for _ in range(1000):
+            book.snapshot()
+        print(f"{name:>10}: whole-book snapshot {(time.perf_counter() - start) / 1000 * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
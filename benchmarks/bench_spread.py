@@ -0,0 +1,68 @@
+"""
+Batched spread computation: NumPy vs pure-Python backend
+
+Usage:
+    python -m benchmarks.bench_spread [--symbols 64] [--exchanges 5]
+"""
+
+import argparse
+import random
+import time
+
+from monitors.price_book import PriceBook
+from monitors.spread import compute_spreads, HAS_NUMPY
+
+
+def build_book(num_symbols: int, num_exchanges: int) -> PriceBook:
+    rng = random.Random(7)
+    symbols = [f"SYM{i}X_USDT" for i in range(num_symbols)]
+    exchanges = ["gateio"] + [f"venue{i}" for i in range(num_exchanges - 1)]
+    book = PriceBook(symbols, exchanges)
+    for symbol in symbols:
+        base = rng.uniform(10, 500)
+        book.update("gateio", symbol, "futures", base)
+        for exchange in exchanges:
+            # 留一些空槽位，模拟尚未收到报价的交易所
+            if rng.random() < 0.9:
+                book.update(exchange, symbol, "spot", base * rng.uniform(0.99, 1.01))
+    return book
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=64)
+    parser.add_argument("--exchanges", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    book = build_book(args.symbols, args.exchanges)
+    symbols = book.symbols
+
+    def run(backend, subset):
+        return compute_spreads(book, subset, "gateio", 0.5, True, backend=backend)
+
+    backends = ["python"] + (["numpy"] if HAS_NUMPY else [])
+    if not HAS_NUMPY:
+        print("NumPy not installed, only the pure-Python backend is measured")
+    else:
+        py, vec = run("python", symbols), run("numpy", symbols)
+        assert py.levels == vec.levels
+        assert py.max_exchange == vec.max_exchange
+        assert all(list(a) == list(b) for a, b in zip(py.exceeded, vec.exceeded))
+
+    print(f"{args.symbols} symbols x {args.exchanges} exchanges")
+    for count in (1, 4, 16, args.symbols):
+        subset = symbols[:count]
+        line = " | ".join(f"{b} {timed(lambda: run(b, subset), args.repeat):9.1f} us" for b in backends)
+        print(f"  batch of {count:4d} symbols: {line}")
+
+
+if __name__ == "__main__":
+    main()
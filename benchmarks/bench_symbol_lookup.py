@@ -0,0 +1,53 @@
+"""
+Per-tick symbol lookup overhead at 500 symbols: SymbolRegistry vs the old
+linear zip scan (Bybit) and list membership test (Gate.io)
+
+Usage:
+    python -m benchmarks.bench_symbol_lookup [--symbols 500]
+"""
+
+import argparse
+import random
+import time
+
+from monitors.exchanges.symbols import SymbolRegistry
+
+
+def legacy_bybit_lookup(symbols, bybit_symbols, bybit_symbol):
+    for orig, bybit in zip(symbols, bybit_symbols):
+        if bybit == bybit_symbol:
+            return orig
+    return None
+
+
+def ns_per_tick(fn, ticks) -> float:
+    start = time.perf_counter()
+    for tick in ticks:
+        fn(tick)
+    return (time.perf_counter() - start) / len(ticks) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=200000)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}X_USDT" for i in range(args.symbols)]
+    bybit_symbols = [s.replace("_", "") for s in symbols]
+    rng = random.Random(1)
+    bybit_ticks = [rng.choice(bybit_symbols) for _ in range(args.ticks)]
+    gateio_ticks = [rng.choice(symbols) for _ in range(args.ticks)]
+
+    bybit = SymbolRegistry.for_exchange("bybit", symbols)
+    gateio = SymbolRegistry.for_exchange("gateio", symbols)
+
+    print(f"{args.symbols} symbols, {args.ticks} ticks")
+    print(f"  bybit  zip scan       : {ns_per_tick(lambda t: legacy_bybit_lookup(symbols, bybit_symbols, t), bybit_ticks):10.1f} ns/tick")
+    print(f"  bybit  registry       : {ns_per_tick(bybit.to_standard, bybit_ticks):10.1f} ns/tick")
+    print(f"  gateio list membership: {ns_per_tick(symbols.__contains__, gateio_ticks):10.1f} ns/tick")
+    print(f"  gateio registry       : {ns_per_tick(gateio.to_standard, gateio_ticks):10.1f} ns/tick")
+
+
+if __name__ == "__main__":
+    main()
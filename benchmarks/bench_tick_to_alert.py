@@ -0,0 +1,108 @@
+"""
+Tick-to-alert latency: event-driven evaluation vs the old CHECK_INTERVAL polling loop
+
+Usage:
+    python -m benchmarks.bench_tick_to_alert [--trials 20] [--poll-interval 1.0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import threading
+import time
+
+os.environ["EXCHANGES"] = "gateio,bybit"
+os.environ["MONITOR_SYMBOLS"] = "TSLAX_USDT,GOOGLX_USDT,NVDAX_USDT,AMZNX_USDT"
+os.environ["PRICE_DIFF_THRESHOLD"] = "0.5"
+os.environ["USE_PERCENTAGE"] = "True"
+
+from monitors import price_monitor as pm  # noqa: E402
+
+SYMBOL = "TSLAX_USDT"
+alert_times = []
+alert_received = threading.Event()
+
+
+def fake_send(message: str, created_at=None) -> bool:
+    alert_times.append(time.perf_counter())
+    alert_received.set()
+    return True
+
+
+def event_loop(stop: threading.Event):
+    while not stop.is_set():
+        pm.run_pending_evaluations(0.1)
+
+
+def polling_loop(stop: threading.Event, interval: float):
+    while not stop.is_set():
+        time.sleep(interval)
+        pm.evaluate_symbols(pm.SYMBOLS)
+
+
+def reset_prices():
+    for symbol in pm.SYMBOLS:
+        pm.on_price_update("gateio", symbol, "futures", 100.0, {})
+        for exchange in pm.ENABLED_EXCHANGES:
+            pm.on_price_update(exchange, symbol, "spot", 100.0, {})
+        pm.last_alert_times[symbol] = {"WARN": 0, "EMERGENCY": 0}
+
+
+def run(mode: str, trials: int, poll_interval: float) -> list:
+    stop = threading.Event()
+    if mode == "event":
+        worker = threading.Thread(target=event_loop, args=(stop,), daemon=True)
+    else:
+        worker = threading.Thread(target=polling_loop, args=(stop, poll_interval), daemon=True)
+    worker.start()
+
+    latencies = []
+    for _ in range(trials):
+        reset_prices()
+        alert_received.clear()
+        alert_times.clear()
+        # 随机错开与轮询周期的相位
+        time.sleep(random.uniform(0, poll_interval))
+
+        t0 = time.perf_counter()
+        pm.on_price_update("bybit", SYMBOL, "spot", 98.0, {})
+        if alert_received.wait(poll_interval * 2 + 1):
+            latencies.append((alert_times[0] - t0) * 1000)
+
+    stop.set()
+    worker.join()
+    return latencies
+
+
+def report(name: str, latencies: list):
+    if not latencies:
+        print(f"{name:>8}: no alerts received")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:>8}: n={len(latencies)}  mean={statistics.mean(latencies):8.3f}ms  "
+          f"p50={statistics.median(latencies):8.3f}ms  p95={p95:8.3f}ms  max={latencies[-1]:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    pm.send_telegram_message = fake_send
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        event_latencies = run("event", args.trials, args.poll_interval)
+        polling_latencies = run("polling", args.trials, args.poll_interval)
+
+    print(f"tick-to-alert latency ({args.trials} trials, poll interval {args.poll_interval}s)")
+    report("event", event_latencies)
+    report("polling", polling_latencies)
+
+
+if __name__ == "__main__":
+    main()
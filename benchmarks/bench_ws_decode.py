@@ -0,0 +1,100 @@
+"""
+WebSocket frame decoding: json vs orjson/msgspec, with and without the ticker pre-filter
+
+Replays the frame captures in benchmarks/data through each connector's message
+handler and reports frames/sec and retained allocations per frame.
+
+Usage:
+    python -m benchmarks.bench_ws_decode [--repeat 50]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from monitors.exchanges.bybit import BybitConnector
+from monitors.exchanges.decoder import DECODERS
+from monitors.exchanges.gateio import GateIOConnector
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+SYMBOLS = ["TSLAX_USDT", "GOOGLX_USDT", "NVDAX_USDT", "AMZNX_USDT", "AAPLX_USDT", "METAX_USDT"]
+
+
+def load_frames(name: str):
+    with open(os.path.join(DATA_DIR, f"{name}.jsonl"), encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def noop(**kwargs):
+    pass
+
+
+def make_pipeline(decode, handler, prefilter):
+    if prefilter is None:
+        def process(raw):
+            handler(decode(raw))
+    else:
+        def process(raw):
+            if prefilter(raw):
+                handler(decode(raw))
+    return process
+
+
+def frames_per_sec(process, frames, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for raw in frames:
+            process(raw)
+    return len(frames) * repeat / (time.perf_counter() - start)
+
+
+def allocations_per_frame(decode, prefilter, frames) -> float:
+    """Memory blocks still referenced by the decoded frames, per input frame"""
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for raw in frames:
+        if prefilter is None or prefilter(raw):
+            kept.append(decode(raw))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return blocks / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    gateio = GateIOConnector(SYMBOLS, noop)
+    bybit = BybitConnector(SYMBOLS, noop)
+
+    streams = [
+        ("gateio_spot", gateio._handle_spot_message, GateIOConnector.SPOT_PREFILTER),
+        ("gateio_futures", gateio._handle_futures_message, GateIOConnector.FUTURES_PREFILTER),
+        ("bybit_spot", bybit._handle_spot_message, BybitConnector.SPOT_PREFILTER),
+    ]
+
+    print(f"decoders available: {', '.join(DECODERS)}")
+    for name, handler, prefilter in streams:
+        frames = load_frames(name)
+        print(f"\n{name} ({len(frames)} frames)")
+        for decoder_name, decode in DECODERS.items():
+            for label, pf in (("full parse", None), ("prefilter", prefilter)):
+                fps = frames_per_sec(make_pipeline(decode, handler, pf), frames, args.repeat)
+                allocs = allocations_per_frame(decode, pf, frames)
+                print(f"  {decoder_name:>8} {label:>10}: {fps:12,.0f} frames/s  {allocs:6.1f} allocs/frame")
+
+        # 只看被预过滤丢弃的帧（pong、订阅回执）
+        control = [raw for raw in frames if not prefilter(raw)]
+        decode = next(iter(DECODERS.values()))
+        full = frames_per_sec(make_pipeline(decode, handler, None), control, args.repeat * 10)
+        skipped = frames_per_sec(make_pipeline(decode, handler, prefilter), control, args.repeat * 10)
+        print(f"  control frames ({len(control)}): full parse {1e9 / full:6.0f} ns/frame, "
+              f"prefilter {1e9 / skipped:6.0f} ns/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Local fake Telegram Bot API for exercising bot.main without the network
+
+Implements the handful of methods the bot uses (getMe, getUpdates with long
+polling, setWebhook / deleteWebhook / getWebhookInfo, sendMessage); every other
+method succeeds with ``true``. Point the bot at it with TELEGRAM_API_URL.
+Updates pushed with ``push_update`` are delivered the way Telegram would: queued
+for getUpdates while no webhook is set, otherwise POSTed to the webhook with the
+X-Telegram-Bot-Api-Secret-Token header. ``latency`` adds a fixed delay to every
+API response and webhook delivery to stand in for the round trip to Telegram.
+
+Usage (interactive: type "<chat_id> <text>" lines, replies are printed):
+    python -m benchmarks.fake_telegram [--port 8081] [--latency 0.0]
+    TELEGRAM_API_URL=http://127.0.0.1:8081 BOT_TOKEN=123:fake python -m bot.main
+"""
+
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+
+# String parameters PTB sends as-is (everything else is JSON-encoded)
+RAW_PARAMS = frozenset({"text", "url", "secret_token", "parse_mode"})
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+
+class Reply(NamedTuple):
+    """A sendMessage call made by the bot"""
+    chat_id: int
+    text: str
+    received_at: float  # time.perf_counter()
+
+
+class FakeTelegram:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.calls: collections.Counter = collections.Counter()
+        self.replies: List[Reply] = []
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.webhook_status: List[int] = []  # HTTP status of each webhook delivery
+        self._updates: List[dict] = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_update = asyncio.Event()
+        self._reply_waiters: Dict[int, List[asyncio.Future]] = collections.defaultdict(list)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._client = httpx.AsyncClient(timeout=10, trust_env=False)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def __aenter__(self) -> "FakeTelegram":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ==================== Driving the bot ====================
+    def make_update(self, chat_id: int, text: str) -> dict:
+        update_id = next(self._update_ids)
+        message = {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "User"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+            "text": text,
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return {"update_id": update_id, "message": message}
+
+    async def push_update(self, chat_id: int, text: str, secret: Optional[str] = None) -> int:
+        """
+        Deliver a text message from chat_id to the bot
+
+        Args:
+            secret: Override the secret token sent with a webhook delivery (to test rejection)
+
+        Returns:
+            The update_id
+        """
+        update = self.make_update(chat_id, text)
+        if self.webhook_url:
+            await asyncio.sleep(self.latency)
+            headers = {"X-Telegram-Bot-Api-Secret-Token": secret if secret is not None else self.webhook_secret or ""}
+            response = await self._client.post(self.webhook_url, json=update, headers=headers)
+            self.webhook_status.append(response.status_code)
+        else:
+            self._updates.append(update)
+            self._new_update.set()
+        return update["update_id"]
+
+    async def wait_reply(self, chat_id: int, timeout: float = 10.0) -> Reply:
+        """Wait for the next sendMessage to chat_id"""
+        future = asyncio.get_running_loop().create_future()
+        self._reply_waiters[chat_id].append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if future in self._reply_waiters[chat_id]:
+                self._reply_waiters[chat_id].remove(future)
+
+    async def round_trip(self, chat_id: int, text: str, timeout: float = 10.0) -> float:
+        """Push a message and wait for the bot's reply; returns update-to-reply seconds"""
+        waiter = asyncio.ensure_future(self.wait_reply(chat_id, timeout))
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        await self.push_update(chat_id, text)
+        reply = await waiter
+        return reply.received_at - started
+
+    async def wait_for_call(self, method: str, timeout: float = 10.0):
+        """Wait until the bot has called method at least once"""
+        deadline = time.monotonic() + timeout
+        while not self.calls[method]:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"bot never called {method}")
+            await asyncio.sleep(0.01)
+
+    # ==================== Bot API methods ====================
+    async def _get_updates(self, params: dict) -> list:
+        offset = int(params.get("offset") or 0)
+        if offset:
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        limit = int(params.get("limit") or 100)
+        return self._updates[:limit]
+
+    def _send_message(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        reply = Reply(chat_id, params.get("text", ""), time.perf_counter())
+        self.replies.append(reply)
+        for future in self._reply_waiters.pop(chat_id, []):
+            if not future.done():
+                future.set_result(reply)
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": reply.text,
+        }
+
+    async def _call(self, method: str, params: dict):
+        self.calls[method] += 1
+        if method == "getMe":
+            return BOT_USER
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method == "sendMessage":
+            return self._send_message(params)
+        if method == "setWebhook":
+            self.webhook_url = params.get("url") or None
+            self.webhook_secret = params.get("secret_token")
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = self.webhook_secret = None
+            return True
+        if method == "getWebhookInfo":
+            return {"url": self.webhook_url or "", "has_custom_certificate": False, "pending_update_count": len(self._updates)}
+        return True
+
+    # ==================== HTTP ====================
+    @staticmethod
+    def _parse_params(body: bytes, content_type: str) -> dict:
+        if not body:
+            return {}
+        if content_type.startswith("application/json"):
+            return json.loads(body)
+        params = {}
+        for key, value in parse_qsl(body.decode(), keep_blank_values=True):
+            if key in RAW_PARAMS:
+                params[key] = value
+                continue
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        return params
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                method = path.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+                result = await self._call(method, self._parse_params(body, headers.get("content-type", "")))
+                await asyncio.sleep(self.latency)
+
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def interactive(port: int, latency: float):
+    async with FakeTelegram(port=port, latency=latency) as fake:
+        print(f"fake Telegram listening on {fake.url} (set TELEGRAM_API_URL={fake.url})", file=sys.stderr)
+        loop = asyncio.get_running_loop()
+        printed = 0
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            chat_id, _, text = line.strip().partition(" ")
+            if not chat_id.lstrip("-").isdigit() or not text:
+                print("usage: <chat_id> <text>", file=sys.stderr)
+                continue
+            try:
+                await fake.round_trip(int(chat_id), text)
+            except asyncio.TimeoutError:
+                print("(no reply)", file=sys.stderr)
+            for reply in fake.replies[printed:]:
+                print(f"[{reply.chat_id}] {reply.text}")
+            printed = len(fake.replies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay added to every API response (s)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(interactive(args.port, args.latency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+群发模块
+在 PTB 的事件循环上用一组并发 worker 发送消息，通过令牌桶同时满足全局与单个聊天的频率限制，
+遇到 RetryAfter（flood wait）时整体暂停，网络错误按指数退避重试。
+请求超时（TimedOut）时消息可能已经送达，因此不重试，记为 "unconfirmed"
+
+每次群发的进度追加写入 BOT_DATA_DIR/broadcasts/<job_id>.jsonl：
+    第一行: {"job": ..., "created": ..., "messages": [[chat_id, text], ...]}
+    之后每完成一个聊天追加一行: {"chat": chat_id, "status": "sent" | "blocked" | "unconfirmed"}
+    每次恢复未完成的任务时追加: {"resume": 第几次恢复}
+    全部完成后追加: {"done": true, ...}；放弃恢复时追加: {"done": true, "abandoned": 原因}
+重启后对同一 job_id 再次群发（或启动时 resume_pending）只会发送尚未完成的聊天。
+已记录的聊天不会重发；超时的消息不重试，可能没有送达（最多一次）；
+其余网络错误会重试，若请求其实已送达、只是响应丢失，则可能重复（至少一次）。
+resume_pending 不再恢复创建过久或恢复次数过多的任务（例如昨天的早安问候不会在今天补发），
+并删除完成已久的进度文件
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    异步令牌桶
+
+    acquire() 在令牌不足时等待；等待方按到达顺序依次获得令牌。
+    pause() 用于 flood wait：在指定时间内不发放任何令牌
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发量），默认等于 rate（至少为 1）
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """在 seconds 秒内停止发放令牌，恢复后从空桶开始"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class BroadcastReport(NamedTuple):
+    """一次群发的结果"""
+    job_id: str
+    total: int          # 本次群发的聊天总数
+    sent: int           # 本次成功发送
+    blocked: int        # 永久失败（用户屏蔽、聊天不存在等），不会再重试
+    failed: int         # 重试耗尽的临时失败，下次恢复时会重发
+    unconfirmed: int    # 请求超时、无法确认是否送达（不重试，避免重复）
+    skipped: int        # 之前已完成（恢复时跳过）
+    retry_after: int    # 遇到 flood wait 的次数
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """每秒发送的消息数"""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def format(self) -> str:
+        return (
+            f"群发 {self.job_id} 完成: 共 {self.total}，成功 {self.sent}，屏蔽 {self.blocked}，"
+            f"失败 {self.failed}，未确认 {self.unconfirmed}，跳过 {self.skipped}，flood wait {self.retry_after} 次，"
+            f"用时 {self.elapsed:.1f}秒，{self.throughput:.1f} 条/秒"
+        )
+
+
+class BroadcastProgress:
+    """群发进度文件（追加写，每完成一个聊天 flush 一次）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.job: Optional[dict] = None
+        self.completed: Dict[int, str] = {}
+        self.resumes = 0
+        self.done = False
+        self._file = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 崩溃时写了一半的行
+                    if "job" in record:
+                        self.job = record
+                    elif "chat" in record:
+                        self.completed[int(record["chat"])] = record["status"]
+                    elif "resume" in record:
+                        self.resumes = int(record["resume"])
+                    elif record.get("done"):
+                        self.done = True
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"读取群发进度文件失败 ({self.path}): {e}")
+
+    def start(self, job_id: str, messages: List[Tuple[int, str]]):
+        """
+        打开进度文件；新任务先写入完整的消息列表，以便重启后恢复
+
+        进度文件无法写入时只记录警告，进度仅保存在内存中（照常发送，但重启后无法恢复）
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"无法写入群发进度文件 ({self.path}): {e}，本次群发的进度只保存在内存中，重启后无法恢复")
+            self._file = None
+        if self.job is None:
+            self.job = {"job": job_id, "created": time.time(), "messages": [list(m) for m in messages]}
+            self._write(self.job)
+
+    def record(self, chat_id: int, status: str):
+        self.completed[chat_id] = status
+        self._write({"chat": chat_id, "status": status})
+
+    def record_resume(self):
+        self.resumes += 1
+        self._write({"resume": self.resumes})
+
+    def finish(self, report: BroadcastReport):
+        self.done = True
+        self._write({"done": True, **report._asdict()})
+        self.close()
+
+    def abandon(self, reason: str):
+        """放弃该任务：剩余的聊天不再发送，之后也不再恢复"""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self.done = True
+        self._write({"done": True, "abandoned": reason})
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _write(self, record: dict):
+        if self._file is None:
+            return  # 进度文件不可写，只保存在内存中
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"写入群发进度文件失败 ({self.path}): {e}，之后的进度只保存在内存中")
+            self.close()
+
+
+class Broadcaster:
+    """限速的并发群发器"""
+
+    def __init__(
+        self,
+        bot,
+        data_dir: str,
+        global_rate: float = 25.0,
+        per_chat_rate: float = 1.0,
+        workers: int = 8,
+        max_retries: int = 3,
+        max_age: float = 6 * 3600,
+        max_resumes: int = 3,
+        keep_days: float = 7.0
+    ):
+        """
+        Args:
+            bot: telegram.Bot（或任何有 async send_message(chat_id, text) 的对象）
+            data_dir: 进度文件目录
+            global_rate: 全局每秒消息数上限（Telegram 约 30 条/秒）
+            per_chat_rate: 单个聊天每秒消息数上限（Telegram 约 1 条/秒）
+            workers: 并发 worker 数
+            max_retries: 网络错误 / flood wait 的最大重试次数
+            max_age: 启动时只恢复创建时间在该秒数以内的任务（0 表示不限制）
+            max_resumes: 同一任务最多恢复的次数，超过后放弃
+            keep_days: 已完成的进度文件保留天数（0 表示不清理）
+        """
+        self.bot = bot
+        self.data_dir = data_dir
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+        self.workers = workers
+        self.max_retries = max_retries
+        self.max_age = max_age
+        self.max_resumes = max_resumes
+        self.keep_days = keep_days
+        self._running: Set[str] = set()
+
+    def progress_path(self, job_id: str) -> str:
+        return os.path.join(self.data_dir, f"{job_id}.jsonl")
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, 1.0)
+        return bucket
+
+    async def broadcast(self, job_id: str, messages: Iterable[Tuple[int, str]]) -> BroadcastReport:
+        """
+        群发消息（同一 job_id 已完成的聊天会被跳过）
+
+        Args:
+            job_id: 任务标识（例如 "morning-2024-01-01"），也是进度文件名
+            messages: [(chat_id, 文本), ...]；恢复已有任务时以进度文件中的消息列表为准
+
+        Returns:
+            BroadcastReport
+        """
+        if job_id in self._running:
+            raise RuntimeError(f"群发 {job_id} 正在进行中")
+        self._running.add(job_id)
+
+        progress = BroadcastProgress(self.progress_path(job_id))
+        try:
+            resuming = progress.job is not None and not progress.done
+            if progress.job is not None:
+                messages = [(int(c), t) for c, t in progress.job["messages"]]
+            else:
+                messages = list(messages)
+            progress.start(job_id, messages)
+            if resuming:
+                progress.record_resume()
+
+            pending = [(c, t) for c, t in messages if c not in progress.completed]
+            skipped = len(messages) - len(pending)
+            if skipped:
+                logger.info(f"恢复群发 {job_id}: 跳过已完成的 {skipped} 个聊天，剩余 {len(pending)} 个")
+
+            counts = {"sent": 0, "blocked": 0, "failed": 0, "unconfirmed": 0, "retry_after": 0}
+            queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+            for item in pending:
+                queue.put_nowait(item)
+
+            started = time.monotonic()
+            workers = [
+                asyncio.create_task(self._worker(queue, progress, counts))
+                for _ in range(min(self.workers, len(pending)))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+            report = BroadcastReport(
+                job_id, len(messages), counts["sent"], counts["blocked"], counts["failed"],
+                counts["unconfirmed"], skipped, counts["retry_after"], time.monotonic() - started
+            )
+            if counts["failed"]:
+                progress.close()  # 留待下次恢复
+            else:
+                progress.finish(report)
+                self.prune()
+            logger.info(report.format())
+            return report
+        finally:
+            progress.close()
+            self._running.discard(job_id)
+
+    async def _worker(self, queue: "asyncio.Queue[Tuple[int, str]]", progress: BroadcastProgress, counts: Dict[str, int]):
+        while True:
+            chat_id, text = await queue.get()
+            try:
+                try:
+                    status = await self._deliver(chat_id, text, counts)
+                except Exception as e:
+                    # 未预期的错误不能让 worker 退出，否则队列永远等不到 task_done
+                    logger.error(f"发送给 Chat ID {chat_id} 出错: {e}")
+                    status = "failed"
+                if status == "failed":
+                    counts["failed"] += 1
+                else:
+                    counts[status] += 1
+                    progress.record(chat_id, status)
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, chat_id: int, text: str, counts: Dict[str, int]) -> str:
+        """发送一条消息，返回 "sent" / "blocked" / "unconfirmed" / "failed" """
+        for attempt in range(self.max_retries + 1):
+            await self._chat_bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                return "sent"
+            except RetryAfter as e:
+                # flood wait 针对整个机器人：所有 worker 一起暂停
+                counts["retry_after"] += 1
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                logger.warning(f"触发 Telegram 限流，暂停 {delay} 秒")
+                self.global_bucket.pause(float(delay))
+            except (Forbidden, BadRequest) as e:
+                logger.warning(f"发送给 Chat ID {chat_id} 失败（不再重试）: {e}")
+                return "blocked"
+            except TimedOut as e:
+                # 请求可能已被 Telegram 处理，重试会重复发送
+                logger.warning(f"发送给 Chat ID {chat_id} 超时，无法确认是否送达（不再重试）: {e}")
+                return "unconfirmed"
+            except NetworkError as e:
+                delay = min(30.0, 2 ** attempt)
+                logger.warning(f"发送给 Chat ID {chat_id} 出现网络错误: {e}，{delay:.0f}秒后重试")
+                await asyncio.sleep(delay)
+
+        logger.error(f"发送给 Chat ID {chat_id} 重试 {self.max_retries} 次后仍失败")
+        return "failed"
+
+    def pending_jobs(self) -> List[str]:
+        """进度目录中尚未完成的群发任务"""
+        try:
+            names = sorted(os.listdir(self.data_dir))
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            logger.warning(f"读取群发进度目录失败 ({self.data_dir}): {e}")
+            return []
+        jobs = []
+        for name in names:
+            if name.endswith(".jsonl"):
+                progress = BroadcastProgress(os.path.join(self.data_dir, name))
+                if progress.job is not None and not progress.done:
+                    jobs.append(progress.job["job"])
+        return jobs
+
+    def prune(self) -> int:
+        """删除完成超过 keep_days 天的进度文件，返回删除的文件数"""
+        if self.keep_days <= 0:
+            return 0
+        try:
+            names = os.listdir(self.data_dir)
+        except OSError:
+            return 0
+
+        cutoff = time.time() - self.keep_days * 86400
+        removed = 0
+        for name in names:
+            path = os.path.join(self.data_dir, name)
+            try:
+                if not name.endswith(".jsonl") or os.path.getmtime(path) >= cutoff:
+                    continue
+                if BroadcastProgress(path).done:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"清理群发进度文件 {path} 失败: {e}")
+        if removed:
+            logger.info(f"已清理 {removed} 个过期的群发进度文件")
+        return removed
+
+    async def resume_pending(self) -> List[BroadcastReport]:
+        """
+        恢复未完成的群发（启动时调用）
+
+        创建超过 max_age 秒或已恢复 max_resumes 次的任务不再发送，标记为放弃；
+        之后清理过期的进度文件
+        """
+        reports = []
+        now = time.time()
+        for job_id in self.pending_jobs():
+            progress = BroadcastProgress(self.progress_path(job_id))
+            age = now - float(progress.job.get("created", 0))
+            if self.max_age > 0 and age > self.max_age:
+                reason = f"创建于 {age / 3600:.1f} 小时前"
+            elif progress.resumes >= self.max_resumes:
+                reason = f"已恢复 {progress.resumes} 次"
+            else:
+                logger.info(f"发现未完成的群发 {job_id}，继续发送")
+                reports.append(await self.broadcast(job_id, ()))
+                continue
+
+            remaining = len(progress.job["messages"]) - len(progress.completed)
+            logger.warning(f"放弃未完成的群发 {job_id}（{reason}），剩余 {remaining} 个聊天不再发送")
+            try:
+                progress.abandon(reason)
+            except OSError as e:
+                logger.error(f"标记群发 {job_id} 为放弃失败: {e}")
+        self.prune()
+        return reports
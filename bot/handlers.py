@@ -3,13 +3,19 @@
 负责处理 Telegram 机器人的各种命令
 """
 
+import asyncio
+import math
+import os
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-from .services import get_guangzhou_weather
+from .services import DEFAULT_CITY, city_display_name, get_city_weather
 
 logger = logging.getLogger(__name__)
 
+# /mute 允许的最长静音时间（分钟）
+MAX_MUTE_MINUTES = 30 * 24 * 60
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -24,6 +30,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         f"请将此 ID 填入您的 `.env` 文件中的 `ADMIN_CHAT_ID` 变量，"
         f"然后重启机器人，即可启用定时问候功能。\n\n"
         f"使用 /weather 获取当前天气。\n"
+        f"使用 /subscribe <城市> 订阅每日早安天气。\n"
         f"使用 /help 查看帮助。"
     )
 
@@ -39,8 +46,16 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     message = (
         "可用命令：\n"
         "/start - 启动机器人并获取您的 Chat ID\n"
-        "/weather - 立即获取广州的当前天气"
+        "/weather [城市] - 立即获取当前天气（默认为订阅的城市或广州）\n"
+        "/subscribe <城市> - 订阅每天早上 8:00 的早安天气\n"
+        "/unsubscribe - 取消订阅"
     )
+    if "monitor" in context.bot_data:
+        message += (
+            "\n/spread [币对] - 查看当前价差\n"
+            "/status - 查看价差监控状态\n"
+            "/mute <币对> <分钟> - 暂停该币对的价差告警"
+        )
 
     await update.message.reply_text(message)
     logger.info(f"用户 {update.effective_chat.id} 执行了 /help 命令")
@@ -48,17 +63,20 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 async def weather_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    处理 /weather 命令
-    获取并发送广州的当前天气信息
+    处理 /weather [城市] 命令
+    获取并发送指定城市（默认为订阅的城市，未订阅时为广州）的当前天气信息
     """
     chat_id = update.effective_chat.id
-    logger.info(f"用户 {chat_id} 请求天气信息")
+    store = context.bot_data.get("subscriptions")
+    city = " ".join(context.args or []) or (store.get(chat_id) if store is not None else None) or DEFAULT_CITY
+    name = city_display_name(city)
+    logger.info(f"用户 {chat_id} 请求天气信息: {city}")
 
     # 发送"正在获取"的提示
-    processing_message = await update.message.reply_text("正在获取广州天气信息...")
+    processing_message = await update.message.reply_text(f"正在获取{name}天气信息...")
 
     # 调用天气服务
-    weather_info = await get_guangzhou_weather()
+    weather_info = await get_city_weather(city)
 
     if weather_info:
         # 成功获取天气信息
@@ -66,5 +84,123 @@ async def weather_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         logger.info(f"成功向用户 {chat_id} 发送天气信息")
     else:
         # 获取失败
-        await processing_message.edit_text("抱歉，获取广州天气失败，请稍后再试。")
+        await processing_message.edit_text(f"抱歉，获取{name}天气失败，请检查城市名或稍后再试。")
         logger.warning(f"向用户 {chat_id} 发送天气信息失败")
+
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    处理 /subscribe <城市> 命令
+    订阅（或更换）每日早安问候中的城市
+    """
+    chat_id = update.effective_chat.id
+    store = context.bot_data["subscriptions"]
+    city = " ".join(context.args or [])
+
+    if not city:
+        current = store.get(chat_id)
+        hint = f"当前订阅: {city_display_name(current)}\n" if current else ""
+        await update.message.reply_text(f"{hint}用法: /subscribe <城市>，例如 /subscribe Shenzhen")
+        return
+
+    # 先查一次天气，确认城市名有效（结果会进入缓存）
+    weather_info = await get_city_weather(city)
+    if weather_info is None:
+        await update.message.reply_text(f"找不到城市 {city} 的天气，请检查城市名（建议使用英文，如 Shenzhen）。")
+        return
+
+    try:
+        await asyncio.to_thread(store.subscribe, chat_id, city)
+    except OSError as e:
+        logger.error(f"保存订阅失败 ({chat_id} -> {city}): {e}")
+        await update.message.reply_text("订阅保存失败，请稍后重试或联系管理员。")
+        return
+    await update.message.reply_text(
+        f"已订阅 {city_display_name(city)}，每天早上 8:00 (北京时间) 为您发送早安天气。\n{weather_info}"
+    )
+    logger.info(f"用户 {chat_id} 订阅了 {city}")
+
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    处理 /unsubscribe 命令
+    取消每日早安问候
+    """
+    chat_id = update.effective_chat.id
+    try:
+        removed = await asyncio.to_thread(context.bot_data["subscriptions"].unsubscribe, chat_id)
+    except OSError as e:
+        logger.error(f"保存订阅失败 ({chat_id} 取消订阅): {e}")
+        await update.message.reply_text("取消订阅失败，请稍后重试或联系管理员。")
+        return
+    if removed:
+        await update.message.reply_text("已取消订阅。")
+        logger.info(f"用户 {chat_id} 取消了订阅")
+    else:
+        await update.message.reply_text("您还没有订阅，使用 /subscribe <城市> 订阅。")
+
+
+# ==================== 价差监控命令（BOT_PRICE_MONITOR=True 时注册） ====================
+async def spread_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    处理 /spread [币对] 命令
+    直接从内存中的价格簿读取当前价差（默认所有监控中的币对）
+    """
+    monitor = context.bot_data["monitor"]
+    symbols = None
+    if context.args:
+        symbol = monitor.resolve_symbol(context.args[0])
+        if symbol is None:
+            await update.message.reply_text(f"未监控 {context.args[0]}，可用币对: {', '.join(monitor.symbols)}")
+            return
+        symbols = [symbol]
+
+    for text in monitor.format_spreads(symbols):
+        await update.message.reply_text(text, parse_mode="HTML")
+    logger.info(f"用户 {update.effective_chat.id} 执行了 /spread 命令")
+
+
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    处理 /status 命令
+    显示价差监控的运行状态：连接器、最近行情时间、告警统计与静音
+    """
+    await update.message.reply_text(context.bot_data["monitor"].format_status(), parse_mode="HTML")
+    logger.info(f"用户 {update.effective_chat.id} 执行了 /status 命令")
+
+
+async def mute_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    处理 /mute <币对> <分钟> 命令
+    在指定时间内不发送该币对的价差告警（分钟为 0 时取消静音）；配置了 ADMIN_CHAT_ID 时仅管理员可用
+    """
+    chat_id = update.effective_chat.id
+    monitor = context.bot_data["monitor"]
+
+    admin_chat_id = os.environ.get("ADMIN_CHAT_ID", "").strip()
+    if admin_chat_id and str(chat_id) != admin_chat_id:
+        await update.message.reply_text("只有管理员可以静音告警。")
+        return
+
+    args = context.args or []
+    try:
+        minutes = float(args[1])
+    except (IndexError, ValueError):
+        minutes = math.nan
+    # nan / inf / 负数 / 过长的时长都会得到无意义的截止时间
+    if not math.isfinite(minutes) or not 0 <= minutes <= MAX_MUTE_MINUTES:
+        await update.message.reply_text(
+            f"用法: /mute <币对> <分钟>，例如 /mute TSLAX 30（分钟为 0 到 {MAX_MUTE_MINUTES} 之间，为 0 时取消静音）"
+        )
+        return
+
+    symbol = monitor.resolve_symbol(args[0])
+    if symbol is None:
+        await update.message.reply_text(f"未监控 {args[0]}，可用币对: {', '.join(monitor.symbols)}")
+        return
+
+    if monitor.mute(symbol, minutes) is None:
+        await update.message.reply_text(f"🔔 已取消 {symbol} 的告警静音。")
+    else:
+        await update.message.reply_text(f"🔕 {symbol} 的告警已静音 {minutes:g} 分钟。")
+    logger.info(f"用户 {chat_id} 将 {symbol} 静音 {minutes:g} 分钟")
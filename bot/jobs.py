@@ -5,46 +5,104 @@
 
 import os
 import logging
+import datetime
+from typing import Dict, List
+import pytz
 from telegram.ext import ContextTypes
-from .services import get_guangzhou_weather
+from .broadcast import Broadcaster
+from .services import DEFAULT_CITY, get_weather_for_cities
+from .subscriptions import city_key
 
 logger = logging.getLogger(__name__)
 
 
+def build_morning_message(weather_info: str | None) -> str:
+    """根据天气信息构建早安问候消息"""
+    if weather_info:
+        # 天气获取成功
+        return f"早上好！{weather_info}。祝您有美好的一天！"
+    # 天气获取失败，使用备用文案
+    return "早上好！今天获取天气失败了，但依然祝您有美好的一天！"
+
+
+def collect_recipients(context: ContextTypes.DEFAULT_TYPE) -> Dict[str, List[int]]:
+    """
+    收集晨间问候的接收者，按城市分组
+
+    订阅者按订阅的城市分组；ADMIN_CHAT_ID（如已配置且未订阅）使用默认城市
+
+    Returns:
+        {城市名: [chat_id, ...]}
+    """
+    groups: Dict[str, List[int]] = {}
+    keys: Dict[str, str] = {}
+
+    store = context.bot_data.get("subscriptions")
+    if store is not None:
+        for key, (city, chat_ids) in store.by_city().items():
+            keys[key] = city
+            groups[city] = list(chat_ids)
+
+    admin_chat_id = os.environ.get("ADMIN_CHAT_ID", "").strip()
+    if admin_chat_id:
+        try:
+            admin = int(admin_chat_id)
+        except ValueError:
+            admin = None
+            logger.warning(f"ADMIN_CHAT_ID 无效: {admin_chat_id}")
+        if admin is not None and not any(admin in ids for ids in groups.values()):
+            city = keys.setdefault(city_key(DEFAULT_CITY), DEFAULT_CITY)
+            groups.setdefault(city, []).append(admin)
+
+    return groups
+
+
 async def send_morning_greeting(context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     发送早安问候消息
-    每天早上 8:00 自动执行，向管理员发送早安问候和天气信息
+    每天早上 8:00 自动执行，向所有订阅者（及管理员）发送早安问候和各自城市的天气
+
+    每个城市只请求一次天气，多个城市并发请求（并发数受 WEATHER_FETCH_CONCURRENCY 限制）；
+    消息通过 Broadcaster 限速群发
     """
-    # 从环境变量获取管理员 Chat ID
-    admin_chat_id = os.environ.get("ADMIN_CHAT_ID")
+    groups = collect_recipients(context)
 
-    # 检查 ADMIN_CHAT_ID 是否已设置
-    if not admin_chat_id or admin_chat_id.strip() == "":
-        logger.warning("ADMIN_CHAT_ID 未设置，无法发送晨间问候")
+    if not groups:
+        logger.warning("没有订阅者且 ADMIN_CHAT_ID 未设置，无法发送晨间问候")
         return
 
-    logger.info(f"开始发送晨间问候给 Chat ID: {admin_chat_id}")
+    recipients = sum(len(ids) for ids in groups.values())
+    logger.info(f"开始发送晨间问候: {recipients} 个聊天，{len(groups)} 个城市")
 
-    # 获取天气信息
-    weather_info = await get_guangzhou_weather()
+    # 获取天气信息（每个城市一次）
+    weather_by_city = await get_weather_for_cities(groups)
 
-    # 构建问候消息
-    if weather_info:
-        # 天气获取成功
-        message = f"早上好！{weather_info}。祝您有美好的一天！"
-        logger.info("成功获取天气信息，准备发送晨间问候")
-    else:
-        # 天气获取失败，使用备用文案
-        message = "早上好！今天获取天气失败了，但依然祝您有美好的一天！"
-        logger.warning("获取天气信息失败，使用备用问候消息")
-
-    # 发送消息
-    try:
-        await context.bot.send_message(
-            chat_id=admin_chat_id,
-            text=message
-        )
-        logger.info(f"成功发送晨间问候给 Chat ID: {admin_chat_id}")
-    except Exception as e:
-        logger.error(f"发送晨间问候失败: {e}")
+    failed_cities = [city for city, info in weather_by_city.items() if info is None]
+    if failed_cities:
+        logger.warning(f"获取天气信息失败，使用备用问候消息: {', '.join(failed_cities)}")
+
+    # 群发（限速、可恢复；同一天重复触发时已发送的聊天会被跳过）
+    messages = [
+        (chat_id, build_morning_message(weather_by_city.get(city)))
+        for city, chat_ids in groups.items()
+        for chat_id in chat_ids
+    ]
+    today = datetime.datetime.now(pytz.timezone('Asia/Shanghai')).date()
+    await get_broadcaster(context).broadcast(f"morning-{today.isoformat()}", messages)
+
+
+def get_broadcaster(context: ContextTypes.DEFAULT_TYPE) -> Broadcaster:
+    """bot.main 创建的群发器；未创建时按默认配置创建一个"""
+    broadcaster = context.bot_data.get("broadcaster")
+    if broadcaster is None:
+        data_dir = os.environ.get("BOT_DATA_DIR", "data")
+        broadcaster = context.bot_data["broadcaster"] = Broadcaster(context.bot, os.path.join(data_dir, "broadcasts"))
+    return broadcaster
+
+
+async def resume_broadcasts(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    恢复重启前未完成的群发
+    启动后执行一次，只发送尚未完成的聊天
+    """
+    await get_broadcaster(context).resume_pending()
@@ -4,15 +4,25 @@ Telegram 机器人主程序
 """
 
 import os
+import re
 import logging
 import datetime
+import secrets
+from typing import Optional
 import pytz
 from dotenv import load_dotenv
 from telegram.ext import Application, CommandHandler
 
 # 导入自定义模块
-from .handlers import start_command, help_command, weather_command
-from .jobs import send_morning_greeting
+from .handlers import (
+    start_command, help_command, weather_command, subscribe_command, unsubscribe_command,
+    spread_command, status_command, mute_command
+)
+from .broadcast import Broadcaster
+from .jobs import resume_broadcasts, send_morning_greeting
+from .monitor import MonitorService, monitor_enabled
+from .services import close_http_client, init_http_client
+from .subscriptions import SubscriptionStore
 
 # 配置日志
 logging.basicConfig(
@@ -22,6 +32,89 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Telegram 对 secret_token 的要求：1-256 个字符，只能是 A-Z a-z 0-9 _ -
+SECRET_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,256}$")
+
+
+def webhook_settings() -> Optional[dict]:
+    """
+    读取 webhook 模式的配置
+
+    WEBHOOK_URL 为 Telegram 可访问的公网地址（通常是反向代理的 https 地址），
+    机器人在 WEBHOOK_LISTEN:WEBHOOK_PORT 上监听 WEBHOOK_PATH，
+    Telegram 每次推送都带上 WEBHOOK_SECRET，不匹配的请求直接返回 403
+
+    Returns:
+        run_webhook 的参数；配置不完整时返回 None
+    """
+    base_url = os.environ.get("WEBHOOK_URL", "").strip().rstrip("/")
+    if not base_url:
+        logger.error("BOT_MODE=webhook 但未设置 WEBHOOK_URL")
+        return None
+
+    secret = os.environ.get("WEBHOOK_SECRET", "").strip()
+    if not secret:
+        # 每次启动都会重新 setWebhook，随机密钥同样有效
+        secret = secrets.token_urlsafe(32)
+        logger.warning("WEBHOOK_SECRET 未设置，已生成本次运行的随机密钥")
+    elif not SECRET_TOKEN_PATTERN.match(secret):
+        logger.error("WEBHOOK_SECRET 只能包含 A-Z a-z 0-9 _ -，长度 1-256")
+        return None
+
+    try:
+        port = int(os.environ.get("WEBHOOK_PORT", "8443"))
+    except ValueError:
+        logger.error(f"WEBHOOK_PORT 无效: {os.environ.get('WEBHOOK_PORT')}")
+        return None
+
+    url_path = os.environ.get("WEBHOOK_PATH", "telegram").strip().strip("/")
+    return {
+        "listen": os.environ.get("WEBHOOK_LISTEN", "0.0.0.0"),
+        "port": port,
+        "url_path": url_path,
+        "webhook_url": f"{base_url}/{url_path}",
+        "secret_token": secret,
+    }
+
+
+def run_application(application: Application) -> None:
+    """
+    按 BOT_MODE 启动机器人：polling（默认，长轮询 getUpdates）或 webhook（本地 HTTP 监听）
+
+    两种模式可随时切换：run_webhook 启动时调用 setWebhook，run_polling 启动时调用 deleteWebhook，
+    重启即可生效；webhook 配置不完整时回退到 polling
+    """
+    mode = os.environ.get("BOT_MODE", "polling").strip().lower()
+
+    if mode == "webhook":
+        settings = webhook_settings()
+        if settings is not None:
+            logger.info(
+                f"机器人以 webhook 模式运行: 监听 {settings['listen']}:{settings['port']}/{settings['url_path']}，"
+                f"公网地址 {settings['webhook_url']}"
+            )
+            application.run_webhook(allowed_updates=["message"], **settings)
+            return
+        logger.warning("webhook 配置不完整，改用 polling 模式")
+    elif mode != "polling":
+        logger.warning(f"未知的 BOT_MODE: {mode}，使用 polling 模式")
+
+    poll_timeout = int(os.environ.get("BOT_POLL_TIMEOUT", "10"))
+    logger.info(f"机器人以 polling 模式运行（长轮询超时 {poll_timeout} 秒）")
+    application.run_polling(allowed_updates=["message"], timeout=poll_timeout)
+
+
+async def start_price_monitor(application: Application) -> None:
+    """post_init：创建共享 HTTP 客户端，并在本进程内启动价差监控"""
+    await init_http_client(application)
+    await application.bot_data["monitor"].start(application.bot)
+
+
+async def stop_price_monitor(application: Application) -> None:
+    """post_stop：停止价差监控（此时机器人仍可发送剩余告警）"""
+    await application.bot_data["monitor"].stop()
+
+
 def main() -> None:
     """
     主函数：初始化机器人、注册命令处理器和定时任务
@@ -37,19 +130,57 @@ def main() -> None:
 
     logger.info("正在启动 Telegram 机器人...")
 
-    # 创建 Application 实例
-    application = Application.builder().token(bot_token).build()
+    # 创建 Application 实例（启动时创建共享 HTTP 客户端，关闭时释放）
+    builder = (
+        Application.builder()
+        .token(bot_token)
+        .post_init(init_http_client)
+        .post_shutdown(close_http_client)
+    )
+    # 价差监控在本进程内运行时，与机器人共用事件循环和连接池
+    if monitor_enabled():
+        builder = builder.post_init(start_price_monitor).post_stop(stop_price_monitor)
+
+    # 自建 Bot API 服务器（或本地测试用的假 Telegram）
+    api_url = os.environ.get("TELEGRAM_API_URL", "").strip().rstrip("/")
+    if api_url:
+        builder = builder.base_url(f"{api_url}/bot").base_file_url(f"{api_url}/file/bot")
+    application = builder.build()
+
+    # 加载天气订阅（每个聊天订阅的城市）
+    data_dir = os.environ.get("BOT_DATA_DIR", "data")
+    application.bot_data["subscriptions"] = SubscriptionStore(os.path.join(data_dir, "subscriptions.json"))
+
+    # 群发器：全局 / 单聊天令牌桶限速，进度写入 data/broadcasts 以便重启后恢复
+    application.bot_data["broadcaster"] = Broadcaster(
+        application.bot,
+        os.path.join(data_dir, "broadcasts"),
+        global_rate=float(os.environ.get("BROADCAST_RATE", "25")),
+        per_chat_rate=float(os.environ.get("BROADCAST_CHAT_RATE", "1")),
+        workers=int(os.environ.get("BROADCAST_WORKERS", "8")),
+        max_age=float(os.environ.get("BROADCAST_RESUME_MAX_AGE", "21600")),
+        max_resumes=int(os.environ.get("BROADCAST_MAX_RESUMES", "3")),
+        keep_days=float(os.environ.get("BROADCAST_KEEP_DAYS", "7"))
+    )
 
     # 注册命令处理器
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("weather", weather_command))
+    application.add_handler(CommandHandler("subscribe", subscribe_command))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+    if monitor_enabled():
+        application.bot_data["monitor"] = MonitorService()
+        application.add_handler(CommandHandler("spread", spread_command))
+        application.add_handler(CommandHandler("status", status_command))
+        application.add_handler(CommandHandler("mute", mute_command))
+        logger.info("价差监控将在机器人进程内运行（/spread、/status、/mute 已启用）")
     logger.info("命令处理器注册完成")
 
     # 获取 JobQueue
     job_queue = application.job_queue
 
-    # 设置定时任务：每天早上 8:00 (北京时间) 发送问候
+    # 设置定时任务：每天早上 8:00 (北京时间) 向所有订阅者发送问候
     if job_queue:
         # 指定时区为亚洲/上海 (中国标准时间)
         shanghai_tz = pytz.timezone('Asia/Shanghai')
@@ -62,22 +193,27 @@ def main() -> None:
         )
         logger.info("定时任务已设置：每天早上 8:00 (北京时间) 发送问候")
 
+        # 启动后恢复重启前未完成的群发
+        job_queue.run_once(resume_broadcasts, when=5, name="resume_broadcasts")
+
         # 检查 ADMIN_CHAT_ID 是否已配置
         admin_chat_id = os.environ.get("ADMIN_CHAT_ID")
-        if not admin_chat_id or admin_chat_id.strip() == "":
+        if (not admin_chat_id or admin_chat_id.strip() == "") and not len(application.bot_data["subscriptions"]):
             logger.warning(
-                "注意: ADMIN_CHAT_ID 未设置。"
+                "注意: ADMIN_CHAT_ID 未设置，也没有天气订阅。"
                 "请使用 /start 命令获取您的 Chat ID，"
-                "并将其添加到 .env 文件中，然后重启机器人。"
+                "并将其添加到 .env 文件中后重启机器人，或使用 /subscribe <城市> 订阅。"
             )
         else:
-            logger.info(f"ADMIN_CHAT_ID 已配置: {admin_chat_id}")
+            logger.info(
+                f"ADMIN_CHAT_ID: {admin_chat_id or '未设置'}，天气订阅: {len(application.bot_data['subscriptions'])} 个"
+            )
     else:
         logger.error("错误: 无法获取 JobQueue")
 
     # 启动机器人
     logger.info("机器人启动成功，正在运行...")
-    application.run_polling(allowed_updates=["message"])
+    run_application(application)
 
 
 if __name__ == "__main__":
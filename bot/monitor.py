@@ -0,0 +1,426 @@
+"""
+机器人进程内的价差监控
+BOT_PRICE_MONITOR=True 时，monitors.price_monitor 的整条流水线（交易所连接器、价格簿、分级告警）
+运行在机器人自己的 asyncio 事件循环上：连接器直接跑在该循环里，价差评估在单独的线程中执行，
+告警通过机器人自己的连接池发送；/spread、/status、/mute 直接读取内存中的价格簿，不发起任何网络请求
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import pytz
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from monitors import metrics
+from monitors.alert_dispatcher import merge_messages
+from monitors.logs import alert_log
+
+from .broadcast import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def monitor_enabled() -> bool:
+    """是否在机器人进程内运行价差监控"""
+    return os.environ.get("BOT_PRICE_MONITOR", "False").lower() == "true"
+
+
+def format_duration(seconds: float) -> str:
+    """时长的显示文本，例如 "2小时5分" """
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return f"{int(seconds)}秒"
+    if minutes < 60:
+        return f"{minutes}分钟"
+    return f"{minutes // 60}小时{minutes % 60}分"
+
+
+class BotAlertDispatcher:
+    """
+    通过机器人自己的 Bot 对象发送告警
+
+    与 monitors.alert_dispatcher.AlertDispatcher 接口相同（submit / start / stop / queue / stats），
+    可直接替换 price_monitor.alert_dispatcher：submit 可在评估线程中调用，
+    入队、计数与合并、限速、重试都在机器人的事件循环上完成
+    """
+
+    def __init__(
+        self,
+        bot,
+        chat_id: Optional[str],
+        queue_size: int = 100,
+        merge_window: float = 0.5,
+        max_retries: int = 5
+    ):
+        """
+        Args:
+            bot: telegram.Bot
+            chat_id: 接收告警的 Chat ID
+            queue_size: 队列容量，满了之后新告警会被丢弃
+            merge_window: 收到第一条告警后等待更多告警的时间窗口（秒）
+            max_retries: 单条消息的最大重试次数
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.queue_size = queue_size
+        self.merge_window = merge_window
+        self.max_retries = max_retries
+        # 队列元素: (消息, 评估开始的 perf_counter 时间)
+        self.queue: "asyncio.Queue[Optional[Tuple[str, Optional[float]]]]" = asyncio.Queue(maxsize=queue_size)
+        # Telegram 限制：同一聊天约 1 条/秒
+        self.limiter = TokenBucket(1.0)
+        self.stats = {"submitted": 0, "dropped": 0, "sent": 0, "failed": 0, "merged": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ==================== 生产者接口 ====================
+    def submit(self, message: str, created_at: Optional[float] = None) -> bool:
+        """
+        提交一条告警（不阻塞，可在任意线程调用）
+
+        asyncio.Queue 不是线程安全的：容量检查与计数都交给事件循环上的 _enqueue 完成
+
+        Returns:
+            是否已交给事件循环（队列已满时在事件循环上丢弃，计入 stats["dropped"]）
+        """
+        loop = self._loop
+        if loop is None:
+            alert_log.warning("⚠️  告警推送尚未启动，丢弃一条告警")
+            return False
+
+        loop.call_soon_threadsafe(self._enqueue, (message, created_at))
+        return True
+
+    def _enqueue(self, item: Tuple[str, Optional[float]]):
+        """在事件循环上放入队列"""
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            alert_log.warning("⚠️  告警队列已满，丢弃一条告警")
+            return
+        self.stats["submitted"] += 1
+
+    # ==================== 生命周期 ====================
+    def start(self):
+        """在当前事件循环上启动推送任务"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self):
+        """发送完队列中剩余的告警后停止（配合 wait_closed 等待）"""
+        if self._task is not None and not self._task.done():
+            try:
+                self.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                # 队列满时等推送任务腾出位置再放入停止信号
+                self._loop.create_task(self.queue.put(None))
+
+    async def wait_closed(self, timeout: float = 10.0):
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("告警推送未能在超时前发完，剩余告警被丢弃")
+        self._task = None
+        self._loop = None
+
+    # ==================== 推送任务 ====================
+    async def _collect_batch(self, first: Tuple[str, Optional[float]]) -> List[Tuple[str, Optional[float]]]:
+        """在合并窗口内尽可能多地取出告警"""
+        batch = [first]
+        deadline = time.monotonic() + self.merge_window
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                # 收到停止信号，放回去让主循环处理
+                self.queue.put_nowait(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    async def _run(self):
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                break
+
+            batch = await self._collect_batch(first)
+            messages = merge_messages([message for message, _ in batch])
+            self.stats["merged"] += len(batch) - len(messages)
+
+            delivered = False
+            for message in messages:
+                if await self._send_with_retry(message):
+                    self.stats["sent"] += 1
+                    delivered = True
+                else:
+                    self.stats["failed"] += 1
+
+            if delivered and metrics.enabled:
+                done = time.perf_counter()
+                for _, created_at in batch:
+                    if created_at is not None:
+                        metrics.STAGE_LATENCY.observe(done - created_at, "eval_to_sent")
+
+    async def _send_with_retry(self, text: str) -> bool:
+        """
+        按指数退避重试发送，RetryAfter 时遵循 Telegram 返回的等待时间
+
+        请求超时（TimedOut）时告警可能已经送达，不重试以免重复，按未确认计入失败
+        """
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode="HTML")
+                alert_log.event(logging.INFO, "sent", "✅ Telegram 消息发送成功", chat_id=self.chat_id, length=len(text))
+                return True
+            except RetryAfter as e:
+                wait = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                self.limiter.pause(float(wait))
+                error, retry_in = e, 0.0
+            except (Forbidden, BadRequest) as e:
+                alert_log.event(logging.ERROR, "send_failed", f"❌ Telegram 消息发送失败: {e}", error=str(e))
+                return False
+            except TimedOut as e:
+                alert_log.event(
+                    logging.WARNING, "send_unconfirmed", f"⚠️  Telegram 消息发送超时，无法确认是否送达（不再重试）: {e}",
+                    chat_id=self.chat_id, error=str(e)
+                )
+                return False
+            except NetworkError as e:
+                error, retry_in = e, delay
+                delay = min(delay * 2, 60.0)
+
+            alert_log.event(logging.ERROR, "send_failed", f"❌ Telegram 消息发送异常: {error}", error=str(error))
+            if attempt < self.max_retries:
+                await asyncio.sleep(retry_in)
+
+        return False
+
+
+class MonitorService:
+    """在机器人事件循环上运行的价差监控"""
+
+    def __init__(self):
+        # 导入时读取监控配置（EXCHANGES、MONITOR_SYMBOLS 等），只在启用时导入
+        from monitors import price_monitor
+
+        self.pm = price_monitor
+        self.connectors = []
+        self.dispatcher: Optional[BotAlertDispatcher] = None
+        self.started_at: Optional[float] = None
+        self.running = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def symbols(self) -> List[str]:
+        return self.pm.SYMBOLS
+
+    # ==================== 生命周期 ====================
+    async def start(self, bot):
+        """
+        启动监控（在机器人的 post_init 中调用）
+
+        Args:
+            bot: 机器人的 telegram.Bot，告警经由它的连接池发送
+        """
+        pm = self.pm
+        logger.info(
+            f"在机器人进程内启动价差监控: 币对 {', '.join(pm.SYMBOLS)}，交易所 {', '.join(pm.ENABLED_EXCHANGES)}"
+        )
+        if not pm.ADMIN_CHAT_ID:
+            logger.warning("ADMIN_CHAT_ID 未设置，价差告警不会发送")
+
+        # 告警改由机器人自己的客户端发送，替换独立进程使用的 requests 推送线程
+        self.dispatcher = BotAlertDispatcher(
+            bot, pm.ADMIN_CHAT_ID, pm.ALERT_QUEUE_SIZE, pm.ALERT_MERGE_WINDOW, pm.ALERT_MAX_RETRIES
+        )
+        pm.alert_dispatcher = self.dispatcher
+
+        pm.start_services()
+        self.connectors = pm.start_connectors(asyncio.get_running_loop())
+
+        # 评估仍在单独的线程中执行（与独立进程相同），不占用事件循环
+        self.running = True
+        self.started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Monitor")
+        self._task = asyncio.create_task(self._evaluate_forever())
+
+    async def _evaluate_forever(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            try:
+                await loop.run_in_executor(self._executor, self.pm.run_pending_evaluations, self.pm.FULL_SCAN_INTERVAL)
+            except Exception as e:
+                logger.error(f"价差评估出错: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """停止监控（在机器人的 post_shutdown 中调用）"""
+        if not self.running:
+            return
+        self.running = False
+        # 唤醒评估线程让它退出
+        self.pm.dirty_event.set()
+        if self._task is not None:
+            await self._task
+        self._executor.shutdown(wait=True)
+
+        # 先发完队列中的告警，再停止连接器、行情录制与日志
+        self.dispatcher.stop()
+        await self.dispatcher.wait_closed()
+        self.pm.stop_services(self.connectors)
+        logger.info("价差监控已停止")
+
+    # ==================== 查询（只读内存数据） ====================
+    def resolve_symbol(self, text: str) -> Optional[str]:
+        """用户输入 -> 监控中的币对（TSLAX、tslax_usdt 均可），找不到时为 None"""
+        key = text.strip().upper().replace("/", "_").replace("-", "_")
+        for candidate in (key, f"{key}_USDT"):
+            if candidate in self.pm.SYMBOLS:
+                return candidate
+        return None
+
+    def format_spreads(self, symbols: Optional[List[str]] = None) -> List[str]:
+        """
+        当前价差（HTML）
+
+        Returns:
+            待发送的消息（币对较多时按 Telegram 长度限制拆成多条，每个币对的内容不跨消息）
+        """
+        pm = self.pm
+        batch = pm.current_spreads(symbols)
+        now = time.time()
+        unit = "%" if pm.USE_PERCENTAGE else ""
+        blocks = []
+
+        for i, symbol in enumerate(batch.symbols):
+            futures_price = float(batch.futures[i])
+            futures_age = float(batch.futures_age[i])
+            lines = [f"📊 <b>{symbol}</b>"]
+            # 合约腿无效时所有现货都无法比较，原因相同
+            futures_problem = None
+            if futures_price == futures_price:
+                lines.append(f"Gate.io 合约: ${futures_price:.2f}{pm.format_age(futures_age)}")
+                if pm.QUOTE_MAX_AGE > 0 and futures_age > pm.QUOTE_MAX_AGE:
+                    futures_problem = "合约报价过期"
+            else:
+                lines.append("Gate.io 合约: 暂无有效报价")
+                futures_problem = "缺少合约报价"
+
+            for j, exchange in enumerate(batch.exchanges):
+                spot_price = float(batch.spot[i][j])
+                if spot_price != spot_price:
+                    lines.append(f"• {exchange.upper()}: 暂无报价")
+                    continue
+                spot_age = float(batch.spot_age[i][j])
+                age = pm.format_age(spot_age)
+                if not batch.valid[i][j]:
+                    lines.append(f"• {exchange.upper()}: ${spot_price:.2f}{age} ({futures_problem or self._spot_problem(spot_age)})")
+                    continue
+                if pm.USE_PERCENTAGE:
+                    diff_display = f"{float(batch.diff_pct[i][j]):+.2f}%"
+                else:
+                    diff_display = f"{float(batch.diff[i][j]):+.4f}"
+                mark = " ⚠️" if batch.exceeded[i][j] else ""
+                lines.append(f"• {exchange.upper()}: ${spot_price:.2f}{age}  {diff_display}{mark}")
+
+            if batch.levels[i]:
+                lines.append(f"<b>级别:</b> {batch.levels[i]}")
+            until = pm.alert_policy.muted(symbol, now)
+            if until is not None:
+                lines.append(f"🔕 告警静音中，剩余 {format_duration(until - now)}")
+            blocks.append("\n".join(lines))
+
+        blocks.append(f"阈值: {pm.PRICE_DIFF_THRESHOLD}{unit}")
+        return merge_messages(blocks, separator="\n\n")
+
+    def _spot_problem(self, spot_age: float) -> str:
+        """合约腿正常时，某个现货报价不参与价差计算的原因"""
+        if self.pm.QUOTE_MAX_AGE > 0 and spot_age > self.pm.QUOTE_MAX_AGE:
+            return "报价过期"
+        return f"与合约行情时间差超过 {self.pm.QUOTE_MAX_SKEW:g}秒"
+
+    def format_status(self) -> str:
+        """监控运行状态（HTML）"""
+        pm = self.pm
+        now = time.time()
+
+        # 每个交易所最近一次收到行情的时间
+        last_seen = {}
+        for symbol in pm.SYMBOLS:
+            spot, futures = pm.price_book.read_symbol(symbol)
+            for exchange, quote in list(spot.items()) + list(futures.items()):
+                last_seen[exchange] = max(last_seen.get(exchange, 0.0), quote.timestamp)
+
+        lines = [
+            f"🤖 <b>价差监控运行中</b>（已运行 {format_duration(now - (self.started_at or now))}）",
+            f"<b>币对:</b> {', '.join(pm.SYMBOLS)}",
+            f"<b>阈值:</b> {pm.PRICE_DIFF_THRESHOLD}{'%' if pm.USE_PERCENTAGE else ''}",
+            "",
+            "<b>连接器:</b>",
+        ]
+        for connector in self.connectors:
+            seen = last_seen.get(connector.EXCHANGE_ID)
+            state = "运行中" if connector.running else "已停止"
+            latest = f"最近行情{pm.format_age(now - seen)}" if seen else "尚未收到行情"
+            lines.append(f"• {connector.get_exchange_name()}: {state}，{latest}")
+
+        stats = self.dispatcher.stats if self.dispatcher else {}
+        lines += [
+            "",
+            f"<b>告警:</b> 已发送 {stats.get('sent', 0)}，失败 {stats.get('failed', 0)}，"
+            f"丢弃 {stats.get('dropped', 0)}，合并 {stats.get('merged', 0)}",
+        ]
+
+        muted = [(s, pm.alert_policy.muted(s, now)) for s in list(pm.alert_policy.muted_until)]
+        muted = [(s, until) for s, until in muted if until is not None]
+        if muted:
+            shanghai_tz = pytz.timezone('Asia/Shanghai')
+            lines.append("<b>静音:</b> " + "，".join(
+                f"{s} 至 {datetime.fromtimestamp(until, shanghai_tz).strftime('%H:%M')}" for s, until in muted
+            ))
+        return "\n".join(lines)
+
+    def mute(self, symbol: str, minutes: float) -> Optional[float]:
+        """
+        静音某币对的告警
+
+        Args:
+            symbol: 币对
+            minutes: 静音时长（分钟），<= 0 表示取消静音
+
+        Returns:
+            静音截止时间；取消静音时为 None
+
+        Raises:
+            ValueError: minutes 不是有限数值
+        """
+        if not math.isfinite(minutes):
+            raise ValueError(f"无效的静音时长: {minutes}")
+        if minutes <= 0:
+            self.pm.alert_policy.unmute(symbol)
+            return None
+        until = time.time() + minutes * 60
+        self.pm.alert_policy.mute(symbol, until)
+        return until
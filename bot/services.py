@@ -1,21 +1,84 @@
 """
 天气服务模块
-负责从 OpenWeatherMap API 获取广州的天气信息
+负责从 OpenWeatherMap API 获取各城市（默认广州）的天气信息
+
+所有请求共用一个长连接的 httpx.AsyncClient（由 bot.main 在启动时创建、关闭时释放），
+并按 (城市, 单位, 语言) 缓存结果：TTL 内直接命中，同一城市的并发请求只回源一次
 """
 
+import asyncio
 import os
 import httpx
 import logging
+from typing import Dict, Iterable, Optional
+
+from monitors.cache import TTLCache
+
+from .subscriptions import city_key
 
 logger = logging.getLogger(__name__)
 
+WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
 
-async def get_guangzhou_weather() -> str | None:
+# 未订阅、也未指定城市时使用的城市
+DEFAULT_CITY = "Guangzhou"
+
+# 城市的中文显示名（未列出的城市按用户输入显示）
+CITY_NAMES = {"guangzhou": "广州"}
+
+# 定时任务中同时请求上游的城市数上限
+WEATHER_FETCH_CONCURRENCY = int(os.environ.get("WEATHER_FETCH_CONCURRENCY", "5"))
+
+# 天气缓存：新鲜期内直接返回，过期后在 stale 窗口内先返回旧值再后台刷新
+weather_cache = TTLCache(
+    ttl=float(os.environ.get("WEATHER_CACHE_TTL", "300")),
+    stale_ttl=float(os.environ.get("WEATHER_CACHE_STALE", "600")),
+    max_size=256
+)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def init_http_client(application=None) -> httpx.AsyncClient:
     """
-    异步获取广州的当前天气信息
+    创建应用级共享的 HTTP 客户端（keep-alive 连接池，代理握手只做一次）
+    作为 Application.post_init 回调使用
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+        logger.info("共享 HTTP 客户端已创建")
+    return _http_client
+
+
+async def close_http_client(application=None) -> None:
+    """
+    关闭共享的 HTTP 客户端，作为 Application.post_shutdown 回调使用
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("共享 HTTP 客户端已关闭")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """返回共享的 HTTP 客户端（未经 init_http_client 初始化时按需创建）"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=10.0)
+    return _http_client
+
+
+async def _fetch_weather(city: str, units: str, lang: str) -> Optional[dict]:
+    """
+    向 OpenWeatherMap 请求一次当前天气
 
     Returns:
-        str: 格式化的天气信息字符串，例如："广州当前天气：晴，气温：25.3°C"
+        dict: {"description": 天气描述, "temperature": 气温}
         None: 如果获取失败
     """
     api_key = os.environ.get("WEATHER_API_KEY")
@@ -30,31 +93,28 @@ async def get_guangzhou_weather() -> str | None:
     # 调试信息：显示API密钥长度和前4位
     logger.info(f"API密钥长度: {len(api_key)}, 前4位: {api_key[:4]}...")
 
-    url = "https://api.openweathermap.org/data/2.5/weather"
     params = {
-        "q": "Guangzhou",
+        "q": city,
         "appid": api_key,
-        "units": "metric",  # 使用摄氏度
-        "lang": "zh_cn"     # 中文
+        "units": units,
+        "lang": lang
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10.0)
+        response = await get_http_client().get(WEATHER_API_URL, params=params, timeout=10.0)
 
-            if response.status_code != 200:
-                logger.error(f"天气API请求失败，状态码: {response.status_code}")
-                logger.error(f"响应内容: {response.text}")
-                return None
+        if response.status_code != 200:
+            logger.error(f"天气API请求失败，状态码: {response.status_code}")
+            logger.error(f"响应内容: {response.text}")
+            return None
 
-            data = response.json()
+        data = response.json()
 
-            # 提取天气描述和温度
-            description = data["weather"][0]["description"]
-            temperature = data["main"]["temp"]
-
-            # 返回格式化的天气信息
-            return f"广州当前天气：{description}，气温：{temperature}°C"
+        # 提取天气描述和温度
+        return {
+            "description": data["weather"][0]["description"],
+            "temperature": data["main"]["temp"],
+        }
 
     except httpx.TimeoutException:
         logger.error("天气API请求超时")
@@ -68,3 +128,78 @@ async def get_guangzhou_weather() -> str | None:
     except Exception as e:
         logger.error(f"获取天气信息时发生未知错误: {e}")
         return None
+
+
+async def get_weather(city: str, units: str = "metric", lang: str = "zh_cn") -> Optional[dict]:
+    """
+    获取某个城市的当前天气（带缓存与并发合并）
+
+    Args:
+        city: 城市名（OpenWeatherMap 的 q 参数，如 "Guangzhou"）
+        units: 单位，metric 为摄氏度
+        lang: 描述语言
+
+    Returns:
+        dict: {"description": 天气描述, "temperature": 气温}
+        None: 如果获取失败（失败结果不缓存）
+    """
+    # 与订阅表使用同一种城市归一化，同一城市只占一个缓存条目
+    key = (city_key(city), units, lang)
+    return await weather_cache.get_async(key, lambda: _fetch_weather(city, units, lang))
+
+
+def city_display_name(city: str) -> str:
+    """城市的显示名，例如 "Guangzhou" -> "广州" """
+    return CITY_NAMES.get(city_key(city), city)
+
+
+async def get_city_weather(city: str) -> str | None:
+    """
+    异步获取某个城市的当前天气信息
+
+    Returns:
+        str: 格式化的天气信息字符串，例如："广州当前天气：晴，气温：25.3°C"
+        None: 如果获取失败
+    """
+    weather = await get_weather(city)
+    if weather is None:
+        return None
+
+    # 返回格式化的天气信息
+    return f"{city_display_name(city)}当前天气：{weather['description']}，气温：{weather['temperature']}°C"
+
+
+async def get_guangzhou_weather() -> str | None:
+    """
+    异步获取广州的当前天气信息
+
+    Returns:
+        str: 格式化的天气信息字符串，例如："广州当前天气：晴，气温：25.3°C"
+        None: 如果获取失败
+    """
+    return await get_city_weather(DEFAULT_CITY)
+
+
+async def get_weather_for_cities(
+    cities: Iterable[str],
+    concurrency: int = WEATHER_FETCH_CONCURRENCY
+) -> Dict[str, Optional[str]]:
+    """
+    并发获取多个城市的天气，每个城市只请求一次，同时在途的请求不超过 concurrency
+
+    Args:
+        cities: 城市名（可重复，重复的只请求一次）
+        concurrency: 并发上限
+
+    Returns:
+        {城市名: 格式化的天气信息或 None}
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    unique = list(dict.fromkeys(cities))
+
+    async def fetch(city: str) -> Optional[str]:
+        async with semaphore:
+            return await get_city_weather(city)
+
+    results = await asyncio.gather(*(fetch(city) for city in unique))
+    return dict(zip(unique, results))
@@ -0,0 +1,112 @@
+"""
+订阅存储模块
+保存每个聊天订阅的城市，持久化到本地 JSON 文件（写入时先写临时文件再原子替换）
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def city_key(city: str) -> str:
+    """城市的归一化键：去空格、小写（同一城市只请求一次上游）"""
+    return " ".join(city.split()).lower()
+
+
+class SubscriptionStore:
+    """
+    聊天 -> 城市 的订阅表
+
+    文件格式: {"<chat_id>": "<城市>", ...}
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSON 文件路径，不存在时视为空表
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._cities: Dict[int, str] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._cities = {int(chat_id): city for chat_id, city in data.items() if city}
+            logger.info(f"已加载 {len(self._cities)} 个天气订阅")
+        except FileNotFoundError:
+            self._cities = {}
+        except (OSError, ValueError) as e:
+            logger.error(f"读取订阅文件失败 ({self.path}): {e}")
+            self._cities = {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({str(k): v for k, v in self._cities.items()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def get(self, chat_id: int) -> Optional[str]:
+        """某个聊天订阅的城市，未订阅时为 None"""
+        return self._cities.get(chat_id)
+
+    def subscribe(self, chat_id: int, city: str) -> None:
+        """
+        订阅（或更换）城市（会写文件，在事件循环中请通过 asyncio.to_thread 调用）
+
+        Raises:
+            OSError: 写入订阅文件失败（内存中的订阅表保持不变）
+        """
+        with self._lock:
+            previous = self._cities.get(chat_id)
+            self._cities[chat_id] = " ".join(city.split())
+            try:
+                self._save()
+            except OSError:
+                if previous is None:
+                    del self._cities[chat_id]
+                else:
+                    self._cities[chat_id] = previous
+                raise
+
+    def unsubscribe(self, chat_id: int) -> bool:
+        """
+        取消订阅，返回之前是否有订阅（会写文件，在事件循环中请通过 asyncio.to_thread 调用）
+
+        Raises:
+            OSError: 写入订阅文件失败（内存中的订阅表保持不变）
+        """
+        with self._lock:
+            previous = self._cities.pop(chat_id, None)
+            if previous is None:
+                return False
+            try:
+                self._save()
+            except OSError:
+                self._cities[chat_id] = previous
+                raise
+            return True
+
+    def by_city(self) -> Dict[str, Tuple[str, List[int]]]:
+        """
+        按城市分组
+
+        Returns:
+            {城市键: (显示用的城市名, [chat_id, ...])}
+        """
+        groups: Dict[str, Tuple[str, List[int]]] = {}
+        for chat_id, city in list(self._cities.items()):
+            groups.setdefault(city_key(city), (city, []))[1].append(chat_id)
+        return groups
+
+    def __len__(self) -> int:
+        return len(self._cities)
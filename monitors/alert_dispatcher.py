@@ -0,0 +1,319 @@
+"""
+异步 Telegram 告警推送
+检测线程只把消息放进有界队列，由独立线程负责合并、限速、发送和重试，
+Telegram API 变慢不会阻塞价差评估
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .logs import alert_log
+
+# Telegram 单条消息最大长度
+MAX_MESSAGE_LENGTH = 4096
+
+# 合并多条告警时使用的分隔线
+MERGE_SEPARATOR = "\n\n━━━━━━━━━━━━━━\n\n"
+
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发数量）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """取一个令牌，返回需要等待的秒数（0 表示立即可用）"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到拿到令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def split_message(message: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    把超长消息切成不超过 limit 的几段
+
+    优先在换行处切分（告警中的 HTML 标签都在同一行内闭合，按行切分后每段仍是合法 HTML），
+    单行超长时退到空格处，实在没有才硬切，且不会切在标签或实体中间
+
+    Args:
+        message: 消息内容
+        limit: 单段最大长度
+
+    Returns:
+        切分后的消息段
+    """
+    chunks: List[str] = []
+    while len(message) > limit:
+        cut = message.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            cut = message.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+            tag = message.rfind("<", 0, cut)
+            if tag > message.rfind(">", 0, cut):
+                cut = tag
+            entity = message.rfind("&", 0, cut)
+            if entity > message.rfind(";", 0, cut):
+                cut = entity
+            if cut <= 0:
+                cut = limit
+        chunks.append(message[:cut].rstrip())
+        message = message[cut:].lstrip()
+    if message:
+        chunks.append(message)
+    return chunks
+
+
+def merge_messages(
+    messages: List[str],
+    limit: int = MAX_MESSAGE_LENGTH,
+    separator: str = MERGE_SEPARATOR
+) -> List[str]:
+    """
+    把多条消息合并为尽量少的几条，每条不超过 Telegram 长度限制（超长的单条消息按 split_message 切分）
+
+    Args:
+        messages: 待发送的消息
+        limit: 单条消息最大长度
+        separator: 合并时消息之间的分隔符
+
+    Returns:
+        合并后的消息列表
+    """
+    merged: List[str] = []
+    current = ""
+
+    for part in (p for message in messages for p in split_message(message, limit)):
+        if not current:
+            current = part
+        elif len(current) + len(separator) + len(part) <= limit:
+            current += separator + part
+        else:
+            merged.append(current)
+            current = part
+
+    if current:
+        merged.append(current)
+
+    return merged
+
+
+class AlertDispatcher:
+    """带有界队列、连接池、限速、合并与退避重试的 Telegram 推送器"""
+
+    API_URL = "https://api.telegram.org/bot{token}/sendMessage"
+
+    def __init__(
+        self,
+        bot_token: Optional[str],
+        chat_id: Optional[str],
+        queue_size: int = 100,
+        merge_window: float = 0.5,
+        max_retries: int = 5,
+        proxy: Optional[str] = None
+    ):
+        """
+        Args:
+            bot_token: Telegram 机器人令牌
+            chat_id: 接收告警的 Chat ID
+            queue_size: 队列容量，满了之后新告警会被丢弃
+            merge_window: 收到第一条告警后等待更多告警的时间窗口（秒）
+            max_retries: 单条消息的最大重试次数
+            proxy: HTTP 代理地址
+        """
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.merge_window = merge_window
+        self.max_retries = max_retries
+
+        # 队列元素: (消息, 评估开始的 perf_counter 时间)
+        self.queue: "queue.Queue[Optional[Tuple[str, Optional[float]]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+        # Telegram 限制：同一聊天约 1 条/秒，全局约 30 条/秒
+        self.global_limiter = TokenBucket(rate=30, capacity=30)
+        self.chat_limiters: Dict[str, TokenBucket] = {}
+
+        # 持久连接池
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        if proxy:
+            self.session.proxies.update({"http": proxy, "https": proxy})
+
+        self.stats = {"submitted": 0, "dropped": 0, "sent": 0, "failed": 0, "merged": 0}
+
+    # ==================== 生产者接口 ====================
+    def submit(self, message: str, created_at: Optional[float] = None) -> bool:
+        """
+        提交一条告警（不阻塞）
+
+        Args:
+            message: 消息内容
+            created_at: 产生该告警的评估开始时间 (time.perf_counter)，用于统计评估到送达的延迟
+
+        Returns:
+            是否成功放入队列
+        """
+        try:
+            self.queue.put_nowait((message, created_at))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            alert_log.warning("⚠️  告警队列已满，丢弃一条告警")
+            return False
+
+        self.stats["submitted"] += 1
+        return True
+
+    # ==================== 生命周期 ====================
+    def start(self):
+        """启动推送线程"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="AlertDispatcher")
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """发送完队列中剩余的告警后停止"""
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ==================== 推送线程 ====================
+    def _collect_batch(self, first: Tuple[str, Optional[float]]) -> List[Tuple[str, Optional[float]]]:
+        """在合并窗口内尽可能多地取出告警"""
+        batch = [first]
+        deadline = time.monotonic() + self.merge_window
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                message = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if message is None:
+                # 收到停止信号，放回去让主循环处理
+                self.queue.put(None)
+                break
+            batch.append(message)
+
+        return batch
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                break
+
+            batch = self._collect_batch(first)
+            messages = merge_messages([message for message, _ in batch])
+            self.stats["merged"] += len(batch) - len(messages)
+
+            delivered = False
+            for message in messages:
+                if self._send_with_retry(self.chat_id, message):
+                    self.stats["sent"] += 1
+                    delivered = True
+                else:
+                    self.stats["failed"] += 1
+
+            if delivered and metrics.enabled:
+                done = time.perf_counter()
+                for _, created_at in batch:
+                    if created_at is not None:
+                        metrics.STAGE_LATENCY.observe(done - created_at, "eval_to_sent")
+
+    def _chat_limiter(self, chat_id: str) -> TokenBucket:
+        limiter = self.chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self.chat_limiters[chat_id] = TokenBucket(rate=1, capacity=1)
+        return limiter
+
+    def _send_with_retry(self, chat_id: str, text: str) -> bool:
+        """按指数退避重试发送，429 时遵循 Telegram 返回的 retry_after"""
+        delay = 1.0
+
+        for attempt in range(self.max_retries + 1):
+            self._chat_limiter(chat_id).acquire()
+            self.global_limiter.acquire()
+
+            retry_after = self._post(chat_id, text)
+            if retry_after is None:
+                return True
+            if retry_after < 0 or attempt == self.max_retries:
+                return False
+
+            time.sleep(max(delay, retry_after))
+            delay = min(delay * 2, 60.0)
+
+        return False
+
+    def _post(self, chat_id: str, text: str) -> Optional[float]:
+        """
+        发送一次请求
+
+        Returns:
+            None 表示成功；>= 0 表示可重试并给出建议等待秒数；< 0 表示不可重试
+        """
+        try:
+            response = self.session.post(
+                self.API_URL.format(token=self.bot_token),
+                json={
+                    "chat_id": chat_id,
+                    "text": text,
+                    "parse_mode": "HTML"
+                },
+                timeout=10
+            )
+        except requests.exceptions.RequestException as e:
+            alert_log.event(logging.ERROR, "send_failed", f"❌ Telegram 消息发送异常: {e}", error=str(e))
+            return 0.0
+
+        if response.status_code == 200:
+            alert_log.event(logging.INFO, "sent", "✅ Telegram 消息发送成功", chat_id=chat_id, length=len(text))
+            return None
+
+        alert_log.event(
+            logging.ERROR, "send_failed", f"❌ Telegram 消息发送失败: {response.status_code}",
+            status=response.status_code, response=response.text[:500]
+        )
+
+        if response.status_code == 429:
+            try:
+                return float(response.json().get("parameters", {}).get("retry_after", 1))
+            except ValueError:
+                return 1.0
+        if response.status_code >= 500:
+            return 0.0
+        return -1.0
@@ -0,0 +1,139 @@
+"""
+分级告警判定
+根据批量价差结果和冷却/升级规则决定哪些币对需要告警
+
+实时监控 (price_monitor) 与离线回放 (backtest) 共用这里的逻辑，
+时间由调用方传入，回放时即为虚拟时钟
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .spread import SpreadBatch
+
+
+class AlertDecision(NamedTuple):
+    """一次需要发出的告警"""
+    symbol: str
+    level: str                           # WARN / EMERGENCY
+    is_upgrade: bool                     # 是否由 WARN 升级为 EMERGENCY
+    futures_price: float
+    exceeded: List[Dict[str, Any]]       # [{"exchange", "spot_price", "diff", "diff_pct", "age"}]
+    avg_diff_pct: float
+    max_diff_pct: float
+    max_exchange: str
+    futures_age: float = 0.0             # 合约报价年龄（秒）
+
+
+class AlertPolicy:
+    """分级冷却与升级规则"""
+
+    def __init__(self, symbols: List[str], warn_cooldown: float, emergency_cooldown: float):
+        """
+        Args:
+            symbols: 币对列表
+            warn_cooldown: WARN 冷却时间（秒）
+            emergency_cooldown: EMERGENCY 冷却时间（秒）
+        """
+        self.warn_cooldown = warn_cooldown
+        self.emergency_cooldown = emergency_cooldown
+        # {symbol: {"WARN": ts, "EMERGENCY": ts}}
+        self.last_alert_times: Dict[str, Dict[str, float]] = {
+            symbol: {"WARN": 0, "EMERGENCY": 0} for symbol in symbols
+        }
+        # {symbol: 静音截止时间}，静音期间不产生告警、也不开始冷却
+        self.muted_until: Dict[str, float] = {}
+
+    def mute(self, symbol: str, until: float):
+        """静音某币对直到 until（与 decide 使用同一时钟）"""
+        self.muted_until[symbol] = until
+
+    def unmute(self, symbol: str) -> bool:
+        """取消静音，返回之前是否处于静音"""
+        return self.muted_until.pop(symbol, None) is not None
+
+    def muted(self, symbol: str, now: float) -> Optional[float]:
+        """静音截止时间，未静音（或已过期）时为 None"""
+        until = self.muted_until.get(symbol)
+        if until is not None and now >= until:
+            self.muted_until.pop(symbol, None)
+            return None
+        return until
+
+    def next_expiry(self, now: float) -> Optional[float]:
+        """
+        最早一个尚未到期的冷却或静音的结束时间，没有时为 None
+
+        行情静止时，监控在这个时间点复查仍超阈值的币对，冷却结束后的再次告警不会被推迟到下一次全量扫描
+        """
+        expiries = [until for until in list(self.muted_until.values()) if until > now]
+        for times in list(self.last_alert_times.values()):
+            for level, cooldown in (("WARN", self.warn_cooldown), ("EMERGENCY", self.emergency_cooldown)):
+                if times[level] and times[level] + cooldown > now:
+                    expiries.append(times[level] + cooldown)
+        return min(expiries, default=None)
+
+    def should_alert(self, symbol: str, alert_level: str, now: float):
+        """
+        检查冷却时间与升级规则
+
+        Returns:
+            (是否发送, 是否为升级)
+        """
+        times = self.last_alert_times.setdefault(symbol, {"WARN": 0, "EMERGENCY": 0})
+        cooldown = self.warn_cooldown if alert_level == "WARN" else self.emergency_cooldown
+        last_time = times[alert_level]
+
+        # 告警升级逻辑：如果最近发送了 WARN，且现在升级为 EMERGENCY，立即发送
+        is_upgrade = False
+        if alert_level == "EMERGENCY":
+            last_warn_time = times["WARN"]
+            if last_warn_time > last_time and (now - last_warn_time) < self.warn_cooldown:
+                is_upgrade = True
+
+        return is_upgrade or (now - last_time >= cooldown), is_upgrade
+
+    def decide(self, batch: SpreadBatch, now: float) -> List[AlertDecision]:
+        """
+        从批量价差结果中挑出需要发送的告警（不修改冷却状态，跳过静音中的币对）
+
+        Args:
+            batch: 批量价差结果
+            now: 当前时间（实时或虚拟）
+
+        Returns:
+            需要发送的告警列表
+        """
+        decisions = []
+
+        for i, symbol in enumerate(batch.symbols):
+            alert_level = batch.levels[i]
+            if alert_level is None or self.muted(symbol, now) is not None:
+                continue
+
+            send, is_upgrade = self.should_alert(symbol, alert_level, now)
+            if not send:
+                continue
+
+            exceeded = [
+                {
+                    "exchange": exchange,
+                    "spot_price": float(batch.spot[i][j]),
+                    "diff": float(batch.diff[i][j]),
+                    "diff_pct": float(batch.diff_pct[i][j]),
+                    "age": float(batch.spot_age[i][j])
+                }
+                for j, exchange in enumerate(batch.exchanges)
+                if batch.exceeded[i][j]
+            ]
+
+            decisions.append(AlertDecision(
+                symbol, alert_level, is_upgrade, float(batch.futures[i]), exceeded,
+                float(batch.avg_diff_pct[i]), float(batch.max_diff_pct[i]), batch.max_exchange[i],
+                float(batch.futures_age[i])
+            ))
+
+        return decisions
+
+    def mark_sent(self, decision: AlertDecision, now: float):
+        """记录告警已发送，开始冷却"""
+        self.last_alert_times[decision.symbol][decision.level] = now
@@ -0,0 +1,216 @@
+"""
+通用缓存：TTL + LRU + stale-while-revalidate + 单飞合并
+
+- 新鲜期 (ttl) 内直接命中
+- 过期但仍在 stale 窗口内：立即返回旧值，同时在后台刷新一次
+- 超出 stale 窗口或不存在：回源；同一个 key 的并发请求只回源一次，其余等待同一结果
+- 条目数超过 max_size 时淘汰最久未使用的
+
+同时提供同步 (get) 与 asyncio (get_async) 两套入口，共享同一份存储与计数；
+同步入口的后台刷新在守护线程中进行，异步入口的后台刷新是事件循环上的任务
+
+Jupiter 报价 (quote_cache) 与机器人的天气查询 (bot.services) 共用
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    """一次进行中的同步回源"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """TTL + LRU 缓存（键和值的含义由调用方决定）"""
+
+    def __init__(self, ttl: float = 2.0, stale_ttl: float = 10.0, max_size: int = 1024):
+        """
+        Args:
+            ttl: 新鲜期（秒），0 表示不缓存
+            stale_ttl: 新鲜期之后仍可返回旧值（并后台刷新）的时间（秒），0 表示不做 stale-while-revalidate
+            max_size: 最多保留的条目数
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        # {key: (value, fetched_at)}，按最近使用排序
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._tasks: Dict[Hashable, "asyncio.Task"] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "refresh_errors": 0}
+
+    # ==================== 存储 ====================
+    def _lookup(self, key: Hashable, now: float) -> Tuple[Any, str]:
+        """返回 (值, 状态)，状态为 "fresh" / "stale" / "miss"（调用方持有锁）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+        value, fetched_at = entry
+        age = now - fetched_at
+        if age < self.ttl:
+            self._entries.move_to_end(key)
+            return value, "fresh"
+        if age < self.ttl + self.stale_ttl:
+            self._entries.move_to_end(key)
+            return value, "stale"
+        return None, "miss"
+
+    def put(self, key: Hashable, value: Any, now: Optional[float] = None):
+        """写入一个条目（None 不缓存）"""
+        if value is None or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() if now is None else now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """不回源、不改变 LRU 顺序地读取当前值（含过期值）"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.stats["hits"] + self.stats["stale_hits"] + self.stats["coalesced"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    # ==================== 同步入口 ====================
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """
+        读取缓存，必要时回源
+
+        Args:
+            key: 缓存键（可哈希）
+            fetch: 回源函数，返回 None 表示失败（不缓存）
+
+        Returns:
+            缓存值或回源结果
+        """
+        with self._lock:
+            value, state = self._lookup(key, time.monotonic())
+            if state == "fresh":
+                self.stats["hits"] += 1
+                return value
+
+            flight = self._flights.get(key)
+            if state == "stale":
+                self.stats["stale_hits"] += 1
+                if flight is None:
+                    self._flights[key] = _Flight()
+                    threading.Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+                return value
+
+            if flight is not None:
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                self.stats["misses"] += 1
+                flight = self._flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+            self.put(key, flight.value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.value
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Any]):
+        flight = self._flights.get(key)
+        try:
+            flight.value = fetch()
+            if flight.value is None:
+                self.stats["refresh_errors"] += 1
+            self.put(key, flight.value)
+        except Exception as e:
+            flight.error = e
+            self.stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    # ==================== 异步入口 ====================
+    async def get_async(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        get() 的 asyncio 版本，回源与后台刷新都在当前事件循环上进行
+
+        Args:
+            key: 缓存键
+            fetch: 返回 awaitable 的回源函数；抛出的异常会传给所有等待同一 key 的调用方
+        """
+        with self._lock:
+            value, state = self._lookup(key, time.monotonic())
+        if state == "fresh":
+            self.stats["hits"] += 1
+            return value
+
+        task = self._tasks.get(key)
+        if state == "stale":
+            self.stats["stale_hits"] += 1
+            if task is None:
+                self._start_task(key, fetch, background=True)
+            return value
+
+        if task is None:
+            self.stats["misses"] += 1
+            task = self._start_task(key, fetch)
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: 一个调用方被取消时不影响等待同一 key 的其他调用方
+        return await asyncio.shield(task)
+
+    def _start_task(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], background: bool = False) -> "asyncio.Task":
+        async def run():
+            try:
+                value = await fetch()
+            except Exception:
+                if background:
+                    self.stats["refresh_errors"] += 1
+                raise
+            self.put(key, value)
+            return value
+
+        task = asyncio.ensure_future(run())
+        self._tasks[key] = task
+
+        def done(t: "asyncio.Task"):
+            self._tasks.pop(key, None)
+            if background and not t.cancelled():
+                t.exception()  # 后台刷新的异常已计数，避免 "never retrieved" 警告
+
+        task.add_done_callback(done)
+        return task
@@ -1,7 +1,12 @@
 """Exchange WebSocket connectors"""
 
+from .registry import available_exchanges, get_connector, load_plugins, register_connector
 from .gateio import GateIOConnector
 from .bybit import BybitConnector
 from .bitget import BitgetConnector
+from .jupiter import JupiterConnector
 
-__all__ = ['GateIOConnector', 'BybitConnector', 'BitgetConnector']
+__all__ = [
+    'GateIOConnector', 'BybitConnector', 'BitgetConnector', 'JupiterConnector',
+    'register_connector', 'get_connector', 'available_exchanges', 'load_plugins',
+]
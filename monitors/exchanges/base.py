@@ -1,33 +1,99 @@
 """Base class for exchange WebSocket connectors"""
 
 from abc import ABC, abstractmethod
-from typing import List, Callable
+from typing import List, Callable, Dict, Any, FrozenSet, Optional, Union
+import asyncio
+import json
+import logging
+import random
 import threading
+import time
+
+import websockets
+
+from .. import metrics
+from ..logs import connector_log
+from .decoder import get_decoder
+from .symbols import SymbolRegistry
+
+
+# All connectors share one asyncio event loop running in a background thread
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_loop_lock = threading.Lock()
+
+
+def get_connector_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the event loop shared by all connectors, starting it on first use
+
+    Returns:
+        The running event loop (owned by the "Connectors" daemon thread)
+    """
+    global _shared_loop
+
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, daemon=True, name="Connectors")
+            thread.start()
+            _shared_loop = loop
+
+        return _shared_loop
 
 
 class ExchangeConnector(ABC):
     """Abstract base class for exchange WebSocket connections"""
 
-    def __init__(self, symbols: List[str], on_price_update: Callable):
+    EXCHANGE_ID = ""  # exchange id passed to on_price_update (e.g. "gateio")
+    # Markets this connector can stream: "spot", "futures" (tickers) and "depth" (order books)
+    CAPABILITIES: FrozenSet[str] = frozenset({"spot"})
+    RECONNECT_BASE_DELAY = 0.5  # seconds, first backoff step
+    RECONNECT_MAX_DELAY = 30  # seconds, backoff cap
+    PING_INTERVAL = 20  # seconds between WebSocket protocol pings
+    PING_TIMEOUT = 10  # seconds to wait for a pong before dropping the socket
+    HEARTBEAT_INTERVAL = 15  # seconds between application-level pings (if the venue needs them)
+    SILENCE_TIMEOUT = 60  # seconds without a data frame before reconnecting
+
+    def __init__(
+        self,
+        symbols: List[str],
+        on_price_update: Callable,
+        silence_timeout: Optional[float] = None,
+        on_depth_update: Optional[Callable] = None,
+        depth_levels: int = 20
+    ):
         """
         Initialize exchange connector
 
         Args:
             symbols: List of trading pair symbols to monitor
-            on_price_update: Callback function(exchange, symbol, price_type, price)
+            on_price_update: Callback function(exchange, symbol, price_type, price, extra_data, exchange_ts=None)
+            silence_timeout: Reconnect after this many seconds without data (default SILENCE_TIMEOUT, 0 disables)
+            on_depth_update: Optional callback function(exchange, symbol, price_type, bids, asks,
+                snapshot, update_id, exchange_ts); when set, order book channels are subscribed too
+            depth_levels: Number of order book levels to request per side
         """
         self.symbols = symbols
+        self.silence_timeout = self.SILENCE_TIMEOUT if silence_timeout is None else silence_timeout
+        self.symbol_map = SymbolRegistry.for_exchange(self.EXCHANGE_ID, symbols)
         self.on_price_update = on_price_update
+        self.on_depth_update = on_depth_update
+        self.depth_levels = depth_levels
         self.running = False
-        self.threads = []
+        self._future = None
+        self.decode = get_decoder()
 
     @abstractmethod
-    def start_spot_listener(self):
-        """Start spot price listener thread"""
+    async def start_spot_listener(self):
+        """Spot price listener coroutine"""
         pass
 
-    def start_futures_listener(self):
-        """Start futures price listener thread (optional, can be overridden)"""
+    async def start_futures_listener(self):
+        """Futures price listener coroutine (optional, can be overridden)"""
+        pass
+
+    async def start_depth_listener(self, enable_futures: bool = True):
+        """Order book listener coroutine (optional, can be overridden)"""
         pass
 
     @abstractmethod
@@ -35,28 +101,165 @@ class ExchangeConnector(ABC):
         """Return exchange name"""
         pass
 
-    def start(self, enable_futures: bool = True):
+    async def _listen(
+        self,
+        url: str,
+        build_subscribe: Callable[[], Union[Dict[str, Any], List[Dict[str, Any]]]],
+        handle_message: Callable[[Dict[str, Any]], None],
+        label: str,
+        prefilter: Optional[Callable[[Any], bool]] = None,
+        build_heartbeat: Optional[Callable[[], Union[str, Dict[str, Any]]]] = None
+    ):
+        """
+        Keep one WebSocket subscription alive, reconnecting on failure
+
+        The socket is considered dead, and is reconnected, when protocol pings go
+        unanswered or when no data frame arrives within silence_timeout. After a
+        session that delivered data, the first reconnect and resubscribe happen
+        immediately. Repeated failures back off exponentially with jitter.
+
+        Args:
+            url: WebSocket endpoint
+            build_subscribe: Returns the subscribe request (or a list of them), called on every (re)connect
+            handle_message: Called with each decoded JSON frame
+            label: Human readable name used in log lines (e.g. "Gate.io 现货")
+            prefilter: Optional cheap check on the raw frame; frames it rejects are never decoded
+            build_heartbeat: Optional application-level ping sent every HEARTBEAT_INTERVAL seconds
+                (dicts are sent as JSON, strings as-is)
+        """
+        decode = self.decode
+        connected_before = False
+        failures = 0
+        last_data = 0.0
+
+        async def keepalive(ws):
+            """Send application pings and close the socket once the data feed goes silent"""
+            nonlocal last_data
+            next_heartbeat = time.monotonic() + self.HEARTBEAT_INTERVAL
+            while True:
+                await asyncio.sleep(1)
+                now = time.monotonic()
+                if self.silence_timeout and now - last_data > self.silence_timeout:
+                    connector_log.event(
+                        logging.WARNING, "silent", f"⏸️  {label}{self.silence_timeout:g}秒未收到行情，重新连接",
+                        exchange=self.EXCHANGE_ID, stream=label, silence=round(now - last_data, 1)
+                    )
+                    await ws.close()
+                    return
+                if build_heartbeat is not None and now >= next_heartbeat:
+                    heartbeat = build_heartbeat()
+                    await ws.send(heartbeat if isinstance(heartbeat, str) else json.dumps(heartbeat))
+                    next_heartbeat = now + self.HEARTBEAT_INTERVAL
+
+        while self.running:
+            if connected_before and metrics.enabled:
+                metrics.RECONNECTS.inc(self.EXCHANGE_ID)
+            connected_before = True
+            reason = "连接关闭"
+
+            try:
+                async with websockets.connect(
+                    url, ping_interval=self.PING_INTERVAL, ping_timeout=self.PING_TIMEOUT, close_timeout=2
+                ) as ws:
+                    requests = build_subscribe()
+                    for request in requests if isinstance(requests, list) else [requests]:
+                        await ws.send(json.dumps(request))
+                    last_data = time.monotonic()
+                    watchdog = asyncio.ensure_future(keepalive(ws))
+
+                    try:
+                        async for result in ws:
+                            if not self.running:
+                                break
+                            if prefilter is not None and not prefilter(result):
+                                continue
+                            last_data = time.monotonic()
+                            failures = 0
+                            if metrics.enabled:
+                                received = time.perf_counter()
+                                data = decode(result)
+                                parsed = time.perf_counter()
+                                metrics.STAGE_LATENCY.observe(parsed - received, "recv_to_parse")
+                                metrics.mark_parsed(parsed)
+                                handle_message(data)
+                            else:
+                                handle_message(decode(result))
+                    finally:
+                        watchdog.cancel()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                reason = f"连接错误: {e}"
+
+            if not self.running:
+                break
+
+            delay = self.backoff_delay(failures)
+            failures += 1
+            connector_log.event(
+                logging.WARNING, "reconnect", f"❌ {label}{reason}，{delay:.1f}秒后重连...",
+                exchange=self.EXCHANGE_ID, stream=label, error=reason, delay=round(delay, 2), attempt=failures
+            )
+            await asyncio.sleep(delay)
+
+    def backoff_delay(self, failures: int) -> float:
         """
-        Start listeners
+        Delay before the next reconnect attempt
+
+        Args:
+            failures: Consecutive attempts that ended without receiving data
+
+        Returns:
+            0 for the first attempt after a healthy session, otherwise an
+            exponentially growing delay capped at RECONNECT_MAX_DELAY, with
+            "equal jitter" (50-100% of the nominal value)
+        """
+        if failures == 0:
+            return 0.0
+        nominal = min(self.RECONNECT_MAX_DELAY, self.RECONNECT_BASE_DELAY * 2 ** (failures - 1))
+        return nominal * random.uniform(0.5, 1.0)
+
+    async def run(self, enable_futures: bool = True):
+        """
+        Run all listeners of this connector until stopped
+
+        Args:
+            enable_futures: Whether to run the futures listener
+        """
+        listeners = [self.start_spot_listener()]
+        if enable_futures and "futures" in self.CAPABILITIES:
+            listeners.append(self.start_futures_listener())
+        if self.on_depth_update is not None and "depth" in self.CAPABILITIES:
+            listeners.append(self.start_depth_listener(enable_futures))
+
+        try:
+            await asyncio.gather(*listeners)
+        except asyncio.CancelledError:
+            pass
+
+    def start(self, enable_futures: bool = True, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Start listeners on the shared event loop
 
         Args:
             enable_futures: Whether to start futures listener (default: True)
+            loop: Event loop to run on (default: the shared connector loop)
         """
         self.running = True
 
-        spot_thread = threading.Thread(target=self.start_spot_listener, daemon=True)
-        spot_thread.start()
-        self.threads = [spot_thread]
-
-        if enable_futures and hasattr(self, 'start_futures_listener'):
-            futures_thread = threading.Thread(target=self.start_futures_listener, daemon=True)
-            futures_thread.start()
-            self.threads.append(futures_thread)
+        loop = loop or get_connector_loop()
+        self._future = asyncio.run_coroutine_threadsafe(self.run(enable_futures), loop)
 
-        listener_types = "spot + futures" if enable_futures else "spot only"
-        print(f"✅ {self.get_exchange_name()} connector started ({listener_types}) for {len(self.symbols)} symbols")
+        listener_types = "spot + futures" if enable_futures and "futures" in self.CAPABILITIES else "spot only"
+        connector_log.info(
+            f"✅ {self.get_exchange_name()} connector started ({listener_types}) for {len(self.symbols)} symbols"
+        )
 
     def stop(self):
         """Stop all listeners"""
         self.running = False
-        print(f"🛑 {self.get_exchange_name()} connector stopped")
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        connector_log.info(f"🛑 {self.get_exchange_name()} connector stopped")
@@ -0,0 +1,108 @@
+"""Bitget WebSocket connector"""
+
+from ..logs import connector_log
+from .base import ExchangeConnector
+from .decoder import make_prefilter
+from .registry import register_connector
+
+
+@register_connector
+class BitgetConnector(ExchangeConnector):
+    """Bitget exchange WebSocket connector (spot only, public v2 API)"""
+
+    EXCHANGE_ID = "bitget"
+    CAPABILITIES = frozenset({"spot", "depth"})
+    SPOT_WS_URL = "wss://ws.bitget.com/v2/ws/public"
+
+    # Bitget drops connections that send nothing for 2 minutes; it expects a bare "ping" text frame
+    HEARTBEAT_INTERVAL = 25
+
+    # Only ticker / order book pushes are parsed; "pong" and subscription acks are dropped unparsed
+    # ("lastPr" and "bids" only appear inside data payloads, never in acks)
+    SPOT_PREFILTER = staticmethod(make_prefilter(('"lastPr"',)))
+    DEPTH_PREFILTER = staticmethod(make_prefilter(('"bids"',)))
+
+    # Snapshot order book channels offered by Bitget (full book on every push)
+    DEPTH_CHANNELS = ((1, "books1"), (5, "books5"), (15, "books15"))
+
+    def get_exchange_name(self) -> str:
+        return "Bitget"
+
+    def _build_subscribe(self, channel: str) -> dict:
+        return {
+            "op": "subscribe",
+            "args": [
+                {"instType": "SPOT", "channel": channel, "instId": symbol}
+                for symbol in self.symbol_map.venue_symbols
+            ]
+        }
+
+    def _handle_spot_message(self, data: dict):
+        arg = data.get("arg", {})
+        if arg.get("channel") != "ticker":
+            return
+
+        for ticker in data.get("data", ()):
+            # Convert back to standard format (TSLAXUSDT -> TSLAX_USDT)
+            symbol = self.symbol_map.to_standard(ticker.get("instId", arg.get("instId", "")))
+            if not symbol:
+                continue
+
+            ts = ticker.get("ts") or data.get("ts")
+            extra_data = {
+                "change_24h": ticker.get("change24h", "N/A"),
+                "high_24h": ticker.get("high24h", "N/A"),
+                "low_24h": ticker.get("low24h", "N/A"),
+                "volume_24h": ticker.get("quoteVolume", "N/A"),
+            }
+
+            self.on_price_update(
+                exchange=self.EXCHANGE_ID,
+                symbol=symbol,
+                price_type="spot",
+                price=float(ticker["lastPr"]),
+                extra_data=extra_data,
+                exchange_ts=int(ts) / 1000 if ts else None
+            )
+
+    async def start_spot_listener(self):
+        """监听 Bitget 现货价格"""
+        connector_log.info(f"🟢 启动 Bitget 现货监听: {', '.join(self.symbols)}")
+
+        await self._listen(
+            self.SPOT_WS_URL,
+            lambda: self._build_subscribe("ticker"),
+            self._handle_spot_message,
+            "Bitget 现货",
+            self.SPOT_PREFILTER,
+            lambda: "ping"
+        )
+
+    # ==================== Order book ====================
+    def _handle_depth_message(self, data: dict):
+        arg = data.get("arg", {})
+        for book in data.get("data", ()):
+            symbol = self.symbol_map.to_standard(arg.get("instId", ""))
+            if symbol:
+                ts = book.get("ts")
+                # booksN channels push the full top-N book every time
+                self.on_depth_update(
+                    self.EXCHANGE_ID, symbol, "spot", book.get("bids", []), book.get("asks", []),
+                    True, book.get("seq", 0), int(ts) / 1000 if ts else 0.0
+                )
+
+    async def start_depth_listener(self, enable_futures: bool = True):
+        """监听 Bitget 现货订单簿（每次推送均为快照）"""
+        depth, channel = next(
+            ((d, c) for d, c in self.DEPTH_CHANNELS if d >= self.depth_levels), self.DEPTH_CHANNELS[-1]
+        )
+        connector_log.info(f"📚 启动 Bitget 订单簿监听 ({depth}档): {', '.join(self.symbols)}")
+
+        await self._listen(
+            self.SPOT_WS_URL,
+            lambda: self._build_subscribe(channel),
+            self._handle_depth_message,
+            "Bitget 现货订单簿",
+            self.DEPTH_PREFILTER,
+            lambda: "ping"
+        )
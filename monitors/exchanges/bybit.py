@@ -1,80 +1,99 @@
 """Bybit WebSocket connector"""
 
-import json
-import time
-from websocket import create_connection
+from ..logs import connector_log
 from .base import ExchangeConnector
+from .decoder import make_prefilter
+from .registry import register_connector
 
 
+@register_connector
 class BybitConnector(ExchangeConnector):
     """Bybit exchange WebSocket connector (spot only)"""
 
+    EXCHANGE_ID = "bybit"
+    CAPABILITIES = frozenset({"spot", "depth"})
     SPOT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
 
+    # Only ticker pushes are parsed; pongs and subscription acks are dropped unparsed
+    SPOT_PREFILTER = staticmethod(make_prefilter(('"tickers.',)))
+    DEPTH_PREFILTER = staticmethod(make_prefilter(('"orderbook.',)))
+
+    # Spot order book depths offered by Bybit
+    DEPTH_CHOICES = (1, 50, 200)
+
     def get_exchange_name(self) -> str:
         return "Bybit"
 
-    def _convert_symbol_format(self, symbol: str) -> str:
-        """
-        Convert symbol from Gate.io format to Bybit format
-        Gate.io: TSLAX_USDT -> Bybit: TSLAXUSDT
-        """
-        return symbol.replace("_", "")
-
-    def start_spot_listener(self):
+    def _handle_spot_message(self, data: dict):
+        # Check if this is a ticker update
+        if data.get("topic", "").startswith("tickers."):
+            ticker_data = data.get("data", {})
+            bybit_symbol = ticker_data.get("symbol", "")
+
+            # Convert back to standard format (TSLAXUSDT -> TSLAX_USDT)
+            original_symbol = self.symbol_map.to_standard(bybit_symbol)
+
+            if original_symbol:
+                price = float(ticker_data.get("lastPrice", 0))
+                extra_data = {
+                    "change_24h": ticker_data.get("price24hPcnt", "N/A"),
+                    "high_24h": ticker_data.get("highPrice24h", "N/A"),
+                    "low_24h": ticker_data.get("lowPrice24h", "N/A"),
+                    "volume_24h": ticker_data.get("volume24h", "N/A"),
+                }
+
+                self.on_price_update(
+                    exchange=self.EXCHANGE_ID,
+                    symbol=original_symbol,
+                    price_type="spot",
+                    price=price,
+                    extra_data=extra_data,
+                    exchange_ts=data["ts"] / 1000 if data.get("ts") else None
+                )
+
+    async def start_spot_listener(self):
         """监听 Bybit 现货价格"""
-        print(f"🟢 启动 Bybit 现货监听: {', '.join(self.symbols)}")
-
-        # Convert symbols to Bybit format
-        bybit_symbols = [self._convert_symbol_format(s) for s in self.symbols]
-
-        while self.running:
-            try:
-                ws = create_connection(self.SPOT_WS_URL)
-
-                # Subscribe to tickers for all symbols
-                subscribe_args = [f"tickers.{symbol}" for symbol in bybit_symbols]
-                ws.send(json.dumps({
-                    "op": "subscribe",
-                    "args": subscribe_args
-                }))
-
-                while self.running:
-                    result = ws.recv()
-                    data = json.loads(result)
-
-                    # Check if this is a ticker update
-                    if data.get("topic", "").startswith("tickers."):
-                        ticker_data = data.get("data", {})
-                        bybit_symbol = ticker_data.get("symbol", "")
-
-                        # Convert back to standard format (TSLAXUSDT -> TSLAX_USDT)
-                        # Try to match with original symbols
-                        original_symbol = None
-                        for orig, bybit in zip(self.symbols, bybit_symbols):
-                            if bybit == bybit_symbol:
-                                original_symbol = orig
-                                break
-
-                        if original_symbol:
-                            price = float(ticker_data.get("lastPrice", 0))
-                            extra_data = {
-                                "change_24h": ticker_data.get("price24hPcnt", "N/A"),
-                                "high_24h": ticker_data.get("highPrice24h", "N/A"),
-                                "low_24h": ticker_data.get("lowPrice24h", "N/A"),
-                                "volume_24h": ticker_data.get("volume24h", "N/A"),
-                            }
-
-                            self.on_price_update(
-                                exchange="bybit",
-                                symbol=original_symbol,
-                                price_type="spot",
-                                price=price,
-                                extra_data=extra_data
-                            )
-
-                ws.close()
-
-            except Exception as e:
-                print(f"❌ Bybit 现货连接错误: {e}，5秒后重连...")
-                time.sleep(5)
+        connector_log.info(f"🟢 启动 Bybit 现货监听: {', '.join(self.symbols)}")
+
+        # Subscribe to tickers for all symbols (Bybit format: TSLAXUSDT)
+        subscribe_args = [f"tickers.{symbol}" for symbol in self.symbol_map.venue_symbols]
+
+        await self._listen(
+            self.SPOT_WS_URL,
+            lambda: {"op": "subscribe", "args": subscribe_args},
+            self._handle_spot_message,
+            "Bybit 现货",
+            self.SPOT_PREFILTER,
+            lambda: {"op": "ping"}
+        )
+
+    # ==================== Order book ====================
+    def _handle_depth_message(self, data: dict):
+        book = data.get("data")
+        if not book:
+            return
+        symbol = self.symbol_map.to_standard(book.get("s", ""))
+        if symbol:
+            update_id = book.get("u", 0)
+            # u == 1 is a fresh snapshot sent after a Bybit service restart
+            snapshot = data.get("type") == "snapshot" or update_id == 1
+            self.on_depth_update(
+                self.EXCHANGE_ID, symbol, "spot", book.get("b", []), book.get("a", []),
+                snapshot, update_id, data.get("ts", 0) / 1000
+            )
+
+    async def start_depth_listener(self, enable_futures: bool = True):
+        """监听 Bybit 现货订单簿（快照 + 增量）"""
+        depth = next((d for d in self.DEPTH_CHOICES if d >= self.depth_levels), self.DEPTH_CHOICES[-1])
+        connector_log.info(f"📚 启动 Bybit 订单簿监听 ({depth}档): {', '.join(self.symbols)}")
+
+        subscribe_args = [f"orderbook.{depth}.{symbol}" for symbol in self.symbol_map.venue_symbols]
+
+        await self._listen(
+            self.SPOT_WS_URL,
+            lambda: {"op": "subscribe", "args": subscribe_args},
+            self._handle_depth_message,
+            "Bybit 现货订单簿",
+            self.DEPTH_PREFILTER,
+            lambda: {"op": "ping"}
+        )
@@ -0,0 +1,87 @@
+"""Pluggable JSON decoders and cheap pre-filters for WebSocket frames"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+Frame = Union[str, bytes]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+def _available_decoders() -> Dict[str, Callable[[Frame], Any]]:
+    decoders: Dict[str, Callable[[Frame], Any]] = {}
+    if orjson is not None:
+        decoders["orjson"] = orjson.loads
+    if msgspec is not None:
+        decoders["msgspec"] = msgspec.json.Decoder().decode
+    decoders["json"] = json.loads
+    return decoders
+
+
+DECODERS = _available_decoders()
+
+# Preference order when WS_JSON_DECODER=auto
+_AUTO_ORDER = ("orjson", "msgspec", "json")
+
+
+def get_decoder(name: Optional[str] = None) -> Callable[[Frame], Any]:
+    """
+    Return a JSON decode function
+
+    Args:
+        name: "orjson", "msgspec", "json" or "auto" (default: WS_JSON_DECODER env, then auto)
+
+    Returns:
+        Callable taking str/bytes and returning the decoded object
+    """
+    name = (name or os.environ.get("WS_JSON_DECODER", "auto")).lower()
+
+    if name == "auto":
+        for candidate in _AUTO_ORDER:
+            if candidate in DECODERS:
+                return DECODERS[candidate]
+
+    if name not in DECODERS:
+        raise ValueError(f"JSON decoder '{name}' is not available (installed: {', '.join(DECODERS)})")
+
+    return DECODERS[name]
+
+
+def make_prefilter(markers: Sequence[str]) -> Callable[[str], bool]:
+    """
+    Build a substring pre-filter that rejects text frames before they are parsed
+
+    Every marker must appear in the raw frame. Each socket subscribes to a single
+    ticker channel, so one marker is usually enough: '"update"' lets Gate.io ticker
+    updates through and drops pongs and subscription acks.
+
+    Args:
+        markers: Substrings that a frame of interest always contains
+
+    Returns:
+        Predicate taking the raw text frame
+    """
+    markers = tuple(markers)
+
+    if len(markers) == 1:
+        marker = markers[0]
+
+        def prefilter(raw: str) -> bool:
+            return marker in raw
+    else:
+        def prefilter(raw: str) -> bool:
+            for marker in markers:
+                if marker not in raw:
+                    return False
+            return True
+
+    return prefilter
@@ -1,111 +1,218 @@
 """Gate.io WebSocket connector"""
 
-import json
+import asyncio
 import time
-from websocket import create_connection
+from typing import Dict, List
+
+from ..logs import connector_log
 from .base import ExchangeConnector
+from .decoder import make_prefilter
+from .registry import register_connector
 
 
+@register_connector
 class GateIOConnector(ExchangeConnector):
     """Gate.io exchange WebSocket connector"""
 
+    EXCHANGE_ID = "gateio"
+    CAPABILITIES = frozenset({"spot", "futures", "depth"})
     SPOT_WS_URL = "wss://api.gateio.ws/ws/v4/"
     FUTURES_WS_URL = "wss://fx-ws.gateio.ws/v4/ws/usdt"
 
+    # Only ticker updates are parsed; pongs and subscription acks are dropped unparsed
+    SPOT_PREFILTER = staticmethod(make_prefilter(('"update"',)))
+    FUTURES_PREFILTER = staticmethod(make_prefilter(('"update"',)))
+    SPOT_DEPTH_PREFILTER = staticmethod(make_prefilter(('"spot.order_book"',)))
+    FUTURES_DEPTH_PREFILTER = staticmethod(make_prefilter(('"futures.order_book"',)))
+
+    # Order book depths accepted by spot.order_book / futures.order_book
+    SPOT_DEPTH_CHOICES = (5, 10, 20, 50, 100)
+    FUTURES_DEPTH_CHOICES = (1, 5, 10, 20, 50, 100)
+
+    # Futures depth sizes are in contracts; multiply by the contract size to get base units
+    # (symbols not listed use 1.0)
+    CONTRACT_SIZES: Dict[str, float] = {}
+
     def get_exchange_name(self) -> str:
         return "Gate.io"
 
-    def start_spot_listener(self):
+    def _build_subscribe(self, channel: str) -> dict:
+        return {
+            "time": int(time.time()),
+            "channel": channel,
+            "event": "subscribe",
+            "payload": self.symbol_map.venue_symbols
+        }
+
+    def _handle_spot_message(self, data: dict):
+        if data.get("event") == "update" and data.get("channel") == "spot.tickers":
+            ticker = data["result"]
+            symbol = self.symbol_map.to_standard(ticker["currency_pair"])
+            time_ms = data.get("time_ms")
+
+            if symbol:
+                price = float(ticker["last"])
+                extra_data = {
+                    "change_24h": ticker.get("change_percentage", "N/A"),
+                    "high_24h": ticker.get("high_24h", "N/A"),
+                    "low_24h": ticker.get("low_24h", "N/A"),
+                    "volume_24h": ticker.get("quote_volume", "N/A"),
+                }
+
+                self.on_price_update(
+                    exchange=self.EXCHANGE_ID,
+                    symbol=symbol,
+                    price_type="spot",
+                    price=price,
+                    extra_data=extra_data,
+                    exchange_ts=time_ms / 1000 if time_ms else None
+                )
+
+    def _handle_futures_message(self, data: dict):
+        if data.get("event") == "update" and data.get("channel") == "futures.tickers":
+            tickers = data["result"]
+            time_ms = data.get("time_ms")
+            exchange_ts = time_ms / 1000 if time_ms else None
+
+            for ticker in tickers:
+                symbol = self.symbol_map.to_standard(ticker["contract"])
+
+                if symbol:
+                    price = float(ticker["last"])
+                    extra_data = {
+                        "mark_price": ticker.get("mark_price", "N/A"),
+                        "index_price": ticker.get("index_price", "N/A"),
+                        "funding_rate": ticker.get("funding_rate", "N/A"),
+                        "change_24h": ticker.get("change_percentage", "N/A"),
+                        "high_24h": ticker.get("high_24h", "N/A"),
+                        "low_24h": ticker.get("low_24h", "N/A"),
+                        "volume_24h": ticker.get("volume_24h", "N/A"),
+                    }
+
+                    self.on_price_update(
+                        exchange=self.EXCHANGE_ID,
+                        symbol=symbol,
+                        price_type="futures",
+                        price=price,
+                        extra_data=extra_data,
+                        exchange_ts=exchange_ts
+                    )
+
+    async def start_spot_listener(self):
         """监听 Gate.io 现货价格"""
-        print(f"🟢 启动 Gate.io 现货监听: {', '.join(self.symbols)}")
-
-        while self.running:
-            try:
-                ws = create_connection(self.SPOT_WS_URL)
-                ws.send(json.dumps({
-                    "time": int(time.time()),
-                    "channel": "spot.tickers",
-                    "event": "subscribe",
-                    "payload": self.symbols
-                }))
-
-                while self.running:
-                    result = ws.recv()
-                    data = json.loads(result)
-
-                    if data.get("event") == "update" and data.get("channel") == "spot.tickers":
-                        ticker = data["result"]
-                        symbol = ticker["currency_pair"]
-
-                        if symbol in self.symbols:
-                            price = float(ticker["last"])
-                            extra_data = {
-                                "change_24h": ticker.get("change_percentage", "N/A"),
-                                "high_24h": ticker.get("high_24h", "N/A"),
-                                "low_24h": ticker.get("low_24h", "N/A"),
-                                "volume_24h": ticker.get("quote_volume", "N/A"),
-                            }
-
-                            self.on_price_update(
-                                exchange="gateio",
-                                symbol=symbol,
-                                price_type="spot",
-                                price=price,
-                                extra_data=extra_data
-                            )
-
-                ws.close()
-
-            except Exception as e:
-                print(f"❌ Gate.io 现货连接错误: {e}，5秒后重连...")
-                time.sleep(5)
-
-    def start_futures_listener(self):
+        connector_log.info(f"🟢 启动 Gate.io 现货监听: {', '.join(self.symbols)}")
+
+        await self._listen(
+            self.SPOT_WS_URL,
+            lambda: self._build_subscribe("spot.tickers"),
+            self._handle_spot_message,
+            "Gate.io 现货",
+            self.SPOT_PREFILTER,
+            lambda: {"time": int(time.time()), "channel": "spot.ping"}
+        )
+
+    async def start_futures_listener(self):
         """监听 Gate.io 合约价格"""
-        print(f"🔵 启动 Gate.io 合约监听: {', '.join(self.symbols)}")
-
-        while self.running:
-            try:
-                ws = create_connection(self.FUTURES_WS_URL)
-                ws.send(json.dumps({
-                    "time": int(time.time()),
-                    "channel": "futures.tickers",
-                    "event": "subscribe",
-                    "payload": self.symbols
-                }))
-
-                while self.running:
-                    result = ws.recv()
-                    data = json.loads(result)
-
-                    if data.get("event") == "update" and data.get("channel") == "futures.tickers":
-                        tickers = data["result"]
-
-                        for ticker in tickers:
-                            symbol = ticker["contract"]
-
-                            if symbol in self.symbols:
-                                price = float(ticker["last"])
-                                extra_data = {
-                                    "mark_price": ticker.get("mark_price", "N/A"),
-                                    "index_price": ticker.get("index_price", "N/A"),
-                                    "funding_rate": ticker.get("funding_rate", "N/A"),
-                                    "change_24h": ticker.get("change_percentage", "N/A"),
-                                    "high_24h": ticker.get("high_24h", "N/A"),
-                                    "low_24h": ticker.get("low_24h", "N/A"),
-                                    "volume_24h": ticker.get("volume_24h", "N/A"),
-                                }
-
-                                self.on_price_update(
-                                    exchange="gateio",
-                                    symbol=symbol,
-                                    price_type="futures",
-                                    price=price,
-                                    extra_data=extra_data
-                                )
-
-                ws.close()
-
-            except Exception as e:
-                print(f"❌ Gate.io 合约连接错误: {e}，5秒后重连...")
-                time.sleep(5)
+        connector_log.info(f"🔵 启动 Gate.io 合约监听: {', '.join(self.symbols)}")
+
+        await self._listen(
+            self.FUTURES_WS_URL,
+            lambda: self._build_subscribe("futures.tickers"),
+            self._handle_futures_message,
+            "Gate.io 合约",
+            self.FUTURES_PREFILTER,
+            lambda: {"time": int(time.time()), "channel": "futures.ping"}
+        )
+
+    # ==================== Order book ====================
+    def _depth(self, choices: tuple) -> int:
+        """Smallest supported depth covering depth_levels (the largest if none does)"""
+        return next((d for d in choices if d >= self.depth_levels), choices[-1])
+
+    def _build_depth_subscribe(self, channel: str, depth: int, interval: str) -> List[dict]:
+        # One subscription per market: payload is [market, levels, interval]
+        return [
+            {
+                "time": int(time.time()),
+                "channel": channel,
+                "event": "subscribe",
+                "payload": [market, str(depth), interval]
+            }
+            for market in self.symbol_map.venue_symbols
+        ]
+
+    def _handle_spot_depth(self, data: dict):
+        # spot.order_book pushes a full top-N snapshot every interval
+        if data.get("event") != "update":
+            return
+        book = data["result"]
+        symbol = self.symbol_map.to_standard(book.get("s", ""))
+        if symbol:
+            self.on_depth_update(
+                self.EXCHANGE_ID, symbol, "spot", book.get("bids", []), book.get("asks", []),
+                True, book.get("lastUpdateId", 0), book.get("t", 0) / 1000
+            )
+
+    def _handle_futures_depth(self, data: dict):
+        event = data.get("event")
+        if event == "all":
+            book = data["result"]
+            symbol = self.symbol_map.to_standard(book.get("contract", ""))
+            if symbol:
+                size = self.CONTRACT_SIZES.get(symbol, 1.0)
+                self.on_depth_update(
+                    self.EXCHANGE_ID, symbol, "futures",
+                    [(level["p"], float(level["s"]) * size) for level in book.get("bids", [])],
+                    [(level["p"], float(level["s"]) * size) for level in book.get("asks", [])],
+                    True, book.get("id", 0), book.get("t", 0) / 1000
+                )
+
+        elif event == "update":
+            # Size > 0 is a bid level, < 0 an ask level, 0 removes the price from whichever side holds it
+            changes: Dict[str, tuple] = {}
+            for level in data["result"]:
+                symbol = self.symbol_map.to_standard(level.get("c", ""))
+                if not symbol:
+                    continue
+                bids, asks, last_id = changes.get(symbol, ([], [], 0))
+                size = float(level["s"]) * self.CONTRACT_SIZES.get(symbol, 1.0)
+                if size > 0:
+                    bids.append((level["p"], size))
+                elif size < 0:
+                    asks.append((level["p"], -size))
+                else:
+                    bids.append((level["p"], 0.0))
+                    asks.append((level["p"], 0.0))
+                changes[symbol] = (bids, asks, max(last_id, level.get("id", 0)))
+
+            exchange_ts = data.get("time_ms", 0) / 1000
+            for symbol, (bids, asks, last_id) in changes.items():
+                self.on_depth_update(self.EXCHANGE_ID, symbol, "futures", bids, asks, False, last_id, exchange_ts)
+
+    async def start_depth_listener(self, enable_futures: bool = True):
+        """监听 Gate.io 订单簿（现货快照 + 合约增量）"""
+        spot_depth = self._depth(self.SPOT_DEPTH_CHOICES)
+        futures_depth = self._depth(self.FUTURES_DEPTH_CHOICES)
+        connector_log.info(f"📚 启动 Gate.io 订单簿监听 ({spot_depth}档): {', '.join(self.symbols)}")
+
+        listeners = [
+            self._listen(
+                self.SPOT_WS_URL,
+                lambda: self._build_depth_subscribe("spot.order_book", spot_depth, "100ms"),
+                self._handle_spot_depth,
+                "Gate.io 现货订单簿",
+                self.SPOT_DEPTH_PREFILTER,
+                lambda: {"time": int(time.time()), "channel": "spot.ping"}
+            )
+        ]
+        if enable_futures:
+            listeners.append(self._listen(
+                self.FUTURES_WS_URL,
+                lambda: self._build_depth_subscribe("futures.order_book", futures_depth, "0"),
+                self._handle_futures_depth,
+                "Gate.io 合约订单簿",
+                self.FUTURES_DEPTH_PREFILTER,
+                lambda: {"time": int(time.time()), "channel": "futures.ping"}
+            ))
+
+        await asyncio.gather(*listeners)
@@ -0,0 +1,145 @@
+"""Jupiter (Solana DEX) price source, exposed as a spot-only connector"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+import httpx
+
+from .. import metrics
+from ..logs import connector_log
+from ..tokens import get_registry
+from .base import ExchangeConnector
+from .registry import register_connector
+
+
+@register_connector
+class JupiterConnector(ExchangeConnector):
+    """
+    Jupiter Price API v3 poller
+
+    All configured mints are fetched in one batched request per interval and
+    reported as "jupiter" spot prices. The interval adapts to the market: it
+    halves (down to MIN_INTERVAL) after a poll in which some price moved, grows
+    by 1.5x (up to MAX_INTERVAL) while prices are flat, and doubles on errors.
+    """
+
+    EXCHANGE_ID = "jupiter"
+    CAPABILITIES = frozenset({"spot"})
+    PRICE_API = "https://lite-api.jup.ag/price/v3"
+
+    MIN_INTERVAL = 1.0  # seconds between polls while prices are moving
+    MAX_INTERVAL = 10.0  # seconds between polls while prices are flat or the API is failing
+    BATCH_SIZE = 50  # max ids per Price API request
+    REQUEST_TIMEOUT = 10
+
+    def __init__(self, symbols: List[str], on_price_update, **kwargs):
+        super().__init__(symbols, on_price_update, **kwargs)
+        # Standard symbol -> token mint, from the token registry
+        self.mints = get_registry().mints_for(symbols)
+        self.symbol_by_mint = {m: s for s, m in self.mints.items()}
+        self.interval = self.MIN_INTERVAL
+        self._last_prices: Dict[str, float] = {}
+
+    def get_exchange_name(self) -> str:
+        return "Jupiter"
+
+    def next_interval(self, changed: bool, failed: bool = False) -> float:
+        """
+        Adapt the polling interval after a poll
+
+        Args:
+            changed: Whether any price moved since the previous poll
+            failed: Whether the poll failed (HTTP error, rate limit, bad payload)
+
+        Returns:
+            The new interval in seconds
+        """
+        if failed:
+            interval = self.interval * 2
+        elif changed:
+            interval = self.interval / 2
+        else:
+            interval = self.interval * 1.5
+        self.interval = min(self.MAX_INTERVAL, max(self.MIN_INTERVAL, interval))
+        return self.interval
+
+    def _handle_prices(self, data: Dict[str, dict]) -> bool:
+        """Report every returned price; return whether any of them moved"""
+        if metrics.enabled:
+            metrics.mark_parsed()
+
+        changed = False
+        for mint, info in data.items():
+            symbol = self.symbol_by_mint.get(mint)
+            if symbol is None or not info or info.get("usdPrice") is None:
+                continue
+
+            price = float(info["usdPrice"])
+            if self._last_prices.get(symbol) != price:
+                changed = True
+                self._last_prices[symbol] = price
+
+            extra_data = {
+                "change_24h": info.get("priceChange24h", "N/A"),
+                "high_24h": "N/A",
+                "low_24h": "N/A",
+                "volume_24h": "N/A",
+                "block_id": info.get("blockId"),
+            }
+
+            self.on_price_update(
+                exchange=self.EXCHANGE_ID,
+                symbol=symbol,
+                price_type="spot",
+                price=price,
+                extra_data=extra_data,
+                exchange_ts=None
+            )
+        return changed
+
+    async def _poll(self, client: httpx.AsyncClient) -> bool:
+        mints = list(self.mints.values())
+        batches = [mints[i:i + self.BATCH_SIZE] for i in range(0, len(mints), self.BATCH_SIZE)]
+        responses = await asyncio.gather(
+            *(client.get(self.PRICE_API, params={"ids": ",".join(batch)}) for batch in batches)
+        )
+
+        changed = False
+        for response in responses:
+            response.raise_for_status()
+            changed |= self._handle_prices(self.decode(response.content))
+        return changed
+
+    async def start_spot_listener(self):
+        """轮询 Jupiter 价格（现货）"""
+        missing = [s for s in self.symbols if s not in self.mints]
+        if missing:
+            connector_log.warning(f"⚠️  代币注册表中没有以下币对，Jupiter 将跳过: {', '.join(missing)}")
+        if not self.mints:
+            return
+
+        connector_log.info(f"🟢 启动 Jupiter 价格轮询: {', '.join(self.mints)}")
+
+        async with httpx.AsyncClient(timeout=self.REQUEST_TIMEOUT, headers={"Accept": "application/json"}) as client:
+            failures = 0
+            while self.running:
+                started = time.monotonic()
+                try:
+                    changed = await self._poll(client)
+                    failures = 0
+                    interval = self.next_interval(changed)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    failures += 1
+                    interval = self.next_interval(False, failed=True)
+                    if metrics.enabled:
+                        metrics.RECONNECTS.inc(self.EXCHANGE_ID)
+                    connector_log.event(
+                        logging.WARNING, "poll_error", f"❌ Jupiter 价格查询失败: {e}，{interval:.1f}秒后重试",
+                        exchange=self.EXCHANGE_ID, error=str(e), delay=round(interval, 2), attempt=failures
+                    )
+
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,93 @@
+"""Connector registry: exchange id -> connector class
+
+Built-in connectors register themselves with @register_connector when this
+package is imported. Third-party venues can be added without touching
+price_monitor, in either of two ways:
+
+- an installed package exposing an entry point in the "price_monitor.exchanges" group
+- a module path listed in EXCHANGE_PLUGINS (e.g. "mypkg.okx,mypkg.kraken"), imported at load time
+
+In both cases the module has to define an ExchangeConnector subclass decorated
+with @register_connector.
+"""
+
+import importlib
+import logging
+from importlib.metadata import entry_points
+from typing import Dict, Iterable, List, Optional, Type
+
+from ..logs import connector_log
+from .base import ExchangeConnector
+
+ENTRY_POINT_GROUP = "price_monitor.exchanges"
+
+CONNECTORS: Dict[str, Type[ExchangeConnector]] = {}
+
+_plugins_loaded = False
+
+
+def register_connector(cls: Type[ExchangeConnector]) -> Type[ExchangeConnector]:
+    """
+    Class decorator registering a connector under its EXCHANGE_ID
+
+    Args:
+        cls: ExchangeConnector subclass with EXCHANGE_ID and CAPABILITIES set
+
+    Returns:
+        The class itself, unchanged
+    """
+    if not cls.EXCHANGE_ID:
+        raise ValueError(f"{cls.__name__} has no EXCHANGE_ID")
+    if "spot" not in cls.CAPABILITIES:
+        # Every venue contributes a spot leg; futures come only from FUTURES_EXCHANGE
+        raise ValueError(f"{cls.__name__} must support spot")
+    CONNECTORS[cls.EXCHANGE_ID] = cls
+    return cls
+
+
+def load_plugins(modules: Iterable[str] = ()) -> List[str]:
+    """
+    Import connector plugins from entry points and from explicit module paths
+
+    Entry points are only scanned once per process; a plugin that fails to
+    import is logged and skipped so one broken venue cannot stop the monitor.
+
+    Args:
+        modules: Extra module paths to import (e.g. from EXCHANGE_PLUGINS)
+
+    Returns:
+        Names of the plugins that were loaded
+    """
+    global _plugins_loaded
+    loaded = []
+
+    targets = []
+    if not _plugins_loaded:
+        _plugins_loaded = True
+        targets.extend((ep.name, ep.load) for ep in entry_points(group=ENTRY_POINT_GROUP))
+    for module in modules:
+        module = module.strip()
+        if module:
+            targets.append((module, lambda m=module: importlib.import_module(m)))
+
+    for name, load in targets:
+        try:
+            load()
+            loaded.append(name)
+        except Exception as e:
+            connector_log.event(
+                logging.ERROR, "plugin_error", f"❌ 加载交易所插件 {name} 失败: {e}",
+                plugin=name, error=str(e)
+            )
+
+    return loaded
+
+
+def get_connector(exchange: str) -> Optional[Type[ExchangeConnector]]:
+    """Connector class registered for an exchange id, None if unknown"""
+    return CONNECTORS.get(exchange.lower())
+
+
+def available_exchanges() -> List[str]:
+    """Registered exchange ids, sorted"""
+    return sorted(CONNECTORS)
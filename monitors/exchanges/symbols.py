@@ -0,0 +1,90 @@
+"""Symbol normalization shared by all exchange connectors"""
+
+from typing import Callable, Dict, List, Optional
+
+from ..logs import connector_log
+from ..tokens import get_registry
+
+# Standard symbols use the Gate.io style: BASE_QUOTE (e.g. TSLAX_USDT)
+SymbolFormat = Callable[[str], str]
+
+
+def _identity(symbol: str) -> str:
+    return symbol
+
+
+def _concat(symbol: str) -> str:
+    """TSLAX_USDT -> TSLAXUSDT"""
+    return symbol.replace("_", "")
+
+
+# Venue naming conventions, keyed by exchange id
+VENUE_FORMATS: Dict[str, SymbolFormat] = {
+    "gateio": _identity,
+    "bybit": _concat,
+    "bitget": _concat,
+}
+
+
+def register_format(exchange: str, fmt: SymbolFormat):
+    """Register the symbol naming convention of a new venue"""
+    VENUE_FORMATS[exchange] = fmt
+
+
+class SymbolRegistry:
+    """Bidirectional standard <-> venue symbol map, built once per connector"""
+
+    def __init__(self, symbols: List[str], fmt: SymbolFormat = _identity, overrides: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            symbols: Standard symbols (TSLAX_USDT, ...)
+            fmt: Converts a standard symbol to the venue's format
+            overrides: Per-symbol venue names that do not follow fmt
+        """
+        self.symbols = list(symbols)
+        overrides = overrides or {}
+        self._to_venue: Dict[str, str] = {s: overrides.get(s) or fmt(s) for s in self.symbols}
+        self._to_standard: Dict[str, str] = {v: s for s, v in self._to_venue.items()}
+        # Venues may echo symbols in a different case; index the upper-case form too
+        for v, s in list(self._to_standard.items()):
+            self._to_standard.setdefault(v.upper(), s)
+
+    @classmethod
+    def for_exchange(cls, exchange: str, symbols: List[str]) -> "SymbolRegistry":
+        """
+        Build a registry using the registered naming convention of an exchange,
+        plus any per-token "venues" overrides from the token registry
+
+        A missing or malformed token registry only means "no overrides": the
+        built-in venue formats still work
+        """
+        overrides = {}
+        try:
+            tokens = get_registry()
+        except (OSError, ValueError) as e:
+            connector_log.warning(f"⚠️  代币注册表不可用，{exchange} 使用默认的币对格式: {e}")
+            return cls(symbols, VENUE_FORMATS.get(exchange, _identity), overrides)
+        for symbol in symbols:
+            venue_symbol = tokens.venue_symbol(exchange, symbol)
+            if venue_symbol:
+                overrides[symbol] = venue_symbol
+        return cls(symbols, VENUE_FORMATS.get(exchange, _identity), overrides)
+
+    def to_venue(self, symbol: str) -> str:
+        """Standard symbol -> venue symbol"""
+        return self._to_venue[symbol]
+
+    def to_standard(self, venue_symbol: str) -> Optional[str]:
+        """Venue symbol -> standard symbol, None if not monitored"""
+        return self._to_standard.get(venue_symbol)
+
+    @property
+    def venue_symbols(self) -> List[str]:
+        """Venue symbols in the same order as the standard symbols"""
+        return [self._to_venue[s] for s in self.symbols]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._to_venue
+
+    def __len__(self) -> int:
+        return len(self.symbols)
@@ -0,0 +1,329 @@
+"""
+Jupiter 异步报价引擎
+所有请求共用一个 keep-alive 连接池 (httpx.AsyncClient)，用信号量限制并发，
+参数完全相同的并发请求只发一次（其余调用方等待同一个结果）
+
+一次调用即可并发获取多个代币 × 多个金额 × 买卖两个方向的报价，并输出每个代币的滑点曲线
+（成交均价 vs 名义金额）
+"""
+
+import asyncio
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from .quote_cache import QuoteCache, quote_key
+from .tokens import Token, get_registry
+
+JUPITER_QUOTE_API = "https://lite-api.jup.ag/swap/v1/quote"
+
+DEFAULT_SLIPPAGE_BPS = 50
+
+
+class QuoteError(Exception):
+    """报价失败（网络错误、HTTP 错误或返回格式不对）"""
+
+
+class Quote(NamedTuple):
+    """一次兑换报价（数量均为人类可读单位）"""
+    input_token: Token
+    output_token: Token
+    in_amount: float
+    out_amount: float
+    price_impact_pct: float
+    route: str
+    slippage_bps: int
+
+    def unit_price(self, quote_token: Optional[Token] = None) -> float:
+        """1 个非计价代币值多少计价代币（例如 1 TSLAx ≈ x USDT；默认计价代币取自代币注册表）"""
+        if quote_token is None:
+            quote_token = get_registry().quote
+        if self.input_token == quote_token:
+            return self.in_amount / self.out_amount if self.out_amount else float("nan")
+        return self.out_amount / self.in_amount if self.in_amount else float("nan")
+
+
+class CurvePoint(NamedTuple):
+    """滑点曲线上的一个点"""
+    side: str             # "buy": 计价代币 -> 代币；"sell": 代币 -> 计价代币
+    notional: float       # 名义金额（计价代币）
+    unit_price: float     # 成交均价
+    slippage_pct: float   # 相对参考中间价的不利偏离 %（越大越差）
+    price_impact_pct: float
+    route: str
+
+
+class SlippageCurve(NamedTuple):
+    """单个代币的滑点曲线"""
+    token: Token
+    quote_token: Token
+    mid_price: float                  # 最小金额买卖报价的中间价，作为参考价
+    points: List[CurvePoint]          # 按 (方向, 名义金额) 排序
+    errors: List[str]                 # 失败的报价
+
+    def side(self, side: str) -> List[CurvePoint]:
+        return [p for p in self.points if p.side == side]
+
+
+QuoteKey = Tuple[str, str, int, int]
+
+
+class JupiterQuoteClient:
+    """
+    共享连接池的异步报价客户端
+
+    用法:
+        async with JupiterQuoteClient(max_concurrency=8) as client:
+            curves = await client.slippage_curves(get_registry().tokens(["TSLAx"]), [100, 1000, 10000])
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_connections: int = 16,
+        timeout: float = 10.0,
+        slippage_bps: int = DEFAULT_SLIPPAGE_BPS,
+        proxy: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        api_url: str = JUPITER_QUOTE_API,
+        cache: Optional[QuoteCache] = None,
+        bucket_digits: int = 0
+    ):
+        """
+        Args:
+            max_concurrency: 同时在途的请求数上限
+            max_connections: 连接池大小（keep-alive 连接复用，避免每次 TLS 握手）
+            timeout: 单个请求超时（秒）
+            slippage_bps: 默认滑点容忍度
+            proxy: 代理地址
+            client: 外部传入的 httpx.AsyncClient（此时 close() 不会关闭它）
+            api_url: 报价接口地址
+            cache: 报价缓存（None 表示每次都回源，仅合并并发的相同请求）
+            bucket_digits: 缓存键中数量保留的有效数字位数（0 表示按精确数量缓存；分桶命中时返回的是桶内其他数量的报价）
+        """
+        self.api_url = api_url
+        self.slippage_bps = slippage_bps
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=timeout,
+            proxy=proxy,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"Accept": "application/json"}
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[QuoteKey, "asyncio.Task[Quote]"] = {}
+        self.cache = cache
+        self.bucket_digits = bucket_digits
+        self.stats = {"requests": 0, "deduplicated": 0, "errors": 0}
+
+    async def __aenter__(self) -> "JupiterQuoteClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+    # ==================== 单个报价 ====================
+    async def quote(
+        self,
+        input_token: Token,
+        output_token: Token,
+        amount: float,
+        slippage_bps: Optional[int] = None
+    ) -> Quote:
+        """
+        获取一次兑换报价
+
+        Args:
+            input_token: 卖出的代币
+            output_token: 买入的代币
+            amount: 卖出数量（人类可读，如 1.5）
+            slippage_bps: 滑点容忍度（默认使用客户端配置）
+
+        Returns:
+            Quote
+
+        Raises:
+            QuoteError: 数量无效、请求失败或返回格式错误
+        """
+        slippage_bps = self.slippage_bps if slippage_bps is None else slippage_bps
+        amount_raw = int(amount * 10 ** input_token.decimals)
+        if amount_raw <= 0:
+            raise QuoteError("数量必须大于0")
+
+        if self.cache is not None:
+            return await self.cache.get_async(
+                quote_key(input_token.mint, output_token.mint, amount_raw, slippage_bps, self.bucket_digits),
+                lambda: self._fetch(input_token, output_token, amount_raw, slippage_bps)
+            )
+
+        key = (input_token.mint, output_token.mint, amount_raw, slippage_bps)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(input_token, output_token, amount_raw, slippage_bps))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["deduplicated"] += 1
+
+        # shield: 一个调用方被取消时不影响等待同一请求的其他调用方
+        return await asyncio.shield(task)
+
+    async def _fetch(self, input_token: Token, output_token: Token, amount_raw: int, slippage_bps: int) -> Quote:
+        params = {
+            "inputMint": input_token.mint,
+            "outputMint": output_token.mint,
+            "amount": amount_raw,
+            "slippageBps": slippage_bps
+        }
+
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            try:
+                response = await self._client.get(self.api_url, params=params)
+                response.raise_for_status()
+                data = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                self.stats["errors"] += 1
+                raise QuoteError(f"网络请求失败: {e}") from e
+
+        return parse_quote(data, input_token, output_token, slippage_bps)
+
+    async def quote_many(
+        self,
+        requests: Iterable[Tuple[Token, Token, float]]
+    ) -> List[Union[Quote, QuoteError]]:
+        """
+        并发获取多个报价，结果顺序与请求一致，失败的位置为 QuoteError
+        """
+        return await asyncio.gather(
+            *(self.quote(i, o, amount) for i, o, amount in requests), return_exceptions=True
+        )
+
+    # ==================== 滑点曲线 ====================
+    async def slippage_curve(
+        self,
+        token: Token,
+        notionals: Sequence[float],
+        quote_token: Optional[Token] = None
+    ) -> SlippageCurve:
+        """
+        单个代币的买卖滑点曲线
+
+        先用最小名义金额的买卖报价求参考中间价，再并发获取其余金额；
+        卖出方向按中间价把名义金额换算成代币数量
+
+        Args:
+            token: 目标代币
+            notionals: 名义金额列表（计价代币，如 [100, 1000, 10000]）
+            quote_token: 计价代币（默认取自代币注册表）
+
+        Returns:
+            SlippageCurve（mid_price 无法求得时 points 为空）
+        """
+        if quote_token is None:
+            quote_token = get_registry().quote
+        notionals = sorted(set(n for n in notionals if n > 0))
+        errors: List[str] = []
+        if not notionals:
+            return SlippageCurve(token, quote_token, float("nan"), [], ["没有有效的名义金额"])
+
+        smallest = notionals[0]
+        buy_ref = await self._safe_quote(quote_token, token, smallest, errors)
+        if buy_ref is None:
+            return SlippageCurve(token, quote_token, float("nan"), [], errors)
+
+        buy_price = buy_ref.unit_price(quote_token)
+        if not math.isfinite(buy_price) or buy_price <= 0:
+            # 例如 outAmount 为 0：无法换算卖出数量，也没有参考价
+            errors.append(f"{quote_token.symbol}->{token.symbol} {smallest:g}: 参考报价无效 (单价 {buy_price})")
+            return SlippageCurve(token, quote_token, float("nan"), [], errors)
+
+        sell_ref = await self._safe_quote(token, quote_token, smallest / buy_price, errors)
+        sell_price = sell_ref.unit_price(quote_token) if sell_ref is not None else float("nan")
+        if sell_ref is not None and not (math.isfinite(sell_price) and sell_price > 0):
+            errors.append(f"{token.symbol}->{quote_token.symbol} {smallest / buy_price:g}: 参考报价无效 (单价 {sell_price})")
+            sell_ref = None
+        mid = (buy_price + sell_price) / 2 if sell_ref is not None else buy_price
+
+        rest = notionals[1:]
+        jobs = [(quote_token, token, n) for n in rest] + [(token, quote_token, n / mid) for n in rest]
+        results = await self.quote_many(jobs)
+
+        quotes = [buy_ref] + ([sell_ref] if sell_ref is not None else [])
+        for (i, o, amount), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                errors.append(f"{i.symbol}->{o.symbol} {amount:g}: {result}")
+            else:
+                quotes.append(result)
+
+        points = [self._curve_point(q, quote_token, mid) for q in quotes]
+        points.sort(key=lambda p: (p.side, p.notional))
+        return SlippageCurve(token, quote_token, mid, points, errors)
+
+    async def slippage_curves(
+        self,
+        tokens: Iterable[Token],
+        notionals: Sequence[float],
+        quote_token: Optional[Token] = None
+    ) -> Dict[str, SlippageCurve]:
+        """
+        并发获取多个代币的滑点曲线
+
+        Returns:
+            {代币符号: SlippageCurve}
+        """
+        tokens = list(tokens)
+        curves = await asyncio.gather(*(self.slippage_curve(t, notionals, quote_token) for t in tokens))
+        return {t.symbol: c for t, c in zip(tokens, curves)}
+
+    async def _safe_quote(self, input_token: Token, output_token: Token, amount: float, errors: List[str]) -> Optional[Quote]:
+        try:
+            return await self.quote(input_token, output_token, amount)
+        except QuoteError as e:
+            errors.append(f"{input_token.symbol}->{output_token.symbol} {amount:g}: {e}")
+            return None
+
+    @staticmethod
+    def _curve_point(quote: Quote, quote_token: Token, mid: float) -> CurvePoint:
+        price = quote.unit_price(quote_token)
+        if quote.input_token == quote_token:
+            side, notional, slippage = "buy", quote.in_amount, (price - mid) / mid * 100
+        else:
+            side, notional, slippage = "sell", quote.out_amount, (mid - price) / mid * 100
+        return CurvePoint(side, notional, price, slippage, quote.price_impact_pct, quote.route)
+
+
+def parse_quote(data: dict, input_token: Token, output_token: Token, slippage_bps: int) -> Quote:
+    """
+    解析 Jupiter 报价接口的返回
+
+    Raises:
+        QuoteError: 返回格式错误
+    """
+    if "outAmount" not in data or "inAmount" not in data:
+        raise QuoteError("API返回格式错误")
+
+    route = [
+        step["swapInfo"].get("label", "Unknown")
+        for step in data.get("routePlan", ())
+        if "swapInfo" in step
+    ]
+    try:
+        impact = float(data.get("priceImpactPct") or 0) * 100
+    except (TypeError, ValueError):
+        impact = float("nan")
+
+    return Quote(
+        input_token,
+        output_token,
+        int(data["inAmount"]) / 10 ** input_token.decimals,
+        int(data["outAmount"]) / 10 ** output_token.decimals,
+        impact,
+        " -> ".join(route) if route else "Unknown",
+        slippage_bps
+    )
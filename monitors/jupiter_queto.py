@@ -2,92 +2,146 @@
 """
 TSLAx价格计算器 - 交互式CLI工具
 可以输入任意数量的TSLAx，立即计算能换多少USDT
+
+用法:
+    python -m monitors.jupiter_queto                 # 交互式
+    python -m monitors.jupiter_queto 1.5             # 1.5 TSLAx 能换多少 USDT
+    python -m monitors.jupiter_queto 100u            # 100 USDT 能换多少 TSLAx
+    python -m monitors.jupiter_queto --curve 100,1000,10000
+    python -m monitors.jupiter_queto --batch amounts.txt --format csv > table.csv
+    printf "1\nNVDAx 100u\n" | python -m monitors.jupiter_queto   # 管道输入自动进入批量模式
 """
 
+import argparse
+import asyncio
+import csv
+import json
+import os
 import requests
 import sys
-from typing import Optional, Tuple
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, TextIO, Tuple
 
+from .jupiter_client import (
+    JUPITER_QUOTE_API, JupiterQuoteClient, QuoteError, SlippageCurve, Token, parse_quote
+)
+from .quote_cache import QuoteCache, quote_key
+from .tokens import get_registry
 
-TSLAX_MINT = "XsDoVfqeBukxuZHWhdvWHBhgEHjGNst4MLodqsJHzoB"
-USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
-JUPITER_QUOTE_API = "https://lite-api.jup.ag/swap/v1/quote"
 
-TSLAX_DECIMALS = 8
-USDT_DECIMALS = 6
+# 代币信息来自代币注册表 (monitors/tokens.json)，第一次用到时才加载，
+# 注册表缺失或格式错误时 --help 等不需要代币的功能不受影响
+def tslax_token() -> Token:
+    return get_registry().token("TSLAx")
 
 
-def calculate_tslax_to_usdt(tslax_amount: float) -> Optional[Tuple[float, dict]]:
+def usdt_token() -> Token:
+    return get_registry().quote
+
+
+_TOKEN_CONSTANTS = {
+    "TSLAX": tslax_token,
+    "USDT": usdt_token,
+    "TSLAX_MINT": lambda: tslax_token().mint,
+    "USDT_MINT": lambda: usdt_token().mint,
+    "TSLAX_DECIMALS": lambda: tslax_token().decimals,
+    "USDT_DECIMALS": lambda: usdt_token().decimals,
+}
+
+
+def __getattr__(name: str):
+    """兼容原来的模块常量（TSLAX_MINT 等），访问时才查代币注册表"""
+    if name in _TOKEN_CONSTANTS:
+        return _TOKEN_CONSTANTS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 共享会话：连续查询复用同一个 keep-alive 连接，不必每次重新握手
+_session = requests.Session()
+_session.headers.update({'Accept': 'application/json'})
+
+# 报价缓存：相同参数在 TTL 内直接复用，过期后先返回旧值再后台刷新
+QUOTE_CACHE_BUCKET_DIGITS = int(os.environ.get("JUPITER_CACHE_BUCKET_DIGITS", "0"))
+quote_cache = QuoteCache(
+    ttl=float(os.environ.get("JUPITER_CACHE_TTL", "2")),
+    stale_ttl=float(os.environ.get("JUPITER_CACHE_STALE", "10")),
+    max_size=int(os.environ.get("JUPITER_CACHE_SIZE", "1024"))
+)
+
+
+def _fetch_quote(input_token: Token, output_token: Token, amount: float, slippage_bps: int = 50) -> Optional[dict]:
     """
-    计算指定数量的TSLAx能换多少USDT
-    
-    Args:
-        tslax_amount: TSLAx数量（人类可读，如 1.5）
-    
+    同步获取一次报价并整理成 details 字典
+
     Returns:
-        (usdt_amount, details) 或 None
+        {'in_amount', 'out_amount', 'unit_price', 'price_impact', 'route'} 或 None
     """
     try:
         # 转换为最小单位
-        amount_raw = int(tslax_amount * (10 ** TSLAX_DECIMALS))
-        
+        amount_raw = int(amount * (10 ** input_token.decimals))
+
         if amount_raw <= 0:
             print("❌ 数量必须大于0")
             return None
-        
-        # 调用API
-        params = {
-            'inputMint': TSLAX_MINT,
-            'outputMint': USDT_MINT,
-            'amount': amount_raw,
-            'slippageBps': 50
-        }
-        
-        response = requests.get(JUPITER_QUOTE_API, params=params, timeout=10)
-        response.raise_for_status()
-        
-        quote = response.json()
-        
-        if 'outAmount' not in quote:
-            print("❌ API返回格式错误")
-            return None
-        
-        # 解析结果
-        in_amount = int(quote['inAmount'])
-        out_amount = int(quote['outAmount'])
-        
-        # 转换为人类可读
-        actual_tslax = in_amount / (10 ** TSLAX_DECIMALS)
-        actual_usdt = out_amount / (10 ** USDT_DECIMALS)
-        
-        # 计算单价
-        unit_price = actual_usdt / actual_tslax if actual_tslax > 0 else 0
-        
-        # 提取路由
-        route = []
-        if 'routePlan' in quote:
-            for step in quote['routePlan']:
-                if 'swapInfo' in step:
-                    route.append(step['swapInfo'].get('label', 'Unknown'))
-        
-        details = {
-            'actual_tslax': actual_tslax,
-            'actual_usdt': actual_usdt,
-            'unit_price': unit_price,
-            'price_impact': quote.get('priceImpactPct', 'N/A'),
-            'route': ' -> '.join(route) if route else 'Unknown'
+
+        def fetch():
+            params = {
+                'inputMint': input_token.mint,
+                'outputMint': output_token.mint,
+                'amount': amount_raw,
+                'slippageBps': slippage_bps
+            }
+
+            response = _session.get(JUPITER_QUOTE_API, params=params, timeout=10)
+            response.raise_for_status()
+
+            return parse_quote(response.json(), input_token, output_token, slippage_bps)
+
+        key = quote_key(input_token.mint, output_token.mint, amount_raw, slippage_bps, QUOTE_CACHE_BUCKET_DIGITS)
+        quote = quote_cache.get(key, fetch)
+
+        return {
+            'in_amount': quote.in_amount,
+            'out_amount': quote.out_amount,
+            'unit_price': quote.unit_price(),
+            'price_impact': f"{quote.price_impact_pct:.4f}%",
+            'route': quote.route
         }
-        
-        return actual_usdt, details
-        
+
     except requests.exceptions.RequestException as e:
         print(f"❌ 网络请求失败: {e}")
         return None
+    except QuoteError as e:
+        print(f"❌ {e}")
+        return None
     except Exception as e:
         print(f"❌ 计算失败: {e}")
         return None
 
 
+def calculate_tslax_to_usdt(tslax_amount: float) -> Optional[Tuple[float, dict]]:
+    """
+    计算指定数量的TSLAx能换多少USDT
+    
+    Args:
+        tslax_amount: TSLAx数量（人类可读，如 1.5）
+    
+    Returns:
+        (usdt_amount, details) 或 None
+    """
+    quote = _fetch_quote(tslax_token(), usdt_token(), tslax_amount)
+    if quote is None:
+        return None
+
+    details = {
+        'actual_tslax': quote['in_amount'],
+        'actual_usdt': quote['out_amount'],
+        'unit_price': quote['unit_price'],
+        'price_impact': quote['price_impact'],
+        'route': quote['route']
+    }
+    return details['actual_usdt'], details
+
+
 def calculate_usdt_to_tslax(usdt_amount: float) -> Optional[Tuple[float, dict]]:
     """
     计算指定数量的USDT能换多少TSLAx
@@ -98,66 +152,60 @@ def calculate_usdt_to_tslax(usdt_amount: float) -> Optional[Tuple[float, dict]]:
     Returns:
         (tslax_amount, details) 或 None
     """
-    try:
-        # 转换为最小单位
-        amount_raw = int(usdt_amount * (10 ** USDT_DECIMALS))
-        
-        if amount_raw <= 0:
-            print("❌ 数量必须大于0")
-            return None
-        
-        # 调用API（反向查询）
-        params = {
-            'inputMint': USDT_MINT,
-            'outputMint': TSLAX_MINT,
-            'amount': amount_raw,
-            'slippageBps': 50
-        }
-        
-        response = requests.get(JUPITER_QUOTE_API, params=params, timeout=10)
-        response.raise_for_status()
-        
-        quote = response.json()
-        
-        if 'outAmount' not in quote:
-            print("❌ API返回格式错误")
-            return None
-        
-        # 解析结果
-        in_amount = int(quote['inAmount'])
-        out_amount = int(quote['outAmount'])
-        
-        # 转换为人类可读
-        actual_usdt = in_amount / (10 ** USDT_DECIMALS)
-        actual_tslax = out_amount / (10 ** TSLAX_DECIMALS)
-        
-        # 计算单价
-        unit_price = actual_usdt / actual_tslax if actual_tslax > 0 else 0
-        
-        # 提取路由
-        route = []
-        if 'routePlan' in quote:
-            for step in quote['routePlan']:
-                if 'swapInfo' in step:
-                    route.append(step['swapInfo'].get('label', 'Unknown'))
-        
-        details = {
-            'actual_usdt': actual_usdt,
-            'actual_tslax': actual_tslax,
-            'unit_price': unit_price,
-            'price_impact': quote.get('priceImpactPct', 'N/A'),
-            'route': ' -> '.join(route) if route else 'Unknown'
-        }
-        
-        return actual_tslax, details
-        
-    except requests.exceptions.RequestException as e:
-        print(f"❌ 网络请求失败: {e}")
-        return None
-    except Exception as e:
-        print(f"❌ 计算失败: {e}")
+    quote = _fetch_quote(usdt_token(), tslax_token(), usdt_amount)
+    if quote is None:
         return None
 
+    details = {
+        'actual_usdt': quote['in_amount'],
+        'actual_tslax': quote['out_amount'],
+        'unit_price': quote['unit_price'],
+        'price_impact': quote['price_impact'],
+        'route': quote['route']
+    }
+    return details['actual_tslax'], details
+
+
+def fetch_slippage_curves(
+    tokens: Iterable[Token],
+    notionals: Sequence[float],
+    max_concurrency: int = 8
+) -> Dict[str, SlippageCurve]:
+    """
+    并发获取多个代币在多个名义金额下的买卖报价，返回每个代币的滑点曲线
+
+    Args:
+        tokens: 代币列表（如 [tslax_token()]）
+        notionals: 名义金额列表（USDT，如 [100, 1000, 10000]）
+        max_concurrency: 同时在途的请求数上限
+
+    Returns:
+        {代币符号: SlippageCurve}
+    """
+    async def run():
+        async with JupiterQuoteClient(
+            max_concurrency=max_concurrency, cache=quote_cache, bucket_digits=QUOTE_CACHE_BUCKET_DIGITS
+        ) as client:
+            return await client.slippage_curves(tokens, notionals)
+
+    return asyncio.run(run())
+
+
+def print_slippage_curve(curve: SlippageCurve):
+    """打印滑点曲线"""
+    print("=" * 70)
+    print(f"📈 {curve.token.symbol} 滑点曲线（参考中间价 ${curve.mid_price:.4f}）")
+    print("=" * 70)
+    print(f"{'方向':<6}{'名义金额':>14}{'成交均价':>14}{'滑点':>10}{'价格影响':>12}")
+    for point in curve.points:
+        side = "买入" if point.side == "buy" else "卖出"
+        print(
+            f"{side:<6}{point.notional:>14,.2f}{point.unit_price:>14.4f}"
+            f"{point.slippage_pct:>9.3f}%{point.price_impact_pct:>11.4f}%"
+        )
+    for error in curve.errors:
+        print(f"❌ {error}")
+
 
 def interactive_mode():
     """交互式模式"""
@@ -261,15 +309,208 @@ def cli_mode(amount_str: str):
         sys.exit(1)
 
 
+# ==================== 批量模式 ====================
+class BatchItem(NamedTuple):
+    """批量输入中的一行"""
+    line_no: int
+    token: str      # 代币符号（注册表中的名字，如 TSLAx）
+    amount: float
+    side: str       # "sell": 代币 -> USDT；"buy": USDT -> 代币（数量带 u 后缀）
+
+
+BATCH_FIELDS = [
+    "line", "token", "side", "in_symbol", "in_amount", "out_symbol", "out_amount",
+    "unit_price", "price_impact_pct", "route", "latency_ms", "error"
+]
+
+
+def parse_batch_line(line: str, line_no: int, default_token: str) -> Optional[BatchItem]:
+    """
+    解析一行批量输入: "[代币] 数量[u]"，代币与数量之间可用空格或逗号分隔
+
+    例如 "1"、"100u"、"NVDAx 2.5"、"NVDAx,500u"；空行和 # 开头的行返回 None
+
+    Raises:
+        ValueError: 格式错误
+    """
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+
+    parts = line.replace(",", " ").split()
+    if len(parts) == 1:
+        token, amount = default_token, parts[0]
+    elif len(parts) == 2:
+        token, amount = parts
+    else:
+        raise ValueError(f"第{line_no}行格式错误: {line}")
+
+    side = "buy" if amount.lower().endswith("u") else "sell"
+    try:
+        value = float(amount[:-1] if side == "buy" else amount)
+    except ValueError:
+        raise ValueError(f"第{line_no}行无效的数量: {amount}") from None
+    return BatchItem(line_no, token, value, side)
+
+
+def read_batch(source: TextIO, default_token: str) -> Tuple[List[BatchItem], List[str]]:
+    """读取全部批量输入，返回 (有效行, 错误信息)"""
+    items, errors = [], []
+    for line_no, line in enumerate(source, 1):
+        try:
+            item = parse_batch_line(line, line_no, default_token)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        if item is not None:
+            items.append(item)
+    return items, errors
+
+
+async def run_batch(
+    items: List[BatchItem],
+    emit,
+    max_concurrency: int = 8
+) -> Dict[str, float]:
+    """
+    并发执行批量报价，每完成一个就调用 emit(record)
+
+    Args:
+        items: 批量输入
+        emit: 接收结果字典（字段见 BATCH_FIELDS）的回调
+        max_concurrency: 同时在途的请求数上限
+
+    Returns:
+        汇总: {'total', 'ok', 'errors', 'elapsed', 'requests'}
+    """
+    registry = get_registry()
+    usdt = registry.quote
+    symbols = list(dict.fromkeys(item.token for item in items))
+    known = [s for s in symbols if registry.entry(s) is not None]
+    tokens = {s: t for s, t in zip(known, registry.tokens(known))} if known else {}
+
+    started = time.perf_counter()
+    summary = {"total": len(items), "ok": 0, "errors": 0}
+
+    async with JupiterQuoteClient(
+        max_concurrency=max_concurrency, cache=quote_cache, bucket_digits=QUOTE_CACHE_BUCKET_DIGITS
+    ) as client:
+
+        async def run_one(item: BatchItem) -> dict:
+            record = dict.fromkeys(BATCH_FIELDS, "")
+            record.update(line=item.line_no, token=item.token, side=item.side)
+            t0 = time.perf_counter()
+            try:
+                token = tokens.get(item.token)
+                if token is None:
+                    raise QuoteError(f"代币注册表中没有 {item.token}")
+                pair = (token, usdt) if item.side == "sell" else (usdt, token)
+                quote = await client.quote(pair[0], pair[1], item.amount)
+                record.update(
+                    in_symbol=quote.input_token.symbol,
+                    in_amount=quote.in_amount,
+                    out_symbol=quote.output_token.symbol,
+                    out_amount=quote.out_amount,
+                    unit_price=round(quote.unit_price(usdt), 6),
+                    price_impact_pct=round(quote.price_impact_pct, 6),
+                    route=quote.route
+                )
+            except (QuoteError, ValueError) as e:
+                record["error"] = str(e)
+            record["latency_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            return record
+
+        for future in asyncio.as_completed([run_one(item) for item in items]):
+            record = await future
+            summary["errors" if record["error"] else "ok"] += 1
+            emit(record)
+
+        summary["requests"] = client.stats["requests"]
+
+    summary["elapsed"] = time.perf_counter() - started
+    return summary
+
+
+def batch_mode(source: TextIO, fmt: str = "jsonl", max_concurrency: int = 8, default_token: str = "TSLAx"):
+    """
+    批量 / 管道模式：结果按完成顺序逐行写到 stdout（JSON Lines 或 CSV），汇总写到 stderr
+    """
+    items, errors = read_batch(source, default_token)
+    for error in errors:
+        print(f"❌ {error}", file=sys.stderr)
+    if not items:
+        print("❌ 没有有效的输入", file=sys.stderr)
+        sys.exit(1)
+
+    out = sys.stdout
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=BATCH_FIELDS)
+        writer.writeheader()
+
+        def emit(record: dict):
+            writer.writerow(record)
+            out.flush()
+    else:
+        def emit(record: dict):
+            out.write(json.dumps({k: v for k, v in record.items() if v != ""}, ensure_ascii=False) + "\n")
+            out.flush()
+
+    summary = asyncio.run(run_batch(items, emit, max_concurrency))
+
+    elapsed = summary["elapsed"]
+    print(
+        f"✅ 完成 {summary['total']} 条（成功 {summary['ok']}，失败 {summary['errors']}），"
+        f"用时 {elapsed:.2f}秒，{summary['total'] / elapsed if elapsed else 0:.1f} 条/秒，"
+        f"实际请求 {summary['requests']} 次，缓存命中率 {quote_cache.hit_ratio:.0%}",
+        file=sys.stderr
+    )
+    if summary["errors"]:
+        sys.exit(2)
+
+
 def main():
     """主函数"""
-    if len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description="TSLAx价格计算器（Jupiter 报价）")
+    parser.add_argument("amount", nargs="?", help="数量，如 1.5（TSLAx -> USDT）或 100u（USDT -> TSLAx）")
+    parser.add_argument("--curve", metavar="AMOUNTS", help="滑点曲线模式，名义金额列表，如 100,1000,10000")
+    parser.add_argument("--batch", metavar="FILE", help="批量模式，从文件（- 表示 stdin）读取 \"[代币] 数量[u]\"，每行一条")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl", help="批量模式的输出格式")
+    parser.add_argument("--concurrency", type=int, default=8, help="批量模式同时在途的请求数")
+    parser.add_argument("--token", default="TSLAx", help="批量输入行未写代币时使用的代币")
+    args = parser.parse_args()
+
+    try:
+        get_registry()
+    except (OSError, ValueError) as e:
+        print(f"❌ 无法加载代币注册表: {e}")
+        sys.exit(1)
+
+    if args.curve:
+        # 滑点曲线模式: --curve 100,1000,10000
+        try:
+            notionals = [float(x) for x in args.curve.split(',') if x.strip()]
+        except ValueError:
+            print(f"❌ 无效的金额列表: {args.curve}")
+            sys.exit(1)
+        for curve in fetch_slippage_curves([tslax_token()], notionals).values():
+            print_slippage_curve(curve)
+    elif args.batch:
+        # 批量模式
+        if args.batch == "-":
+            batch_mode(sys.stdin, args.format, args.concurrency, args.token)
+        else:
+            with open(args.batch, "r", encoding="utf-8") as f:
+                batch_mode(f, args.format, args.concurrency, args.token)
+    elif args.amount:
         # 命令行模式
-        cli_mode(sys.argv[1])
+        cli_mode(args.amount)
+    elif not sys.stdin.isatty():
+        # 管道输入
+        batch_mode(sys.stdin, args.format, args.concurrency, args.token)
     else:
         # 交互式模式
         interactive_mode()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,295 @@
+"""
+监控日志
+按类别 (tick / spread / alert / connector) 输出日志，写日志的线程只把记录放进队列，
+由后台线程批量写 stdout，行情路径不会阻塞在 I/O 上
+
+- tick / spread: 高频调试行，按 key 采样（同一 key 在采样间隔内只输出一次）
+- alert / connector: 结构化记录，带 fields 时输出为一行 JSON
+
+类别配置格式 (LOG_CATEGORIES): "tick=DEBUG/10,spread=DEBUG/30,alert=INFO,connector=INFO"
+即 类别=级别[/采样间隔秒]
+"""
+
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, TextIO, Tuple
+
+ROOT_LOGGER = "monitors"
+
+DEFAULT_CATEGORIES = "tick=DEBUG/10,spread=DEBUG/30,alert=INFO,connector=INFO"
+
+
+class CategoryLogger:
+    """
+    某一类别的日志器
+
+    sampled(key) 先检查级别再检查采样间隔，返回 False 时调用方应直接跳过格式化；
+    被采样丢弃的行数计入 suppressed
+    """
+
+    def __init__(self, category: str):
+        self.category = category
+        self.logger = logging.getLogger(f"{ROOT_LOGGER}.{category}")
+        self.sample_interval = 0.0
+        self.suppressed = 0
+        self._last_emit: Dict[Hashable, float] = {}
+
+    def configure(self, level: int, sample_interval: float = 0.0):
+        self.logger.setLevel(level)
+        self.sample_interval = sample_interval
+        self._last_emit.clear()
+
+    def sampled(self, key: Hashable, level: int = logging.DEBUG, now: Optional[float] = None) -> bool:
+        """
+        判断这一行是否应该输出
+
+        Args:
+            key: 采样键（例如 (交易所, 币对, 价格类型)）
+            level: 这一行的日志级别
+            now: 当前时间 (time.monotonic)，默认取当前值
+
+        Returns:
+            是否输出
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        if self.sample_interval <= 0:
+            return True
+
+        now = time.monotonic() if now is None else now
+        last = self._last_emit.get(key)
+        if last is not None and now - last < self.sample_interval:
+            self.suppressed += 1
+            return False
+
+        self._last_emit[key] = now
+        return True
+
+    def debug(self, msg: str, *args):
+        self.logger.debug(msg, *args)
+
+    def info(self, msg: str, *args):
+        self.logger.info(msg, *args)
+
+    def warning(self, msg: str, *args):
+        self.logger.warning(msg, *args)
+
+    def error(self, msg: str, *args):
+        self.logger.error(msg, *args)
+
+    def event(self, level: int, event: str, msg: str, /, **fields: Any):
+        """
+        输出一条结构化记录
+
+        Args:
+            level: 日志级别
+            event: 事件名（例如 "alert"、"reconnect"）
+            msg: 给人看的消息
+            **fields: 结构化字段
+        """
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, extra={"event": event, "fields": fields})
+
+
+tick_log = CategoryLogger("tick")
+spread_log = CategoryLogger("spread")
+alert_log = CategoryLogger("alert")
+connector_log = CategoryLogger("connector")
+
+CATEGORIES: Dict[str, CategoryLogger] = {
+    c.category: c for c in (tick_log, spread_log, alert_log, connector_log)
+}
+
+
+# ==================== 格式化 ====================
+class MonitorFormatter(logging.Formatter):
+    """
+    普通记录输出消息原文（与原来的 print 一致）；
+    带 fields 的结构化记录或 json_all 时输出一行 JSON
+    """
+
+    def __init__(self, json_all: bool = False):
+        super().__init__()
+        self.json_all = json_all
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        if fields is None and not self.json_all:
+            return record.getMessage()
+
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "category": record.name.rsplit(".", 1)[-1],
+            "event": getattr(record, "event", None),
+            "msg": record.getMessage(),
+        }
+        if fields:
+            payload.update(fields)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+# ==================== 队列与后台写入 ====================
+class DroppingQueueHandler(logging.Handler):
+    """
+    把记录放进有界队列的 Handler，队列满时丢弃并计数（不阻塞调用方）
+
+    只在调用线程里合并 msg 与 args，格式化留给后台线程
+    """
+
+    def __init__(self, log_queue: "queue.Queue[Optional[logging.LogRecord]]"):
+        super().__init__()
+        self.queue = log_queue
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            record.exc_info = None
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+
+class LogWriter:
+    """后台线程：取出队列中所有积压的记录，一次 write + flush 写出"""
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Optional[logging.LogRecord]]",
+        formatter: logging.Formatter,
+        stream: TextIO = sys.stdout
+    ):
+        self.queue = log_queue
+        self.formatter = formatter
+        self.stream = stream
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="LogWriter")
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """写完队列中剩余的记录后停止"""
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = False
+            lines = []
+            for record in batch:
+                if record is None:
+                    stop = True
+                    continue
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception:
+                    pass
+
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    pass
+
+            if stop:
+                return
+
+
+# ==================== 配置 ====================
+def parse_categories(spec: str) -> Dict[str, Tuple[int, float]]:
+    """
+    解析类别配置
+
+    Args:
+        spec: 例如 "tick=DEBUG/10,spread=INFO"
+
+    Returns:
+        {类别: (级别, 采样间隔秒)}
+    """
+    result: Dict[str, Tuple[int, float]] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        level_name, _, interval = value.partition("/")
+        level = logging.getLevelName(level_name.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"未知的日志级别: {level_name}")
+        result[name.strip().lower()] = (level, float(interval) if interval.strip() else 0.0)
+    return result
+
+
+_writer: Optional[LogWriter] = None
+_handler: Optional[DroppingQueueHandler] = None
+
+
+def configure_logging(
+    categories: str = DEFAULT_CATEGORIES,
+    json_all: bool = False,
+    queue_size: int = 10000,
+    stream: TextIO = sys.stdout
+) -> DroppingQueueHandler:
+    """
+    安装队列 Handler 并启动后台写入线程（重复调用会先停掉旧的）
+
+    Args:
+        categories: 类别配置，未列出的类别使用 INFO 且不采样
+        json_all: 是否所有记录都输出为 JSON
+        queue_size: 日志队列容量，满了之后新记录会被丢弃
+        stream: 输出流
+
+    Returns:
+        队列 Handler（dropped 为丢弃的记录数）
+    """
+    global _writer, _handler
+    shutdown_logging()
+
+    parsed = parse_categories(DEFAULT_CATEGORIES)
+    parsed.update(parse_categories(categories))
+    for name, category in CATEGORIES.items():
+        level, interval = parsed.get(name, (logging.INFO, 0.0))
+        category.configure(level, interval)
+
+    log_queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=queue_size)
+    _handler = DroppingQueueHandler(log_queue)
+    _writer = LogWriter(log_queue, MonitorFormatter(json_all), stream)
+    _writer.start()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.addHandler(_handler)
+    root.propagate = False
+    return _handler
+
+
+def shutdown_logging():
+    """移除队列 Handler 并写完剩余日志"""
+    global _writer, _handler
+    if _handler is not None:
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        _handler = None
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
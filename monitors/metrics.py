@@ -0,0 +1,172 @@
+"""
+低开销监控指标
+各阶段延迟直方图、按交易所的行情计数与重连计数，通过本地 Prometheus 文本格式 HTTP 端点暴露
+
+把 enabled 设为 False 后所有埋点都只剩一次布尔判断
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 总开关（price_monitor 按 METRICS_ENABLED 配置）
+enabled = True
+
+PREFIX = "price_monitor_"
+
+# 延迟直方图的桶边界（秒）：50µs ~ 10s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """带标签的计数器"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    带标签的固定桶直方图
+
+    observe() 只做一次 bisect 和两次加法；每个标签的观测通常来自同一线程，
+    偶发的跨线程竞争只会丢失个别计数，不影响统计意义
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # {labels: [各桶计数..., +Inf 计数, sum]}
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series.setdefault(label_values, [0] * (len(self.buckets) + 2))
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_str = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {series[-1]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """抓取时通过回调取值的仪表"""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float]):
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.fn()}"]
+
+
+# ==================== 指标定义 ====================
+STAGE_LATENCY = Histogram(
+    "stage_latency_seconds",
+    "Latency of each tick-to-alert stage "
+    "(recv_to_parse, parse_to_update, update_to_eval, eval_to_sent)",
+    ("stage",)
+)
+TICKS = Counter("ticks_total", "Price updates received", ("exchange", "price_type"))
+RECONNECTS = Counter("ws_reconnects_total", "WebSocket reconnects (after an error or a server-side close)", ("exchange",))
+ALERTS = Counter("alerts_total", "Alerts submitted for delivery", ("level",))
+
+REGISTRY: List = [STAGE_LATENCY, TICKS, RECONNECTS, ALERTS]
+
+
+def register(metric):
+    """注册额外的指标（例如依赖运行时对象的 Gauge）"""
+    REGISTRY.append(metric)
+
+
+def render() -> str:
+    """渲染 Prometheus 文本格式"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# 当前线程最近一帧解析完成的时间，用于 parse -> on_price_update 阶段
+tick_context = threading.local()
+
+
+def mark_parsed(now: Optional[float] = None):
+    tick_context.parsed_at = now if now is not None else time.perf_counter()
+
+
+def parsed_at() -> Optional[float]:
+    return getattr(tick_context, "parsed_at", None)
+
+
+# ==================== HTTP 端点 ====================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """在后台线程中启动 /metrics 端点"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True, name="Metrics")
+    thread.start()
+    return server
@@ -0,0 +1,303 @@
+"""
+本地订单簿与可成交价差
+按 (交易所, 币对, 价格类型) 维护增量订单簿，支持 快照 + 增量 的应用，
+并按给定名义金额 (USDT) 计算吃单均价和 合约买一 vs 现货卖一（及反向）的可成交价差
+
+写入只发生在连接器事件循环线程中（单写者）；读取方先整体拷贝价格列表再遍历，
+不会因并发修改而出错，最多看到相邻两次更新之间的混合状态
+"""
+
+import math
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# 深度档位: (价格, 数量)，价格和数量可以是字符串（交易所原始格式）
+Level = Tuple[float, float]
+
+
+class Fill(NamedTuple):
+    """按名义金额吃单的结果"""
+    avg_price: float     # 成交均价
+    notional: float      # 实际可成交的名义金额（深度不足时小于请求值）
+    complete: bool       # 深度是否足以成交全部名义金额
+
+
+class BookSide:
+    """
+    订单簿的一侧
+
+    sizes 保存 价格 -> 数量，keys 是有序的排序键（买盘取负价格，使两侧都按“从优到劣”升序排列），
+    单档增删为 O(log n) 查找 + 列表内移动，快照应用一次排序完成
+    """
+
+    __slots__ = ("descending", "keys", "sizes")
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.keys: List[float] = []
+        self.sizes: Dict[float, float] = {}
+
+    def replace(self, levels: Iterable[Sequence]):
+        """用快照整体替换"""
+        sizes = {}
+        for price, size in levels:
+            size = float(size)
+            if size > 0:
+                sizes[float(price)] = size
+        sign = -1.0 if self.descending else 1.0
+        self.keys = sorted(sign * p for p in sizes)
+        self.sizes = sizes
+
+    def set(self, price: float, size: float):
+        """设置单档数量，数量为 0 表示删除该档"""
+        sizes = self.sizes
+        key = -price if self.descending else price
+        if size > 0:
+            if price not in sizes:
+                insort(self.keys, key)
+            sizes[price] = size
+        elif price in sizes:
+            del sizes[price]
+            keys = self.keys
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def trim(self, depth: int):
+        """只保留最优的 depth 档"""
+        if len(self.keys) > depth:
+            removed = self.keys[depth:]
+            del self.keys[depth:]
+            sign = -1.0 if self.descending else 1.0
+            for key in removed:
+                self.sizes.pop(sign * key, None)
+
+    def best(self) -> Optional[Level]:
+        """最优一档，空时返回 None"""
+        keys = self.keys
+        if not keys:
+            return None
+        price = -keys[0] if self.descending else keys[0]
+        return price, self.sizes.get(price, 0.0)
+
+    def levels(self, n: Optional[int] = None) -> List[Level]:
+        """从优到劣的前 n 档"""
+        keys = self.keys[:n] if n is not None else self.keys[:]
+        sizes = self.sizes
+        sign = -1.0 if self.descending else 1.0
+        return [(sign * k, sizes.get(sign * k, 0.0)) for k in keys]
+
+    def fill(self, notional: float) -> Optional[Fill]:
+        """
+        按名义金额（计价货币）从最优档开始吃单
+
+        Returns:
+            Fill；这一侧为空时返回 None
+        """
+        keys = self.keys[:]
+        if not keys:
+            return None
+
+        sizes = self.sizes
+        sign = -1.0 if self.descending else 1.0
+        remaining = notional
+        cost = 0.0
+        quantity = 0.0
+
+        for key in keys:
+            price = sign * key
+            level_notional = price * sizes.get(price, 0.0)
+            if level_notional >= remaining:
+                quantity += remaining / price
+                cost += remaining
+                remaining = 0.0
+                break
+            quantity += level_notional / price
+            cost += level_notional
+            remaining -= level_notional
+
+        if quantity <= 0:
+            return None
+        return Fill(cost / quantity, cost, remaining <= 0)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class OrderBook:
+    """单个市场的本地订单簿"""
+
+    __slots__ = ("bids", "asks", "update_id", "timestamp", "received", "depth")
+
+    def __init__(self, depth: int = 50):
+        """
+        Args:
+            depth: 保留的档位数，增量更新后超过 2 倍时裁剪
+        """
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.update_id = 0
+        self.timestamp = 0.0
+        self.received = 0.0  # 最近一次被接受的快照 / 增量的本地接收时间
+        self.depth = depth
+
+    def apply_snapshot(self, bids: Iterable[Sequence], asks: Iterable[Sequence], update_id: int = 0, timestamp: float = 0.0):
+        """应用全量快照"""
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.update_id = update_id
+        self.timestamp = timestamp
+
+    def apply_delta(
+        self,
+        bids: Iterable[Sequence],
+        asks: Iterable[Sequence],
+        update_id: int = 0,
+        timestamp: float = 0.0
+    ) -> bool:
+        """
+        应用增量更新（数量为 0 的档位被删除）
+
+        Returns:
+            False 表示这是重复或乱序的旧更新，已忽略
+        """
+        if update_id and update_id <= self.update_id:
+            return False
+
+        for price, size in bids:
+            self.bids.set(float(price), float(size))
+        for price, size in asks:
+            self.asks.set(float(price), float(size))
+
+        if len(self.bids) > 2 * self.depth:
+            self.bids.trim(self.depth)
+        if len(self.asks) > 2 * self.depth:
+            self.asks.trim(self.depth)
+
+        if update_id:
+            self.update_id = update_id
+        self.timestamp = timestamp
+        return True
+
+
+class ExecutableSpread(NamedTuple):
+    """
+    按名义金额计算的可成交价差
+
+    sell_futures_pct: 卖合约（吃合约买盘）、买现货（吃现货卖盘）的价差 %，为正表示有利可图
+    buy_futures_pct:  买合约（吃合约卖盘）、卖现货（吃现货买盘）的价差 %，为正表示有利可图
+    深度不足或缺少一侧时对应值为 NaN
+    """
+    symbol: str
+    exchange: str
+    notional: float
+    futures_bid: float
+    spot_ask: float
+    sell_futures_pct: float
+    futures_ask: float
+    spot_bid: float
+    buy_futures_pct: float
+    complete: bool       # 四个方向的深度是否都足以成交全部名义金额
+
+    @property
+    def best_pct(self) -> float:
+        """两个方向中较有利的价差 %（都不可用时为 NaN）"""
+        values = [v for v in (self.sell_futures_pct, self.buy_futures_pct) if not math.isnan(v)]
+        return max(values) if values else math.nan
+
+
+class OrderBookStore:
+    """所有市场的本地订单簿"""
+
+    def __init__(self, depth: int = 50):
+        self.depth = depth
+        self.books: Dict[Tuple[str, str, str], OrderBook] = {}
+
+    def book(self, exchange: str, symbol: str, price_type: str) -> OrderBook:
+        key = (exchange, symbol, price_type)
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = OrderBook(self.depth)
+        return book
+
+    def get(self, exchange: str, symbol: str, price_type: str) -> Optional[OrderBook]:
+        return self.books.get((exchange, symbol, price_type))
+
+    def apply(
+        self,
+        exchange: str,
+        symbol: str,
+        price_type: str,
+        bids: Iterable[Sequence],
+        asks: Iterable[Sequence],
+        snapshot: bool,
+        update_id: int = 0,
+        timestamp: float = 0.0,
+        received: Optional[float] = None
+    ) -> bool:
+        """
+        应用一次快照或增量，返回是否被接受
+
+        Args:
+            received: 本地接收时间（默认 time.time()），用于判断订单簿是否过期
+        """
+        book = self.book(exchange, symbol, price_type)
+        if snapshot:
+            book.apply_snapshot(bids, asks, update_id, timestamp)
+        elif not book.apply_delta(bids, asks, update_id, timestamp):
+            return False
+        book.received = time.time() if received is None else received
+        return True
+
+    def executable_spread(
+        self,
+        symbol: str,
+        futures_exchange: str,
+        spot_exchange: str,
+        notional: float,
+        max_age: float = 0,
+        now: Optional[float] = None
+    ) -> Optional[ExecutableSpread]:
+        """
+        计算合约与某交易所现货之间按名义金额的可成交价差
+
+        Args:
+            max_age: 订单簿最大允许年龄（秒，按本地接收时间）；0 表示不检查
+            now: 判断过期所用的当前时间（默认 time.time()）
+
+        Returns:
+            ExecutableSpread；任一侧订单簿尚未收到或已过期（例如连接断开后不再更新）时返回 None
+        """
+        futures = self.get(futures_exchange, symbol, "futures")
+        spot = self.get(spot_exchange, symbol, "spot")
+        if futures is None or spot is None:
+            return None
+        if max_age > 0:
+            oldest = (time.time() if now is None else now) - max_age
+            if futures.received < oldest or spot.received < oldest:
+                return None
+
+        futures_bid = futures.bids.fill(notional)
+        futures_ask = futures.asks.fill(notional)
+        spot_bid = spot.bids.fill(notional)
+        spot_ask = spot.asks.fill(notional)
+
+        def pct(sell: Optional[Fill], buy: Optional[Fill]) -> float:
+            if sell is None or buy is None:
+                return math.nan
+            return (sell.avg_price - buy.avg_price) / buy.avg_price * 100
+
+        fills = (futures_bid, futures_ask, spot_bid, spot_ask)
+        return ExecutableSpread(
+            symbol,
+            spot_exchange,
+            notional,
+            futures_bid.avg_price if futures_bid else math.nan,
+            spot_ask.avg_price if spot_ask else math.nan,
+            pct(futures_bid, spot_ask),
+            futures_ask.avg_price if futures_ask else math.nan,
+            spot_bid.avg_price if spot_bid else math.nan,
+            pct(spot_bid, futures_ask),
+            all(f is not None and f.complete for f in fills)
+        )
@@ -0,0 +1,192 @@
+"""
+紧凑价格簿
+按固定的 币对 × 交易所 × 价格类型 索引，把最新价格、时间戳和序号保存在预分配的数组中
+
+每个槽位是连续的四个 double: (price, timestamp, seq, exchange_ts)，
+timestamp 为本地接收时间，exchange_ts 为交易所推送中的时间（未知时为 0）。
+写入用一次 struct.pack_into 完成、读取用一次 struct.unpack_from 完成，二者都是在持有 GIL 的单个 C 调用中执行，
+因此读者总能看到完整的记录，不需要全局锁。
+连接器都运行在同一个事件循环线程中（单写者），序号的 读-改-写 也就无需加锁。
+"""
+
+import math
+import struct
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any
+
+# 价格类型在槽位中的偏移
+PRICE_TYPES = {"spot": 0, "futures": 1}
+
+# 单个槽位的二进制布局 (price, timestamp, seq, exchange_ts)
+RECORD = struct.Struct("=4d")
+RECORD_SIZE = 4
+
+# 槽位内各字段的偏移
+FIELD_PRICE = 0
+FIELD_TIMESTAMP = 1
+FIELD_SEQ = 2
+FIELD_EXCHANGE_TS = 3
+
+
+class Quote(NamedTuple):
+    """单个槽位的一致性快照"""
+    price: float
+    timestamp: float          # 本地接收时间
+    seq: int
+    exchange_ts: float = 0.0  # 交易所时间，未知时为 0
+
+    @property
+    def event_time(self) -> float:
+        """行情发生时间：优先使用交易所时间，未知时退回本地接收时间"""
+        return self.exchange_ts or self.timestamp
+
+
+class PriceBook:
+    """固定索引、数组存储的价格簿"""
+
+    def __init__(self, symbols: List[str], exchanges: List[str]):
+        """
+        Args:
+            symbols: 币对列表 (TSLAX_USDT, ...)，决定行索引
+            exchanges: 交易所列表 (gateio, bybit, ...)，决定列索引
+        """
+        self.symbols = list(symbols)
+        self.exchanges = list(exchanges)
+        self.symbol_index = {s: i for i, s in enumerate(self.symbols)}
+        self.exchange_index = {e: i for i, e in enumerate(self.exchanges)}
+
+        self.row_slots = len(self.exchanges) * len(PRICE_TYPES)
+        num_slots = len(self.symbols) * self.row_slots
+
+        # (symbol, exchange, price_type) -> (槽位, 行号)，热路径只做一次哈希查找
+        self._slots: Dict[Tuple[str, str, str], Tuple[int, int]] = {}
+        for s, symbol in enumerate(self.symbols):
+            for e, exchange in enumerate(self.exchanges):
+                for price_type, p in PRICE_TYPES.items():
+                    self._slots[(symbol, exchange, price_type)] = (s * self.row_slots + e * len(PRICE_TYPES) + p, s)
+
+        self._row = struct.Struct(f"={self.row_slots * RECORD_SIZE}d")
+        self._data = bytearray(RECORD.pack(math.nan, 0.0, 0.0, 0.0) * num_slots)
+        # 按 double 访问的视图（数组大小固定，不会重新分配）
+        self._doubles = memoryview(self._data).cast("d")
+        self._extra: List[Optional[Dict[str, Any]]] = [None] * num_slots
+        self._dirty = bytearray(len(self.symbols))
+
+    # ==================== 写入 ====================
+    def slot(self, symbol: str, exchange: str, price_type: str) -> int:
+        """返回槽位下标，未知的币对/交易所/价格类型返回 -1"""
+        entry = self._slots.get((symbol, exchange, price_type))
+        return entry[0] if entry else -1
+
+    def update(
+        self,
+        exchange: str,
+        symbol: str,
+        price_type: str,
+        price: float,
+        extra_data: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[float] = None,
+        exchange_ts: Optional[float] = None
+    ) -> bool:
+        """
+        写入一笔价格并把该币对标记为待评估
+
+        Args:
+            timestamp: 本地接收时间（默认 time.time()）
+            exchange_ts: 交易所推送中的时间（秒），未知时不传
+
+        Returns:
+            是否写入成功（未登记的币对/交易所会被忽略）
+        """
+        entry = self._slots.get((symbol, exchange, price_type))
+        if entry is None:
+            return False
+        slot, row = entry
+
+        offset = slot * RECORD.size
+        seq = RECORD.unpack_from(self._data, offset)[FIELD_SEQ] + 1
+        RECORD.pack_into(self._data, offset, price, timestamp or time.time(), seq, exchange_ts or 0.0)
+        if extra_data is not None:
+            self._extra[slot] = extra_data
+
+        self._dirty[row] = 1
+        return True
+
+    # ==================== 读取 ====================
+    def read(self, symbol: str, exchange: str, price_type: str) -> Optional[Quote]:
+        """读取单个槽位，尚未收到价格时返回 None"""
+        slot = self.slot(symbol, exchange, price_type)
+        if slot < 0:
+            return None
+
+        price, ts, seq, exchange_ts = RECORD.unpack_from(self._data, slot * RECORD.size)
+        if seq == 0:
+            return None
+        return Quote(price, ts, int(seq), exchange_ts)
+
+    def read_symbol(self, symbol: str) -> Tuple[Dict[str, Quote], Dict[str, Quote]]:
+        """
+        一次性读取某币对在所有交易所的报价
+
+        Returns:
+            (现货报价 {exchange: Quote}, 合约报价 {exchange: Quote})，只包含已收到价格的交易所
+        """
+        spot: Dict[str, Quote] = {}
+        futures: Dict[str, Quote] = {}
+
+        s = self.symbol_index.get(symbol)
+        if s is None:
+            return spot, futures
+
+        row = self._row.unpack_from(self._data, s * self._row.size)
+        new_quote = tuple.__new__  # 跳过 NamedTuple 的 Python 层 __new__
+
+        j = 0
+        for exchange in self.exchanges:
+            # 槽位顺序与 PRICE_TYPES 一致: spot, futures
+            if row[j + 2]:
+                spot[exchange] = new_quote(Quote, (row[j], row[j + 1], int(row[j + 2]), row[j + 3]))
+            if row[j + 6]:
+                futures[exchange] = new_quote(Quote, (row[j + 4], row[j + 5], int(row[j + 6]), row[j + 7]))
+            j += 2 * RECORD_SIZE
+
+        return spot, futures
+
+    def price_key(self, symbol: str) -> bytes:
+        """
+        某币对整行价格（不含时间戳和序号）的字节拷贝
+
+        用于判断一个币对的输入自上次评估以来是否变化；按字节比较，未收到价格的 NaN 槽位也能正确比较
+        """
+        start = self.symbol_index[symbol] * self.row_slots * RECORD_SIZE
+        return self._doubles[start:start + self.row_slots * RECORD_SIZE:RECORD_SIZE].tobytes()
+
+    def extra(self, symbol: str, exchange: str, price_type: str) -> Optional[Dict[str, Any]]:
+        """返回最近一次更新附带的额外数据"""
+        slot = self.slot(symbol, exchange, price_type)
+        return self._extra[slot] if slot >= 0 else None
+
+    def snapshot(self) -> bytes:
+        """
+        整个价格簿的一致性拷贝
+
+        Returns:
+            原生字节序的 double 缓冲区，布局为 [symbol][exchange][price_type][price, timestamp, seq, exchange_ts]
+        """
+        return bytes(self._data)
+
+    # ==================== 脏标记 ====================
+    def take_dirty(self) -> List[str]:
+        """
+        取出并清除待评估的币对
+
+        先清标记再由调用方读价格，因此清除之后到达的更新会重新置位，不会丢失
+        """
+        dirty = self._dirty
+        pending = []
+        i = dirty.find(1)
+        while i >= 0:
+            dirty[i] = 0
+            pending.append(self.symbols[i])
+            i = dirty.find(1, i + 1)
+        return pending
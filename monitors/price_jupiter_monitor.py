@@ -4,14 +4,28 @@ TSLAx实时价格查询脚本
 支持Jupiter Price API和Quote API两种方案
 """
 
+import os
+import sys
 import requests
 from typing import Optional, Dict
 from datetime import datetime
 
+from .cache import TTLCache
+from .tokens import get_registry
 
-# 代币地址
-TSLAX_MINT = "XsDoVfqeBukxuZHWhdvWHBhgEHjGNst4MLodqsJHzoB"
-USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"  # Solana上的USDT
+
+# 代币地址来自代币注册表 (monitors/tokens.json)，第一次用到时才加载
+_MINT_CONSTANTS = {
+    "TSLAX_MINT": lambda: get_registry().mint("TSLAx"),
+    "USDT_MINT": lambda: get_registry().quote.mint,  # Solana上的USDT
+}
+
+
+def __getattr__(name: str):
+    """兼容原来的模块常量（TSLAX_MINT、USDT_MINT），访问时才查代币注册表"""
+    if name in _MINT_CONSTANTS:
+        return _MINT_CONSTANTS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # API端点
 JUPITER_PRICE_API = "https://lite-api.jup.ag/price/v3"
@@ -20,7 +34,16 @@ JUPITER_PRICE_API = "https://lite-api.jup.ag/price/v3"
 class JupiterPriceChecker:
     """Jupiter价格查询器"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[TTLCache] = None):
+        """
+        Args:
+            cache: 价格缓存（默认按 JUPITER_CACHE_TTL / JUPITER_CACHE_STALE / JUPITER_CACHE_SIZE 创建）
+        """
+        self.cache = cache or TTLCache(
+            ttl=float(os.environ.get("JUPITER_CACHE_TTL", "2")),
+            stale_ttl=float(os.environ.get("JUPITER_CACHE_STALE", "10")),
+            max_size=int(os.environ.get("JUPITER_CACHE_SIZE", "1024"))
+        )
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0',
@@ -39,22 +62,27 @@ class JupiterPriceChecker:
             包含价格信息的字典
         """
         try:
-            params = {
-                'ids': token_mint,
-                'vsToken': vs_token
-            }
-            
-            response = self.session.get(JUPITER_PRICE_API, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
+            def fetch():
+                params = {
+                    'ids': token_mint,
+                    'vsToken': vs_token
+                }
+
+                response = self.session.get(JUPITER_PRICE_API, params=params, timeout=10)
+                response.raise_for_status()
+
+                return response.json()
+
+            # 缓存键与报价一致: (输入 mint, 输出, 数量桶, 滑点)，价格查询没有数量和滑点
+            data = self.cache.get((token_mint, vs_token, 0, 0), fetch)
+
             price_data = data[token_mint]
             stock_data = price_data.get("stockData")
             print("price_data:{}", price_data)
             print("stock_data:{}", stock_data)
+            entry = get_registry().by_mint(token_mint)
             return {
-                'symbol': 'TSLAx',
+                'symbol': entry.symbol if entry else token_mint,
                 'method': 'Price API',
                 'usd_price': price_data.get('usdPrice'),
                 'vs_token': vs_token,
@@ -100,7 +128,12 @@ def print_price_result(result: Optional[Dict], method_name: str):
 def main():
     """主函数"""
     print("🚀 TSLAx实时价格查询工具")
-    print(f"代币地址: {TSLAX_MINT}")
+    try:
+        tslax_mint = get_registry().mint("TSLAx")
+    except (OSError, ValueError) as e:
+        print(f"❌ 无法加载代币注册表: {e}")
+        sys.exit(1)
+    print(f"代币地址: {tslax_mint}")
     print(f"查询时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     checker = JupiterPriceChecker()
@@ -111,7 +144,7 @@ def main():
     print("="*60)
     
     # 先尝试USDT
-    result1_usdt = checker.get_price_v1(TSLAX_MINT, vs_token="USDT")
+    result1_usdt = checker.get_price_v1(tslax_mint, vs_token="USDT")
     print_price_result(result1_usdt, "Price API - USDT")
     
     # 总结
@@ -5,17 +5,26 @@
 🚨 EMERGENCY: 2个或更多交易所超阈值
 """
 
+import asyncio
 import time
 import threading
 import os
+import logging
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import pytz
 from dotenv import load_dotenv
-import requests
 
-from .exchanges.gateio import GateIOConnector
-from .exchanges.bybit import BybitConnector
+from . import metrics
+from .alert_dispatcher import AlertDispatcher
+from .alerting import AlertPolicy
+from .order_book import ExecutableSpread, OrderBookStore
+from .logs import alert_log, configure_logging, shutdown_logging, spread_log, tick_log
+from .price_book import PriceBook
+from .spread import ChangeTracker, SpreadBatch, compute_spreads
+from .tick_log import TickRecorder
+from .exchanges import available_exchanges, get_connector, load_plugins
+from .exchanges.base import ExchangeConnector
 
 # 加载环境变量
 load_dotenv()
@@ -23,7 +32,10 @@ load_dotenv()
 # ==================== 配置 ====================
 # 交易所配置
 EXCHANGES_STR = os.environ.get("EXCHANGES", "gateio")
-ENABLED_EXCHANGES = [e.strip().lower() for e in EXCHANGES_STR.split(",")]
+ENABLED_EXCHANGES = [e.strip().lower() for e in EXCHANGES_STR.split(",") if e.strip()]
+
+# 额外的交易所连接器插件（模块路径，逗号分隔），模块中用 @register_connector 注册连接器
+EXCHANGE_PLUGINS = [m.strip() for m in os.environ.get("EXCHANGE_PLUGINS", "").split(",") if m.strip()]
 
 # 监控币对（所有交易所共享）
 SYMBOLS_STR = os.environ.get("MONITOR_SYMBOLS", "TSLAX_USDT")
@@ -32,7 +44,25 @@ SYMBOLS = [s.strip() for s in SYMBOLS_STR.split(",")]
 # 通用配置
 PRICE_DIFF_THRESHOLD = float(os.environ.get("PRICE_DIFF_THRESHOLD", "0.5"))
 USE_PERCENTAGE = os.environ.get("USE_PERCENTAGE", "True").lower() == "true"
-CHECK_INTERVAL = int(os.environ.get("CHECK_INTERVAL", "1"))
+
+# 兜底全量扫描间隔（秒）：没有新行情时也定期复查；告警冷却 / 静音到期时会提前复查，不受此间隔影响
+FULL_SCAN_INTERVAL = float(os.environ.get("FULL_SCAN_INTERVAL", "30"))
+
+# 报价最大允许年龄（秒）：超过该时间未更新的报价不参与价差评估，0 表示不检查
+QUOTE_MAX_AGE = float(os.environ.get("QUOTE_MAX_AGE", "120"))
+
+# 合约与现货两条腿的行情时间最大允许差值（秒，优先用交易所时间）：超过则该交易所不参与评估，0 表示不检查
+QUOTE_MAX_SKEW = float(os.environ.get("QUOTE_MAX_SKEW", "30"))
+
+# 连接静默超时（秒）：一条 WebSocket 订阅超过该时间没有行情则主动重连，0 表示不检查
+WS_SILENCE_TIMEOUT = float(os.environ.get("WS_SILENCE_TIMEOUT", "60"))
+
+# 订单簿深度配置：开启后额外订阅订单簿，告警中附带按名义金额计算的可成交价差
+DEPTH_ENABLED = os.environ.get("DEPTH_ENABLED", "False").lower() == "true"
+DEPTH_LEVELS = int(os.environ.get("DEPTH_LEVELS", "20"))
+EXECUTABLE_NOTIONAL = float(os.environ.get("EXECUTABLE_NOTIONAL", "1000"))
+# 是否只在可成交价差也超过阈值时才告警
+DEPTH_CONFIRM_ALERTS = os.environ.get("DEPTH_CONFIRM_ALERTS", "False").lower() == "true"
 
 # 分级冷却时间
 WARN_COOLDOWN = int(os.environ.get("WARN_COOLDOWN", "300"))
@@ -42,103 +72,201 @@ EMERGENCY_COOLDOWN = int(os.environ.get("EMERGENCY_COOLDOWN", "180"))
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 ADMIN_CHAT_ID = os.environ.get("ADMIN_CHAT_ID")
 
+# 告警推送配置
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", "100"))
+ALERT_MERGE_WINDOW = float(os.environ.get("ALERT_MERGE_WINDOW", "0.5"))
+ALERT_MAX_RETRIES = int(os.environ.get("ALERT_MAX_RETRIES", "5"))
+
+# 行情录制配置（TICK_RECORD_DIR 为空则不录制）
+TICK_RECORD_DIR = os.environ.get("TICK_RECORD_DIR", "").strip()
+TICK_SEGMENT_MB = int(os.environ.get("TICK_SEGMENT_MB", "64"))
+
+# 日志配置：类别=级别[/采样间隔秒]，tick / spread 为高频调试行，按采样间隔限流
+LOG_CATEGORIES = os.environ.get("LOG_CATEGORIES", "tick=DEBUG/10,spread=DEBUG/30,alert=INFO,connector=INFO")
+LOG_JSON = os.environ.get("LOG_JSON", "False").lower() == "true"
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# 监控指标配置（METRICS_PORT 为 0 则不开 HTTP 端点）
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+
 # ==================== 全局变量 ====================
-# Gate.io 合约价格（唯一来源）
-gateio_futures: Dict[str, float] = {}
-futures_data: Dict[str, Dict[str, Any]] = {}
+# 合约价格唯一来源
+FUTURES_EXCHANGE = "gateio"
 
-# 所有交易所现货价格
-all_spot_prices: Dict[str, Dict[str, float]] = {}  # {exchange: {symbol: price}}
-spot_data: Dict[str, Dict[str, Dict[str, Any]]] = {}  # {exchange: {symbol: {...}}}
+# 价格簿：Gate.io 合约价格 + 所有交易所现货价格，按 币对 × 交易所 固定索引
+# 行情写入即标记该币对待评估（脏标记），同一币对在两次评估之间的多次更新会合并为一次评估
+price_book = PriceBook(SYMBOLS, ENABLED_EXCHANGES)
 
-# 分级冷却时间
-last_alert_times: Dict[str, Dict[str, float]] = {}  # {symbol: {"WARN": ts, "EMERGENCY": ts}}
+# 分级冷却时间与升级规则
+alert_policy = AlertPolicy(SYMBOLS, WARN_COOLDOWN, EMERGENCY_COOLDOWN)
+last_alert_times = alert_policy.last_alert_times  # {symbol: {"WARN": ts, "EMERGENCY": ts}}
 
-# 初始化数据结构
-for exchange in ENABLED_EXCHANGES:
-    all_spot_prices[exchange] = {}
-    spot_data[exchange] = {}
+# 本地订单簿（DEPTH_ENABLED 时由连接器增量维护）
+order_books = OrderBookStore(depth=DEPTH_LEVELS)
 
-for symbol in SYMBOLS:
-    last_alert_times[symbol] = {"WARN": 0, "EMERGENCY": 0}
+# 增量评估：跳过价格未变化且上次无告警的币对
+change_tracker = ChangeTracker(price_book)
 
-lock = threading.Lock()  # 线程锁
+# 有新行情时唤醒监控线程
+dirty_event = threading.Event()
 
+# Telegram 告警推送器（独立线程，检测路径不阻塞在网络 I/O 上）
+alert_dispatcher = AlertDispatcher(
+    BOT_TOKEN,
+    ADMIN_CHAT_ID,
+    queue_size=ALERT_QUEUE_SIZE,
+    merge_window=ALERT_MERGE_WINDOW,
+    max_retries=ALERT_MAX_RETRIES,
+    proxy=os.environ.get("HTTP_PROXY") or os.environ.get("http_proxy")
+)
 
-# ==================== Telegram 推送函数 ====================
-def send_telegram_message(message: str) -> bool:
-    """发送 Telegram 消息"""
-    if not BOT_TOKEN or not ADMIN_CHAT_ID:
-        print("⚠️  未配置 BOT_TOKEN 或 ADMIN_CHAT_ID，无法发送通知")
-        return False
+# 行情录制器（main 中按配置创建）
+tick_recorder: Optional[TickRecorder] = None
 
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+# 延迟埋点开关
+metrics.enabled = METRICS_ENABLED
 
-    # 检查是否需要使用代理
-    proxies = None
-    http_proxy = os.environ.get("HTTP_PROXY") or os.environ.get("http_proxy")
-    if http_proxy:
-        proxies = {
-            "http": http_proxy,
-            "https": http_proxy
-        }
+# 每个币对自上次评估以来第一笔行情的到达时间 (perf_counter)，用于 update -> evaluation 延迟
+update_marks: Dict[str, float] = {}
 
-    try:
-        response = requests.post(
-            url,
-            json={
-                "chat_id": ADMIN_CHAT_ID,
-                "text": message,
-                "parse_mode": "HTML"
-            },
-            proxies=proxies,
-            timeout=10
-        )
 
-        if response.status_code == 200:
-            print("✅ Telegram 消息发送成功")
-            return True
-        else:
-            print(f"❌ Telegram 消息发送失败: {response.status_code}")
-            print(f"   响应内容: {response.text}")
-            return False
-    except Exception as e:
-        print(f"❌ Telegram 消息发送异常: {e}")
+# ==================== Telegram 推送函数 ====================
+def send_telegram_message(message: str, created_at: Optional[float] = None) -> bool:
+    """
+    提交 Telegram 消息到异步推送队列（不阻塞）
+
+    Args:
+        message: 消息内容
+        created_at: 产生该告警的评估开始时间 (time.perf_counter)，用于延迟统计
+
+    Returns:
+        是否已被推送队列接收
+    """
+    if not BOT_TOKEN or not ADMIN_CHAT_ID:
+        alert_log.warning("⚠️  未配置 BOT_TOKEN 或 ADMIN_CHAT_ID，无法发送通知")
         return False
 
+    return alert_dispatcher.submit(message, created_at)
+
 
 # ==================== 价格更新回调 ====================
-def on_price_update(exchange: str, symbol: str, price_type: str, price: float, extra_data: Dict[str, Any]):
+def on_price_update(
+    exchange: str,
+    symbol: str,
+    price_type: str,
+    price: float,
+    extra_data: Dict[str, Any],
+    exchange_ts: Optional[float] = None
+):
     """
     价格更新回调函数
 
     Args:
-        exchange: 交易所名称 (gateio, bybit)
+        exchange: 交易所名称 (gateio, bybit, bitget, ...)
         symbol: 币对 (TSLAX_USDT)
         price_type: 价格类型 (spot, futures)
         price: 价格
         extra_data: 额外数据
+        exchange_ts: 交易所推送中的时间（秒），未知时为 None
     """
-    with lock:
-        if exchange == "gateio" and price_type == "futures":
-            # Gate.io 合约价格
-            gateio_futures[symbol] = price
-            futures_data[symbol] = extra_data
-            print(f"📊 Gate.io 合约 {symbol}: {price}")
-        elif price_type == "spot":
-            # 所有交易所现货价格
-            if exchange in all_spot_prices:
-                all_spot_prices[exchange][symbol] = price
-                spot_data[exchange][symbol] = extra_data
-                print(f"📊 {exchange.upper()} 现货 {symbol}: {price}")
+    if price_type == "futures" and exchange != FUTURES_EXCHANGE:
+        return
+
+    now = time.time()
+    if not price_book.update(exchange, symbol, price_type, price, extra_data, now, exchange_ts):
+        return
+
+    if tick_recorder is not None:
+        tick_recorder.record(exchange, symbol, price_type, price, now)
+
+    if metrics.enabled:
+        received = time.perf_counter()
+        parsed = metrics.parsed_at()
+        if parsed is not None:
+            metrics.STAGE_LATENCY.observe(received - parsed, "parse_to_update")
+        metrics.TICKS.inc(exchange, price_type)
+        update_marks.setdefault(symbol, received)
+
+    if tick_log.sampled((exchange, symbol, price_type)):
+        if price_type == "futures":
+            tick_log.debug("📊 Gate.io 合约 %s: %s", symbol, price)
+        else:
+            tick_log.debug("📊 %s 现货 %s: %s", exchange.upper(), symbol, price)
+
+    # 唤醒监控线程
+    dirty_event.set()
+
+
+def on_depth_update(
+    exchange: str,
+    symbol: str,
+    price_type: str,
+    bids: List[Any],
+    asks: List[Any],
+    snapshot: bool,
+    update_id: int = 0,
+    exchange_ts: float = 0.0
+):
+    """
+    订单簿更新回调函数
+
+    Args:
+        exchange: 交易所名称
+        symbol: 币对
+        price_type: 价格类型 (spot, futures)
+        bids: 买盘档位 [(价格, 数量), ...]，数量为 0 表示删除
+        asks: 卖盘档位
+        snapshot: 是否为全量快照
+        update_id: 交易所的更新序号
+        exchange_ts: 交易所时间（秒）
+    """
+    if price_type == "futures" and exchange != FUTURES_EXCHANGE:
+        return
+
+    if not order_books.apply(exchange, symbol, price_type, bids, asks, snapshot, update_id, exchange_ts):
+        tick_log.debug("📚 %s %s 订单簿忽略过期增量 #%s", exchange.upper(), symbol, update_id)
+
+
+def executable_spreads(symbol: str, exchanges: List[str]) -> List[ExecutableSpread]:
+    """
+    按 EXECUTABLE_NOTIONAL 计算合约与各交易所现货之间的可成交价差
+
+    缺少订单簿、或订单簿超过 QUOTE_MAX_AGE 未更新的交易所被跳过（与盘口报价的过期规则一致），
+    因此过期的订单簿不会确认告警
+    """
+    result = []
+    now = time.time()
+    for exchange in exchanges:
+        spread = order_books.executable_spread(
+            symbol, FUTURES_EXCHANGE, exchange, EXECUTABLE_NOTIONAL, max_age=QUOTE_MAX_AGE, now=now
+        )
+        if spread is not None:
+            result.append(spread)
+    return result
 
 
 # ==================== 分级告警消息生成 ====================
+def format_age(age: Optional[float]) -> str:
+    """报价年龄的显示文本，例如 " (1.2秒前)"；未知时为空"""
+    if age is None or age != age:
+        return ""
+    if age < 60:
+        return f" ({age:.1f}秒前)"
+    return f" ({age / 60:.1f}分钟前)"
+
+
 def generate_alert_message(
     symbol: str,
     futures_price: float,
     exceeded_list: List[Dict[str, Any]],
-    alert_level: str
+    alert_level: str,
+    avg_diff_pct: float,
+    max_diff_pct: float,
+    max_diff_exchange: str,
+    futures_age: Optional[float] = None,
+    executable: Optional[List[ExecutableSpread]] = None
 ) -> str:
     """
     生成分级告警消息
@@ -148,6 +276,11 @@ def generate_alert_message(
         futures_price: Gate.io 合约价格
         exceeded_list: 超阈值的交易所列表
         alert_level: 告警级别 (WARN/EMERGENCY)
+        avg_diff_pct: 超阈值交易所的平均价差百分比
+        max_diff_pct: 最大价差百分比（带符号）
+        max_diff_exchange: 最大价差所在交易所
+        futures_age: 合约报价年龄（秒）
+        executable: 按名义金额计算的可成交价差
 
     Returns:
         格式化的告警消息
@@ -167,44 +300,45 @@ def generate_alert_message(
     message = f"""{level_emoji} <b>{level_text}</b>
 
 <b>币对:</b> {symbol}
-<b>Gate.io 合约:</b> ${futures_price:.2f}
+<b>Gate.io 合约:</b> ${futures_price:.2f}{format_age(futures_age)}
 
 <b>异常交易所 ({len(exceeded_list)}个):</b>
 """
 
     # 添加每个交易所的详情
-    total_diff_pct = 0.0
-    max_diff_pct = 0.0
-    max_diff_exchange = ""
-
     for item in exceeded_list:
         exchange = item["exchange"]
         spot_price = item["spot_price"]
         diff = item["diff"]
         diff_pct = item["diff_pct"]
 
-        total_diff_pct += abs(diff_pct)
-        if abs(diff_pct) > abs(max_diff_pct):
-            max_diff_pct = diff_pct
-            max_diff_exchange = exchange
-
         if USE_PERCENTAGE:
             diff_display = f"{diff_pct:+.2f}%"
         else:
             diff_display = f"{diff:+.4f}"
 
-        message += f"📊 <b>{exchange.upper()}</b> 现货: ${spot_price:.2f}\n"
+        message += f"📊 <b>{exchange.upper()}</b> 现货: ${spot_price:.2f}{format_age(item.get('age'))}\n"
         message += f"   价差: {diff_display}\n\n"
 
     # EMERGENCY 级别显示统计信息
     if alert_level == "EMERGENCY":
-        avg_diff_pct = total_diff_pct / len(exceeded_list)
         message += f"<b>平均价差:</b> {avg_diff_pct:.2f}%\n"
         message += f"<b>最大价差:</b> {abs(max_diff_pct):.2f}% ({max_diff_exchange.upper()})\n\n"
 
+    # 可成交价差（如果开启了订单簿）
+    if executable:
+        message += f"<b>可成交价差 ({executable[0].notional:g} USDT):</b>\n"
+        for spread in executable:
+            note = "" if spread.complete else " (深度不足)"
+            message += (
+                f"• {spread.exchange.upper()}: 卖合约/买现货 {spread.sell_futures_pct:+.2f}% | "
+                f"买合约/卖现货 {spread.buy_futures_pct:+.2f}%{note}\n"
+            )
+        message += "\n"
+
     # 合约详细信息（如果有）
-    if symbol in futures_data:
-        fd = futures_data[symbol]
+    fd = price_book.extra(symbol, FUTURES_EXCHANGE, "futures")
+    if fd:
         message += f"""<b>Gate.io 合约详情:</b>
 • 标记价格: ${fd.get('mark_price', 'N/A')}
 • 指数价格: ${fd.get('index_price', 'N/A')}
@@ -217,9 +351,143 @@ def generate_alert_message(
     return message
 
 
+# ==================== 价差评估 ====================
+def is_executable(executable: List[ExecutableSpread], futures_price: float) -> bool:
+    """是否至少有一个交易所的可成交价差也超过阈值"""
+    threshold_pct = PRICE_DIFF_THRESHOLD if USE_PERCENTAGE else PRICE_DIFF_THRESHOLD / futures_price * 100
+    return any(spread.best_pct >= threshold_pct for spread in executable)
+
+
+def evaluate_symbols(symbols: List[str]):
+    """批量评估币对价差并按需发送分级告警"""
+    eval_started = time.perf_counter()
+
+    # 快速路径：输入未变化的币对结果必然相同，直接跳过
+    symbols = change_tracker.changed(symbols)
+    if not symbols:
+        return
+
+    # 一次性计算所有币对 × 交易所的价差矩阵
+    batch = compute_spreads(
+        price_book, symbols, FUTURES_EXCHANGE, PRICE_DIFF_THRESHOLD, USE_PERCENTAGE,
+        max_age=QUOTE_MAX_AGE, max_skew=QUOTE_MAX_SKEW
+    )
+    change_tracker.record(batch)
+
+    # 显示当前价差
+    for i, symbol in enumerate(batch.symbols):
+        futures_price = float(batch.futures[i])
+
+        for j, exchange in enumerate(batch.exchanges):
+            if not batch.valid[i][j] or not spread_log.sampled((symbol, exchange)):
+                continue
+
+            if USE_PERCENTAGE:
+                diff_display = f"{float(batch.diff_pct[i][j]):+.2f}%"
+            else:
+                diff_display = f"{float(batch.diff[i][j]):+.4f}"
+
+            spread_log.debug(
+                "💹 %s | Gate合约: %.2f vs %s现货: %.2f = %s",
+                symbol, futures_price, exchange.upper(), float(batch.spot[i][j]), diff_display
+            )
+
+    # 按冷却/升级规则决定需要发送的告警
+    current_time = time.time()
+
+    for decision in alert_policy.decide(batch, current_time):
+        executable = None
+        if DEPTH_ENABLED:
+            executable = executable_spreads(decision.symbol, [item["exchange"] for item in decision.exceeded])
+            if DEPTH_CONFIRM_ALERTS and not is_executable(executable, decision.futures_price):
+                spread_log.debug("📚 %s 按订单簿不可成交，跳过告警", decision.symbol)
+                continue
+
+        # 生成告警消息
+        message = generate_alert_message(
+            decision.symbol, decision.futures_price, decision.exceeded, decision.level,
+            decision.avg_diff_pct, decision.max_diff_pct, decision.max_exchange, decision.futures_age,
+            executable
+        )
+
+        upgrade = f"📈 {decision.symbol} 告警升级！WARN → EMERGENCY " if decision.is_upgrade else ""
+        alert_log.event(
+            logging.WARNING if decision.level == "EMERGENCY" else logging.INFO,
+            "alert",
+            f"{upgrade}{decision.level} 触发告警！{decision.symbol} {len(decision.exceeded)}个交易所超阈值",
+            symbol=decision.symbol,
+            alert_level=decision.level,
+            upgrade=decision.is_upgrade,
+            futures_price=decision.futures_price,
+            exchanges=[e["exchange"] for e in decision.exceeded],
+            avg_diff_pct=round(decision.avg_diff_pct, 4),
+            max_diff_pct=round(decision.max_diff_pct, 4),
+            max_exchange=decision.max_exchange
+        )
+
+        # 提交 Telegram 推送（不阻塞）
+        if send_telegram_message(message, eval_started):
+            alert_policy.mark_sent(decision, current_time)
+            if metrics.enabled:
+                metrics.ALERTS.inc(decision.level)
+
+
+def run_pending_evaluations(timeout: float) -> int:
+    """
+    等待价格更新并评估所有被标记的币对
+
+    Args:
+        timeout: 最长等待时间（秒），超时未收到更新则对所有币对做一次全量扫描；
+                 有冷却或静音先于此到期时提前扫描
+
+    Returns:
+        本轮评估的币对数量
+    """
+    now = time.time()
+    expiry = alert_policy.next_expiry(now)
+    if expiry is not None:
+        timeout = min(timeout, expiry - now + 0.01)
+
+    if dirty_event.wait(timeout):
+        # 先清事件再取脏标记，之后到达的更新会重新唤醒
+        dirty_event.clear()
+        pending = price_book.take_dirty()
+
+        if metrics.enabled:
+            started = time.perf_counter()
+            for symbol in pending:
+                mark = update_marks.pop(symbol, None)
+                if mark is not None:
+                    metrics.STAGE_LATENCY.observe(started - mark, "update_to_eval")
+    else:
+        # 全量扫描：行情静止时，冷却 / 静音一到期即可再次告警
+        pending = SYMBOLS
+
+    if pending:
+        evaluate_symbols(pending)
+
+    return len(pending)
+
+
+def current_spreads(symbols: Optional[List[str]] = None) -> SpreadBatch:
+    """
+    按价格簿当前内容计算价差（只读，不影响告警冷却和增量评估状态）
+
+    Args:
+        symbols: 要计算的币对（默认全部）
+
+    Returns:
+        SpreadBatch
+    """
+    return compute_spreads(
+        price_book, list(symbols or SYMBOLS), FUTURES_EXCHANGE, PRICE_DIFF_THRESHOLD, USE_PERCENTAGE,
+        max_age=QUOTE_MAX_AGE, max_skew=QUOTE_MAX_SKEW
+    )
+
+
 # ==================== 价差监控线程 ====================
 def price_monitor():
-    """监控价差并发送分级告警"""
+    """监控价差并发送分级告警（由价格更新事件驱动）"""
     print(f"⚡ 启动分级价差监控")
     print(f"   监控币对: {', '.join(SYMBOLS)}")
     print(f"   交易所: {', '.join(ENABLED_EXCHANGES)}")
@@ -228,91 +496,85 @@ def price_monitor():
     print(f"   EMERGENCY 冷却: {EMERGENCY_COOLDOWN}秒\n")
 
     while True:
-        time.sleep(CHECK_INTERVAL)
-
-        # 遍历所有币对
-        for symbol in SYMBOLS:
-            with lock:
-                # 检查 Gate.io 合约价格是否已接收
-                if symbol not in gateio_futures:
-                    continue
-
-                futures_price = gateio_futures[symbol]
-
-            # 统计超过阈值的交易所
-            exceeded_exchanges = []
-
-            for exchange in ENABLED_EXCHANGES:
-                with lock:
-                    if symbol not in all_spot_prices.get(exchange, {}):
-                        continue
-
-                    spot_price = all_spot_prices[exchange][symbol]
-
-                # 计算价差
-                price_diff = futures_price - spot_price
-
-                if USE_PERCENTAGE:
-                    price_diff_pct = (price_diff / spot_price) * 100
-                    current_value = abs(price_diff_pct)
-                else:
-                    price_diff_pct = (price_diff / spot_price) * 100  # 用于显示
-                    current_value = abs(price_diff)
-
-                # 显示当前价差
-                if USE_PERCENTAGE:
-                    diff_display = f"{price_diff_pct:+.2f}%"
-                else:
-                    diff_display = f"{price_diff:+.4f}"
-
-                print(f"💹 {symbol} | Gate合约: {futures_price:.2f} vs {exchange.upper()}现货: {spot_price:.2f} = {diff_display}")
-
-                # 检查是否超过阈值
-                if current_value >= PRICE_DIFF_THRESHOLD:
-                    exceeded_exchanges.append({
-                        "exchange": exchange,
-                        "spot_price": spot_price,
-                        "diff": price_diff,
-                        "diff_pct": price_diff_pct
-                    })
-
-            # 确定告警级别
-            num_exceeded = len(exceeded_exchanges)
-
-            if num_exceeded == 0:
-                continue  # 无告警
-            elif num_exceeded == 1:
-                alert_level = "WARN"
-                cooldown = WARN_COOLDOWN
-            else:  # >= 2
-                alert_level = "EMERGENCY"
-                cooldown = EMERGENCY_COOLDOWN
-
-            # 检查冷却时间
-            current_time = time.time()
-            last_time = last_alert_times[symbol][alert_level]
-
-            # 告警升级逻辑：如果从 WARN 升级到 EMERGENCY，立即发送
-            is_upgrade = False
-            if alert_level == "EMERGENCY":
-                last_warn_time = last_alert_times[symbol]["WARN"]
-                # 如果最近发送了 WARN，且现在升级为 EMERGENCY
-                if last_warn_time > last_time and (current_time - last_warn_time) < WARN_COOLDOWN:
-                    is_upgrade = True
-
-            if is_upgrade or (current_time - last_time >= cooldown):
-                # 生成告警消息
-                message = generate_alert_message(symbol, futures_price, exceeded_exchanges, alert_level)
-
-                print(f"\n{'='*50}")
-                if is_upgrade:
-                    print(f"📈 {symbol} 告警升级！WARN → EMERGENCY")
-                print(f"{alert_level} 触发告警！{num_exceeded}个交易所超阈值")
-                print(f"{'='*50}\n")
-
-                # 发送 Telegram 消息
-                if send_telegram_message(message):
-                    last_alert_times[symbol][alert_level] = current_time
+        run_pending_evaluations(FULL_SCAN_INTERVAL)
+
+
+# ==================== 服务启停 ====================
+# 独立进程 (main) 与机器人进程内运行 (bot.monitor) 共用
+def start_services():
+    """启动日志写入线程、告警推送器、监控指标端点与行情录制"""
+    global tick_recorder
+
+    # 启动日志写入线程
+    configure_logging(LOG_CATEGORIES, LOG_JSON, LOG_QUEUE_SIZE)
+
+    # 启动告警推送（alert_dispatcher 可在此之前被替换，例如改由机器人自己的客户端发送）
+    alert_dispatcher.start()
+
+    # 启动监控指标端点
+    if METRICS_ENABLED and METRICS_PORT:
+        metrics.register(metrics.Gauge(
+            "alert_queue_depth", "Alerts waiting in the dispatcher queue", alert_dispatcher.queue.qsize
+        ))
+        metrics.register(metrics.Gauge(
+            "alerts_dropped", "Alerts dropped because the dispatcher queue was full",
+            lambda: alert_dispatcher.stats["dropped"]
+        ))
+        try:
+            metrics.start_http_server(METRICS_PORT, METRICS_HOST)
+            print(f"📈 监控指标: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"⚠️  监控指标端点启动失败: {e}")
+
+    # 启动行情录制
+    if TICK_RECORD_DIR:
+        print(f"💾 录制行情到 {TICK_RECORD_DIR}（分段 {TICK_SEGMENT_MB}MB）")
+        tick_recorder = TickRecorder(TICK_RECORD_DIR, segment_bytes=TICK_SEGMENT_MB * 1024 * 1024)
+        tick_recorder.start()
+
+
+def start_connectors(loop: Optional[asyncio.AbstractEventLoop] = None) -> List[ExchangeConnector]:
+    """
+    按 EXCHANGES 从连接器注册表中查找并启动所有交易所连接器
+
+    Args:
+        loop: 连接器运行的事件循环（默认为连接器共享的后台循环）
+
+    Returns:
+        已启动的连接器
+    """
+    load_plugins(EXCHANGE_PLUGINS)
+    connectors = []
+
+    for exchange in ENABLED_EXCHANGES:
+        connector_cls = get_connector(exchange)
+        if connector_cls is None:
+            print(f"⚠️  未知交易所: {exchange}（可用: {', '.join(available_exchanges())}），已跳过")
+            continue
+
+        # 合约价格只取自 FUTURES_EXCHANGE，其余交易所只订阅现货
+        enable_futures = exchange == FUTURES_EXCHANGE and "futures" in connector_cls.CAPABILITIES
+        with_depth = DEPTH_ENABLED and "depth" in connector_cls.CAPABILITIES
+        connector = connector_cls(
+            SYMBOLS, on_price_update, silence_timeout=WS_SILENCE_TIMEOUT,
+            on_depth_update=on_depth_update if with_depth else None, depth_levels=DEPTH_LEVELS
+        )
+        markets = "现货 + 合约" if enable_futures else "仅现货"
+        print(f"📡 启动 {connector.get_exchange_name()} 连接器（{markets}{' + 订单簿' if with_depth else ''}）...")
+        connector.start(enable_futures=enable_futures, loop=loop)
+        connectors.append(connector)
+
+    return connectors
+
+
+def stop_services(connectors: List[ExchangeConnector]):
+    """停止连接器、告警推送、行情录制，并写完剩余日志"""
+    for connector in connectors:
+        connector.stop()
+    alert_dispatcher.stop()
+    if tick_recorder is not None:
+        tick_recorder.stop()
+    shutdown_logging()
 
 
 # ==================== 主函数 ====================
@@ -333,20 +595,11 @@ def main():
         print("⚠️  警告: 未配置 Telegram，将只打印告警，不发送通知")
         print("   请在 .env 文件中配置 BOT_TOKEN 和 ADMIN_CHAT_ID\n")
 
-    # 创建并启动所有交易所连接器
-    connectors = []
+    # 启动日志、告警推送、监控指标与行情录制
+    start_services()
 
-    if "gateio" in ENABLED_EXCHANGES:
-        print("📡 启动 Gate.io 连接器（现货 + 合约）...")
-        gateio = GateIOConnector(SYMBOLS, on_price_update)
-        gateio.start(enable_futures=True)  # 启用合约监听
-        connectors.append(gateio)
-
-    if "bybit" in ENABLED_EXCHANGES:
-        print("📡 启动 Bybit 连接器（仅现货）...")
-        bybit = BybitConnector(SYMBOLS, on_price_update)
-        bybit.start(enable_futures=False)  # 禁用合约监听
-        connectors.append(bybit)
+    # 创建并启动所有交易所连接器
+    connectors = start_connectors()
 
     # 启动价差监控线程
     print("\n📡 启动价差监控线程...")
@@ -361,8 +614,7 @@ def main():
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n\n⏹️  停止监控")
-        for connector in connectors:
-            connector.stop()
+        stop_services(connectors)
 
 
 if __name__ == "__main__":
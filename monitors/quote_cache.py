@@ -0,0 +1,39 @@
+"""
+报价缓存：通用 TTL 缓存 (monitors.cache.TTLCache) 加上报价缓存键
+
+缓存的行为（TTL + LRU + stale-while-revalidate + 单飞合并）见 monitors.cache
+"""
+
+import math
+from typing import Tuple
+
+from .cache import TTLCache
+
+# 报价缓存就是通用的 TTL 缓存，键由 quote_key 生成
+QuoteCache = TTLCache
+
+
+def amount_bucket(amount_raw: int, digits: int = 0) -> int:
+    """
+    把数量归入按有效数字划分的桶，使相近的数量共用一个缓存条目
+
+    例如 digits=3 时 100_012_345 和 100_049_999 都归入 100_000_000。
+    注意命中时返回的是桶内第一次回源时那个数量的报价（in_amount / out_amount 都不是本次请求的数量），
+    只适合能接受近似报价的场景，因此默认不分桶
+
+    Args:
+        amount_raw: 最小单位的数量
+        digits: 保留的有效数字位数（0 表示不分桶）
+
+    Returns:
+        桶的代表值
+    """
+    if digits <= 0 or amount_raw <= 0:
+        return amount_raw
+    scale = 10 ** max(0, int(math.log10(amount_raw)) + 1 - digits)
+    return amount_raw // scale * scale
+
+
+def quote_key(input_mint: str, output_mint: str, amount_raw: int, slippage_bps: int, digits: int = 0) -> Tuple:
+    """报价缓存键: (输入 mint, 输出 mint, 数量桶, 滑点)"""
+    return (input_mint, output_mint, amount_bucket(amount_raw, digits), slippage_bps)
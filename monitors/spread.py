@@ -0,0 +1,312 @@
+"""
+批量价差计算
+一次性计算多个币对的 合约 vs 各交易所现货 价差矩阵、超阈值掩码、告警级别和统计值
+
+安装了 NumPy 时使用向量化实现，否则退回纯 Python 实现，两者结果一致
+"""
+
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .price_book import (
+    PriceBook, PRICE_TYPES, RECORD_SIZE, FIELD_PRICE, FIELD_TIMESTAMP, FIELD_SEQ, FIELD_EXCHANGE_TS
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+HAS_NUMPY = np is not None
+
+# 币对数量少于该值时向量化的固定开销不划算，auto 模式下走纯 Python
+VECTORIZE_MIN_SYMBOLS = 8
+
+
+class SpreadBatch(NamedTuple):
+    """
+    批量价差结果，二维字段按 [币对][交易所] 索引
+
+    NumPy 实现返回 ndarray，纯 Python 实现返回嵌套列表，均支持 batch.field[i][j] 访问；
+    缺失的价格为 NaN，对应的 valid 为 False；
+    超过 max_age 未更新、或两条腿的行情时间相差超过 max_skew 的报价同样视为无效
+    """
+    symbols: List[str]
+    exchanges: List[str]
+    futures: Sequence[float]           # [币对] 合约价格
+    spot: Sequence[Sequence[float]]    # [币对][交易所] 现货价格
+    valid: Sequence[Sequence[bool]]    # 合约与现货价格都已收到、未过期且时间差在允许范围内
+    diff: Sequence[Sequence[float]]    # 合约 - 现货
+    diff_pct: Sequence[Sequence[float]]
+    exceeded: Sequence[Sequence[bool]]
+    num_exceeded: Sequence[int]
+    levels: List[Optional[str]]        # None / "WARN" / "EMERGENCY"
+    avg_diff_pct: Sequence[float]      # 超阈值交易所的平均 |价差%|
+    max_diff_pct: Sequence[float]      # 超阈值交易所中 |价差%| 最大的那个（带符号）
+    max_exchange: List[Optional[str]]
+    futures_age: Sequence[float]       # [币对] 合约报价年龄（秒，按本地接收时间）
+    spot_age: Sequence[Sequence[float]]  # [币对][交易所] 现货报价年龄
+
+
+def _level(num_exceeded: int) -> Optional[str]:
+    if num_exceeded == 0:
+        return None
+    return "WARN" if num_exceeded == 1 else "EMERGENCY"
+
+
+def compute_spreads_python(
+    book: PriceBook,
+    symbols: List[str],
+    futures_exchange: str,
+    threshold: float,
+    use_percentage: bool,
+    max_age: float = 0,
+    now: Optional[float] = None,
+    max_skew: float = 0
+) -> SpreadBatch:
+    """纯 Python 实现，逐个币对读取价格簿快照"""
+    exchanges = book.exchanges
+    now = time.time() if now is None else now
+    # 早于该时间的报价视为过期
+    oldest = now - max_age if max_age > 0 else -math.inf
+    max_skew = max_skew if max_skew > 0 else math.inf
+    futures_col, spot_rows, valid_rows, diff_rows, pct_rows, exceeded_rows = [], [], [], [], [], []
+    counts, levels, avgs, maxes, max_exchanges = [], [], [], [], []
+    futures_ages, spot_ages = [], []
+
+    for symbol in symbols:
+        spot_quotes, futures_quotes = book.read_symbol(symbol)
+        futures_quote = futures_quotes.get(futures_exchange)
+        futures_price = futures_quote.price if futures_quote else math.nan
+        futures_ages.append(now - futures_quote.timestamp if futures_quote else math.nan)
+        if futures_quote is not None and futures_quote.timestamp < oldest:
+            futures_quote = None
+        futures_time = futures_quote.exchange_ts or futures_quote.timestamp if futures_quote else 0.0
+
+        spot_row, valid_row, diff_row, pct_row, exceeded_row, age_row = [], [], [], [], [], []
+        total_abs_pct = 0.0
+        max_pct = 0.0
+        max_exchange = None
+
+        for exchange in exchanges:
+            quote = spot_quotes.get(exchange)
+            age_row.append(now - quote.timestamp if quote else math.nan)
+            if (
+                futures_quote is None or quote is None or quote.timestamp < oldest
+                or abs((quote.exchange_ts or quote.timestamp) - futures_time) > max_skew
+            ):
+                spot_row.append(quote.price if quote else math.nan)
+                valid_row.append(False)
+                diff_row.append(math.nan)
+                pct_row.append(math.nan)
+                exceeded_row.append(False)
+                continue
+
+            spot_price = quote.price
+            price_diff = futures_price - spot_price
+            price_diff_pct = (price_diff / spot_price) * 100
+            current_value = abs(price_diff_pct) if use_percentage else abs(price_diff)
+            is_exceeded = current_value >= threshold
+
+            spot_row.append(spot_price)
+            valid_row.append(True)
+            diff_row.append(price_diff)
+            pct_row.append(price_diff_pct)
+            exceeded_row.append(is_exceeded)
+
+            if is_exceeded:
+                total_abs_pct += abs(price_diff_pct)
+                if max_exchange is None or abs(price_diff_pct) > abs(max_pct):
+                    max_pct = price_diff_pct
+                    max_exchange = exchange
+
+        count = sum(exceeded_row)
+        futures_col.append(futures_price)
+        spot_rows.append(spot_row)
+        valid_rows.append(valid_row)
+        diff_rows.append(diff_row)
+        pct_rows.append(pct_row)
+        exceeded_rows.append(exceeded_row)
+        counts.append(count)
+        levels.append(_level(count))
+        avgs.append(total_abs_pct / count if count else 0.0)
+        maxes.append(max_pct)
+        max_exchanges.append(max_exchange)
+        spot_ages.append(age_row)
+
+    return SpreadBatch(
+        list(symbols), list(exchanges), futures_col, spot_rows, valid_rows, diff_rows, pct_rows,
+        exceeded_rows, counts, levels, avgs, maxes, max_exchanges, futures_ages, spot_ages
+    )
+
+
+def compute_spreads_numpy(
+    book: PriceBook,
+    symbols: List[str],
+    futures_exchange: str,
+    threshold: float,
+    use_percentage: bool,
+    max_age: float = 0,
+    now: Optional[float] = None,
+    max_skew: float = 0
+) -> SpreadBatch:
+    """NumPy 实现，对整个价格簿快照做一次向量化计算"""
+    exchanges = book.exchanges
+    num_types = len(PRICE_TYPES)
+    data = np.frombuffer(book.snapshot(), dtype=np.float64).reshape(
+        len(book.symbols), len(exchanges), num_types, RECORD_SIZE
+    )
+    rows = data[[book.symbol_index[s] for s in symbols]]
+
+    now = time.time() if now is None else now
+    oldest = now - max_age if max_age > 0 else -np.inf
+
+    spot_slot = rows[:, :, PRICE_TYPES["spot"]]
+    spot = spot_slot[:, :, FIELD_PRICE]
+    spot_received = spot_slot[:, :, FIELD_TIMESTAMP]
+    spot_present = spot_slot[:, :, FIELD_SEQ] > 0
+    spot_seen = spot_present & (spot_received >= oldest)
+    spot_age = np.where(spot_present, now - spot_received, np.nan)
+    spot_time = np.where(spot_slot[:, :, FIELD_EXCHANGE_TS] > 0, spot_slot[:, :, FIELD_EXCHANGE_TS], spot_received)
+
+    if futures_exchange in book.exchange_index:
+        futures_slot = rows[:, book.exchange_index[futures_exchange], PRICE_TYPES["futures"]]
+        futures = futures_slot[:, FIELD_PRICE]
+        futures_present = futures_slot[:, FIELD_SEQ] > 0
+        futures_seen = futures_present & (futures_slot[:, FIELD_TIMESTAMP] >= oldest)
+        futures_age = np.where(futures_present, now - futures_slot[:, FIELD_TIMESTAMP], np.nan)
+        futures_time = np.where(
+            futures_slot[:, FIELD_EXCHANGE_TS] > 0, futures_slot[:, FIELD_EXCHANGE_TS], futures_slot[:, FIELD_TIMESTAMP]
+        )
+    else:
+        futures = np.full(len(symbols), np.nan)
+        futures_seen = np.zeros(len(symbols), dtype=bool)
+        futures_age = np.full(len(symbols), np.nan)
+        futures_time = np.zeros(len(symbols))
+
+    valid = spot_seen & futures_seen[:, None]
+    if max_skew > 0:
+        valid &= np.abs(spot_time - futures_time[:, None]) <= max_skew
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diff = np.where(valid, futures[:, None] - spot, np.nan)
+        diff_pct = diff / spot * 100
+        value = np.abs(diff_pct) if use_percentage else np.abs(diff)
+        exceeded = valid & (value >= threshold)
+
+    num_exceeded = exceeded.sum(axis=1)
+    abs_pct = np.where(exceeded, np.abs(diff_pct), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_diff_pct = np.where(num_exceeded > 0, abs_pct.sum(axis=1) / num_exceeded, 0.0)
+
+    max_idx = abs_pct.argmax(axis=1)
+    max_diff_pct = np.where(num_exceeded > 0, diff_pct[np.arange(len(symbols)), max_idx], 0.0)
+
+    levels = [_level(int(n)) for n in num_exceeded]
+    max_exchange = [exchanges[j] if n else None for j, n in zip(max_idx.tolist(), num_exceeded.tolist())]
+
+    return SpreadBatch(
+        list(symbols), list(exchanges), futures, spot, valid, diff, diff_pct,
+        exceeded, num_exceeded, levels, avg_diff_pct, max_diff_pct, max_exchange, futures_age, spot_age
+    )
+
+
+def compute_spreads(
+    book: PriceBook,
+    symbols: List[str],
+    futures_exchange: str,
+    threshold: float,
+    use_percentage: bool,
+    backend: str = "auto",
+    max_age: float = 0,
+    now: Optional[float] = None,
+    max_skew: float = 0
+) -> SpreadBatch:
+    """
+    计算指定币对的价差矩阵和告警级别
+
+    Args:
+        book: 价格簿
+        symbols: 要计算的币对
+        futures_exchange: 合约价格来源交易所
+        threshold: 价差阈值（百分比或绝对值）
+        use_percentage: 阈值是否为百分比
+        backend: "numpy" / "python" / "auto"（按可用性与币对数量自动选择）
+        max_age: 报价最大允许年龄（秒），超过的报价不参与计算；0 表示不检查
+        now: 判断过期所用的当前时间（默认 time.time()，回放时为虚拟时钟）
+        max_skew: 合约与现货两条腿的行情时间最大允许差值（秒，优先用交易所时间）；0 表示不检查
+
+    Returns:
+        SpreadBatch
+    """
+    if backend == "auto":
+        backend = "numpy" if HAS_NUMPY and len(symbols) >= VECTORIZE_MIN_SYMBOLS else "python"
+
+    if backend == "numpy":
+        if not HAS_NUMPY:
+            raise RuntimeError("NumPy 未安装，无法使用向量化价差计算")
+        return compute_spreads_numpy(
+            book, symbols, futures_exchange, threshold, use_percentage, max_age, now, max_skew
+        )
+
+    return compute_spreads_python(book, symbols, futures_exchange, threshold, use_percentage, max_age, now, max_skew)
+
+
+# ==================== 增量评估 ====================
+class ChangeTracker:
+    """
+    跳过输入未变化的币对
+
+    若一个币对上次评估时没有告警、也没有报价因过期或时间差被排除，
+    那么只要它整行的价格没有变化，再次评估的结果必然相同，可以直接跳过。
+    按价格而不是序号比较，因此价格不变的重复推送也会被跳过。
+    """
+
+    def __init__(self, book: PriceBook):
+        self.book = book
+        # {symbol: 上次评估时的价格行}，只保存可以跳过的币对
+        self._clean: Dict[str, bytes] = {}
+        # 本轮待评估币对的价格行，评估完成后由 record() 决定是否写入 _clean
+        self._pending: Dict[str, bytes] = {}
+        self.skipped = 0
+
+    def changed(self, symbols: List[str]) -> List[str]:
+        """返回需要重新评估的币对"""
+        clean = self._clean
+        result = []
+        for symbol in symbols:
+            prices = self.book.price_key(symbol)
+            if clean.get(symbol) == prices:
+                self.skipped += 1
+                continue
+            self._pending[symbol] = prices
+            result.append(symbol)
+        return result
+
+    def record(self, batch: SpreadBatch):
+        """记录评估结果，决定这些币对下次能否被跳过"""
+        for i, symbol in enumerate(batch.symbols):
+            prices = self._pending.pop(symbol, None)
+            if prices is None:
+                continue
+
+            if batch.levels[i] is None and not self._has_excluded(batch, i):
+                self._clean[symbol] = prices
+            else:
+                self._clean.pop(symbol, None)
+
+    @staticmethod
+    def _has_excluded(batch: SpreadBatch, i: int) -> bool:
+        """第 i 个币对是否有两条腿都有价格、却因过期或时间差被判为无效的交易所"""
+        if math.isnan(batch.futures[i]):
+            return False
+        valid, spot = batch.valid[i], batch.spot[i]
+        for j in range(len(batch.exchanges)):
+            if not valid[j] and spot[j] == spot[j]:
+                return True
+        return False
+
+    def reset(self):
+        """清空缓存，下次评估所有币对"""
+        self._clean.clear()
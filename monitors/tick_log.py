@@ -0,0 +1,289 @@
+"""
+行情录制
+把每笔 (ts, exchange, symbol, price_type, price) 以定长二进制记录追加写入分段文件，
+回放时用 mmap 零拷贝读取，支持分段轮转与合并压缩
+
+目录结构:
+    meta.json                    交易所 / 币对 名称与编号的映射（只追加，编号稳定）
+    ticks-<毫秒时间戳>.bin        分段文件：16 字节文件头 + 若干 24 字节记录
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+MAGIC = b"XTCK"
+VERSION = 1
+
+# 文件头: magic, version, record size, 保留
+HEADER = struct.Struct("<4sHH8x")
+# 记录: ts, exchange id, symbol id, price type, 填充, price
+RECORD = struct.Struct("<dHHB3xd")
+
+PRICE_TYPE_IDS = {"spot": 0, "futures": 1}
+PRICE_TYPE_NAMES = {v: k for k, v in PRICE_TYPE_IDS.items()}
+
+META_FILE = "meta.json"
+SEGMENT_PATTERN = "ticks-*.bin"
+
+
+class Tick(NamedTuple):
+    """一笔回放出来的行情"""
+    ts: float
+    exchange: str
+    symbol: str
+    price_type: str
+    price: float
+
+
+def _load_meta(directory: str) -> Dict[str, List[str]]:
+    path = os.path.join(directory, META_FILE)
+    if not os.path.exists(path):
+        return {"exchanges": [], "symbols": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_meta(directory: str, meta: Dict[str, List[str]]):
+    path = os.path.join(directory, META_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def list_segments(directory: str) -> List[str]:
+    """按时间顺序列出目录下的分段文件"""
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+# ==================== 录制 ====================
+class TickRecorder:
+    """
+    行情录制器
+
+    record() 只把打包好的记录放进 deque（线程安全、无锁、不做 I/O），
+    后台线程定期批量写盘，因此不会拖慢行情路径
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 1.0
+    ):
+        """
+        Args:
+            directory: 录制目录
+            segment_bytes: 单个分段文件的最大字节数，超过后轮转
+            flush_interval: 后台写盘间隔（秒）
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._meta = _load_meta(directory)
+        self._exchange_ids = {name: i for i, name in enumerate(self._meta["exchanges"])}
+        self._symbol_ids = {name: i for i, name in enumerate(self._meta["symbols"])}
+
+        self._pending: deque = deque()
+        self._file = None
+        self._file_size = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self.records_written = 0
+
+    def _id(self, table: Dict[str, int], key: str, name: str) -> int:
+        """查找或分配编号（新名称极少出现，这里才需要写 meta）"""
+        i = table.get(name)
+        if i is None:
+            with self._write_lock:
+                i = table.get(name)
+                if i is None:
+                    i = len(self._meta[key])
+                    self._meta[key].append(name)
+                    _save_meta(self.directory, self._meta)
+                    table[name] = i
+        return i
+
+    def record(self, exchange: str, symbol: str, price_type: str, price: float, ts: Optional[float] = None):
+        """追加一笔行情（不阻塞）"""
+        self._pending.append(RECORD.pack(
+            ts or time.time(),
+            self._id(self._exchange_ids, "exchanges", exchange),
+            self._id(self._symbol_ids, "symbols", symbol),
+            PRICE_TYPE_IDS.get(price_type, 0),
+            price
+        ))
+
+    # ==================== 写盘 ====================
+    def _open_segment(self):
+        path = os.path.join(self.directory, f"ticks-{int(time.time() * 1000):015d}.bin")
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._file_size = self._file.tell()
+
+    def rotate(self):
+        """封存当前分段，下次写入时新建分段"""
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def flush(self):
+        """把缓冲的记录写入当前分段"""
+        pending = self._pending
+        if not pending:
+            return
+
+        chunks = []
+        try:
+            while True:
+                chunks.append(pending.popleft())
+        except IndexError:
+            pass
+
+        with self._write_lock:
+            i = 0
+            while i < len(chunks):
+                if self._file is None or self._file_size >= self.segment_bytes:
+                    if self._file is not None:
+                        self._file.close()
+                    self._open_segment()
+                # 当前分段还能容纳的记录数
+                room = max(1, (self.segment_bytes - self._file_size) // RECORD.size)
+                data = b"".join(chunks[i:i + room])
+                self._file.write(data)
+                self._file_size += len(data)
+                i += room
+            self._file.flush()
+
+        self.records_written += len(chunks)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def start(self):
+        """启动后台写盘线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="TickRecorder")
+            self._thread.start()
+
+    def stop(self):
+        """写完剩余记录并关闭分段"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.rotate()
+
+
+# ==================== 回放 ====================
+class TickLogReader:
+    """用 mmap 读取录制目录，按时间顺序回放"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        meta = _load_meta(directory)
+        self.exchanges: List[str] = meta["exchanges"]
+        self.symbols: List[str] = meta["symbols"]
+
+    @staticmethod
+    def map_segment(path: str):
+        """
+        mmap 一个分段文件
+
+        Returns:
+            (mmap 对象, 记录区的 memoryview)；调用方负责先释放 memoryview 再关闭 mmap
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= HEADER.size:
+                return None, memoryview(b"")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            mm.close()
+            raise ValueError(f"不是有效的行情分段文件: {path}")
+
+        # 忽略末尾可能未写完整的记录
+        usable = (size - HEADER.size) // RECORD.size * RECORD.size
+        return mm, memoryview(mm)[HEADER.size:HEADER.size + usable]
+
+    def iter_raw(self, segments: Optional[List[str]] = None) -> Iterator[tuple]:
+        """逐条返回未解码的记录元组 (ts, exchange_id, symbol_id, price_type_id, price)"""
+        for path in segments if segments is not None else list_segments(self.directory):
+            mm, view = self.map_segment(path)
+            records = RECORD.iter_unpack(view)
+            try:
+                yield from records
+            finally:
+                # 迭代器持有 memoryview 的导出，先释放它才能关闭 mmap
+                del records
+                view.release()
+                if mm is not None:
+                    mm.close()
+
+    def __iter__(self) -> Iterator[Tick]:
+        exchanges, symbols = self.exchanges, self.symbols
+        for ts, e, s, p, price in self.iter_raw():
+            yield Tick(ts, exchanges[e], symbols[s], PRICE_TYPE_NAMES.get(p, "spot"), price)
+
+
+# ==================== 压缩 ====================
+def compact_segments(directory: str, segments: Optional[List[str]] = None, dedupe: bool = True) -> Optional[str]:
+    """
+    把多个已封存分段合并为一个按时间排序的分段，并删除原分段
+
+    Args:
+        directory: 录制目录
+        segments: 要合并的分段（默认：除最新一个外的全部分段，最新的可能仍在写入）
+        dedupe: 是否丢弃与同一 (交易所, 币对, 价格类型) 上一笔价格相同的记录
+
+    Returns:
+        合并后的分段路径，没有可合并的分段时返回 None
+    """
+    if segments is None:
+        segments = list_segments(directory)[:-1]
+    if len(segments) < 2 and not dedupe:
+        return None
+    if not segments:
+        return None
+
+    reader = TickLogReader(directory)
+    records = sorted(reader.iter_raw(segments), key=lambda r: r[0])
+
+    if dedupe:
+        last_price: Dict[tuple, float] = {}
+        kept = []
+        for record in records:
+            key = record[1:4]
+            if last_price.get(key) != record[4]:
+                last_price[key] = record[4]
+                kept.append(record)
+        records = kept
+
+    # 以第一个分段的名字落盘，保证与其余分段的时间顺序一致
+    target = segments[0]
+    tmp = target + ".compact"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        f.write(b"".join(RECORD.pack(*r) for r in records))
+
+    for path in segments:
+        os.remove(path)
+    os.replace(tmp, target)
+    return target
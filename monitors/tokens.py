@@ -0,0 +1,260 @@
+"""
+代币注册表：币对 / 代币符号 / mint / 精度 / 各交易所币对格式
+从本地 JSON 文件加载（默认 monitors/tokens.json，可用 TOKEN_REGISTRY_FILE 指定），
+按符号、币对、mint 建索引，双向 O(1) 查找；Jupiter 模块与交易所连接器共用同一份
+
+文件格式:
+    {
+      "quote": {"symbol": "USDT", "mint": "...", "decimals": 6},
+      "tokens": [
+        {"symbol": "TSLAx", "mint": "...", "decimals": 8, "venues": {"bybit": "TSLAXUSDT"}},
+        {"symbol": "NVDAx", "mint": "..."}
+      ]
+    }
+
+- 币对名为 代币符号大写_计价符号（TSLAx -> TSLAX_USDT）
+- venues 可选，覆盖某个交易所的默认币对格式（见 exchanges/symbols.py）
+- decimals 可省略：第一次需要时按 mint 批量向 Jupiter Token API 查询，并缓存到磁盘
+  (TOKEN_CACHE_FILE，默认 ~/.cache/price-monitor/token_metadata.json)，
+  注册表列出上百个代币时启动也只是读一个 JSON 文件
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_REGISTRY_FILE = os.path.join(os.path.dirname(__file__), "tokens.json")
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "price-monitor", "token_metadata.json")
+
+JUPITER_TOKEN_API = "https://lite-api.jup.ag/tokens/v2/search"
+METADATA_BATCH_SIZE = 100  # Token API 每次查询的 mint 上限
+
+
+class Token(NamedTuple):
+    """Solana 代币"""
+    symbol: str
+    mint: str
+    decimals: int
+
+
+class TokenEntry:
+    """注册表中的一个代币（decimals 可能尚未加载）"""
+
+    __slots__ = ("symbol", "mint", "decimals", "venues", "pair")
+
+    def __init__(self, symbol: str, mint: str, decimals: Optional[int], venues: Dict[str, str], pair: str):
+        self.symbol = symbol
+        self.mint = mint
+        self.decimals = decimals
+        self.venues = venues
+        self.pair = pair
+
+
+class TokenRegistry:
+    """代币注册表"""
+
+    def __init__(self, quote: Token, entries: Iterable[TokenEntry], cache_file: Optional[str] = None):
+        """
+        Args:
+            quote: 计价代币（USDT）
+            entries: 代币条目
+            cache_file: 代币元数据的磁盘缓存文件（None 表示不落盘）
+        """
+        self.quote = quote
+        self.cache_file = cache_file
+        self.entries: List[TokenEntry] = list(entries)
+        self._by_key: Dict[str, TokenEntry] = {}
+        self._by_mint: Dict[str, TokenEntry] = {}
+        for entry in self.entries:
+            self._by_key[entry.symbol.upper()] = entry
+            self._by_key[entry.pair.upper()] = entry
+            self._by_mint[entry.mint] = entry
+        self._lock = threading.Lock()
+        self._disk_cache: Optional[Dict[str, dict]] = None
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_REGISTRY_FILE, cache_file: Optional[str] = DEFAULT_CACHE_FILE) -> "TokenRegistry":
+        """
+        从 JSON 文件加载注册表（只解析文件，不发起网络请求）
+
+        Raises:
+            ValueError: 文件格式错误
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        try:
+            q = data["quote"]
+            quote = Token(q["symbol"], q["mint"], int(q["decimals"]))
+            entries = [
+                TokenEntry(
+                    t["symbol"],
+                    t["mint"],
+                    int(t["decimals"]) if t.get("decimals") is not None else None,
+                    {k.lower(): v for k, v in t.get("venues", {}).items()},
+                    f"{t['symbol'].upper()}_{quote.symbol.upper()}"
+                )
+                for t in data.get("tokens", ())
+            ]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"代币注册表格式错误 ({path}): {e}") from e
+
+        return cls(quote, entries, cache_file)
+
+    # ==================== 查找 ====================
+    def entry(self, key: str) -> Optional[TokenEntry]:
+        """按代币符号 (TSLAx) 或币对 (TSLAX_USDT) 查找，不区分大小写"""
+        return self._by_key.get(key.upper())
+
+    def by_mint(self, mint: str) -> Optional[TokenEntry]:
+        """按 mint 查找"""
+        if mint == self.quote.mint:
+            return TokenEntry(self.quote.symbol, self.quote.mint, self.quote.decimals, {}, self.quote.symbol)
+        return self._by_mint.get(mint)
+
+    def mint(self, key: str) -> Optional[str]:
+        """代币符号或币对 -> mint"""
+        entry = self.entry(key)
+        return entry.mint if entry else None
+
+    def pair(self, mint: str) -> Optional[str]:
+        """mint -> 币对 (TSLAX_USDT)"""
+        entry = self._by_mint.get(mint)
+        return entry.pair if entry else None
+
+    def venue_symbol(self, exchange: str, pair: str) -> Optional[str]:
+        """某交易所对该币对的格式覆盖，没有覆盖时返回 None"""
+        entry = self.entry(pair)
+        return entry.venues.get(exchange) if entry else None
+
+    def mints_for(self, pairs: Iterable[str]) -> Dict[str, str]:
+        """{币对: mint}，注册表中没有的币对被跳过"""
+        result = {}
+        for pair in pairs:
+            entry = self.entry(pair)
+            if entry is not None:
+                result[pair] = entry.mint
+        return result
+
+    # ==================== 元数据（精度） ====================
+    def token(self, key: str) -> Token:
+        """
+        代币符号 / 币对 / mint -> Token，精度未知时按需加载
+
+        Raises:
+            KeyError: 注册表中没有该代币
+            ValueError: 无法取得精度
+        """
+        if key.upper() == self.quote.symbol.upper() or key == self.quote.mint:
+            return self.quote
+        entry = self.entry(key) or self._by_mint.get(key)
+        if entry is None:
+            raise KeyError(f"代币注册表中没有 {key}")
+        if entry.decimals is None:
+            self.resolve([entry.mint])
+        if entry.decimals is None:
+            raise ValueError(f"无法获取 {entry.symbol} 的精度")
+        return Token(entry.symbol, entry.mint, entry.decimals)
+
+    def tokens(self, keys: Iterable[str]) -> List[Token]:
+        """批量版 token()：缺少精度的代币合并为一次查询"""
+        keys = list(keys)
+        entries = [self.entry(k) or self._by_mint.get(k) for k in keys]
+        self.resolve(e.mint for e in entries if e is not None and e.decimals is None)
+        return [self.token(k) for k in keys]
+
+    def resolve(self, mints: Iterable[str]):
+        """
+        为尚无精度的 mint 加载元数据：先查磁盘缓存，剩下的按批向 Jupiter Token API 查询并写回缓存
+
+        网络失败时静默返回，调用方通过 decimals 仍为 None 得知
+        """
+        with self._lock:
+            pending = [m for m in dict.fromkeys(mints) if m in self._by_mint and self._by_mint[m].decimals is None]
+            if not pending:
+                return
+
+            cache = self._load_disk_cache()
+            missing = []
+            for mint in pending:
+                meta = cache.get(mint)
+                if meta and meta.get("decimals") is not None:
+                    self._by_mint[mint].decimals = int(meta["decimals"])
+                else:
+                    missing.append(mint)
+
+            if not missing:
+                return
+
+            fetched = {}
+            for i in range(0, len(missing), METADATA_BATCH_SIZE):
+                fetched.update(self._fetch_metadata(missing[i:i + METADATA_BATCH_SIZE]))
+
+            for mint, meta in fetched.items():
+                if mint in self._by_mint and meta.get("decimals") is not None:
+                    self._by_mint[mint].decimals = int(meta["decimals"])
+            if fetched:
+                cache.update(fetched)
+                self._save_disk_cache(cache)
+
+    @staticmethod
+    def _fetch_metadata(mints: List[str]) -> Dict[str, dict]:
+        import httpx
+
+        try:
+            response = httpx.get(JUPITER_TOKEN_API, params={"query": ",".join(mints)}, timeout=10)
+            response.raise_for_status()
+            items = response.json()
+        except (httpx.HTTPError, ValueError):
+            return {}
+
+        return {
+            item["id"]: {"symbol": item.get("symbol"), "name": item.get("name"), "decimals": item.get("decimals")}
+            for item in items
+            if isinstance(item, dict) and item.get("id") in mints
+        }
+
+    def _load_disk_cache(self) -> Dict[str, dict]:
+        if self._disk_cache is None:
+            self._disk_cache = {}
+            if self.cache_file:
+                try:
+                    with open(self.cache_file, "r", encoding="utf-8") as f:
+                        self._disk_cache = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self._disk_cache
+
+    def _save_disk_cache(self, cache: Dict[str, dict]):
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+_registry: Optional[TokenRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TokenRegistry:
+    """
+    进程内共享的注册表，第一次调用时按 TOKEN_REGISTRY_FILE / TOKEN_CACHE_FILE 加载
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TokenRegistry.load(
+                os.environ.get("TOKEN_REGISTRY_FILE") or DEFAULT_REGISTRY_FILE,
+                os.environ.get("TOKEN_CACHE_FILE") or DEFAULT_CACHE_FILE
+            )
+        return _registry
@@ -0,0 +1,39 @@
+import asyncio
+
+import httpx
+
+from monitors.jupiter_client import JupiterQuoteClient
+from monitors.quote_cache import QuoteCache, quote_key
+from monitors.tokens import Token
+
+USDT = Token("USDT", "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB", 6)
+TSLAX = Token("TSLAx", "XsDoVfqeBukxuZHWhdvWHBhgEHjGNst4MLodqsJHzoB", 8)
+
+
+def fake_jupiter(request: httpx.Request) -> httpx.Response:
+    """按请求的数量原样回报 inAmount，1 USDT 换 0.004 TSLAx"""
+    amount = int(request.url.params["amount"])
+    out_amount = amount * 10 ** (TSLAX.decimals - USDT.decimals) * 4 // 1000
+    return httpx.Response(200, json={"inAmount": str(amount), "outAmount": str(out_amount), "routePlan": []})
+
+
+def test_default_key_keeps_exact_amount():
+    assert quote_key("a", "b", 1_000_000_000, 50) != quote_key("a", "b", 1_009_000_000, 50)
+
+
+def test_nearby_amounts_are_not_served_from_one_entry():
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(fake_jupiter))
+        async with JupiterQuoteClient(client=client, cache=QuoteCache(ttl=60)) as jupiter:
+            first = await jupiter.quote(USDT, TSLAX, 1000)
+            second = await jupiter.quote(USDT, TSLAX, 1009)
+            again = await jupiter.quote(USDT, TSLAX, 1000)
+        await client.aclose()
+        return first, second, again, jupiter.cache
+
+    first, second, again, cache = asyncio.run(run())
+    assert first.in_amount == 1000
+    assert second.in_amount == 1009
+    assert second.out_amount != first.out_amount
+    assert again == first
+    assert cache.stats["hits"] == 1